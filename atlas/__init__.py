@@ -14,9 +14,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-__all__ = ["sink", "visualize", "CocoDataset", "YoloDataset", "CocoSegmentationDataset", "CsvDataset", "ParquetDataset"]
+__all__ = ["sink", "materialize", "visualize", "CocoDataset", "YoloDataset", "CocoSegmentationDataset", "CsvDataset", "ParquetDataset"]
 
 from .data_sinks import sink
+from .tasks.data_model.materialize import materialize
 from .visualizers.visualizer import visualize
 from .tasks.object_detection.coco import CocoDataset
 from .tasks.object_detection.yolo import YoloDataset
@@ -16,7 +16,7 @@
 
 import os
 import json
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 
 import lance
 import pyarrow as pa
@@ -33,11 +33,11 @@ class LanceDataSink:
         self.kwargs = kwargs
         self._metadata = None
 
-    def write(self, data: Union[str, BaseDataset, Dataset], task: Optional[str] = None, format: Optional[str] = None, **kwargs):
+    def write(self, data: Union[str, List[str], BaseDataset, Dataset], task: Optional[str] = None, format: Optional[str] = None, **kwargs):
         if isinstance(data, (Dataset, IterableDataset)) and task is None:
             task = "hf"
 
-        if isinstance(data, str):
+        if isinstance(data, (str, list, tuple)):
             dataset = create_dataset(data, task=task, format=format, **kwargs)
         elif isinstance(data, (Dataset, IterableDataset)) or (
             hasattr(data, "__iter__") and hasattr(data, "__next__")
@@ -67,11 +67,11 @@ class LanceDataSink:
 
 
 def sink(
-    data: Union[str, BaseDataset, Dataset],
+    data: Union[str, List[str], BaseDataset, Dataset],
     uri: Optional[str] = None,
     task: Optional[str] = None,
     format: Optional[str] = None,
-    mode: str = "overwrite",
+    mode: Optional[str] = None,
     **kwargs,
 ):
     """
@@ -82,33 +82,113 @@ def sink(
     to write the data to a Lance dataset.
 
     Args:
-        data: The data to sink. Can be a path to a file or directory, or a
-            Hugging Face Dataset object.
+        data: The data to sink. Can be a path to a file or directory, a glob
+            pattern such as "data/part-*.jsonl", a list of paths, or a
+            Hugging Face Dataset object. Several files of the same format,
+            other than COCO or YOLO, are written as one dataset, in a single
+            version.
         uri (str): The URI of the Lance dataset to create.
         task (str, optional): The task type of the data (e.g., "object_detection").
             If not provided, Atlas will try to infer it.
         format (str, optional): The format of the data (e.g., "coco").
             If not provided, Atlas will try to infer it.
         mode (str, optional): The write mode for the Lance dataset.
-            Defaults to "overwrite".
+            Defaults to "overwrite", or to "create" for delta sinks, which
+            then only replace a dataset written by a delta sink.
         **kwargs: Additional options passed to the underlying data loader.
 
     Keyword Args:
         expand_level (int): For Hugging Face datasets with nested schemas,
             this specifies the level of nesting to expand into separate columns.
-            Defaults to 0 (no expansion).
-        handle_nested_nulls (bool): For Hugging Face datasets, this flag
-            determines how to handle missing or null values in nested fields
-            during expansion.
-            - False (Default): Prioritizes speed. Missing fields are filled
-              with default values for their data type (e.g., 0 for integers,
-              "" for strings). This is fast but can lead to inaccurate
-              downstream analysis if the distinction between a real default
-              value and a missing value is important.
-            - True: Prioritizes data correctness. Missing fields are
-              represented as true `None` (null) values. This is slightly
-              slower but ensures that missing data is not misrepresented,
-              leading to more accurate analysis.
+            Every level turns the fields of dicts, and of the dicts in lists,
+            into columns named after their path, e.g. "objects_bbox"; fields
+            of dicts in lists become lists. Defaults to 0 (no expansion).
+        handle_nested_nulls (bool): For Hugging Face datasets, kept for
+            compatibility. Missing or null values in nested fields are
+            null after expansion either way, computed with Arrow kernels
+            on the validity bitmaps of the data. Defaults to False.
+        read_workers (int): The number of image or audio files read
+            concurrently by the COCO, YOLO, vision-language and Hugging Face
+            loaders. The files of the next batch are read while the current
+            one is processed. Defaults to 16.
+        image_mode (str): How the COCO, YOLO, segmentation, vision-language
+            and Hugging Face Image loaders store images. "bytes" (default)
+            copies them into the dataset; "reference" only stores the
+            absolute path and size of every file, which makes sinking huge
+            image stores nearly instant. Referenced bytes are read with
+            `atlas.utils.blob.take` or `resolve_references`, and
+            `atlas.materialize` turns a reference dataset into a
+            self-contained one.
+        checksum (bool): With image_mode="reference", also store the SHA-1
+            of every file, which is verified when it is read. Defaults to
+            False.
+        mask_format (str): How the COCO segmentation loader stores masks:
+            "png" (default) stores a PNG image per instance, "rle" the COCO
+            run-length encoding and "bitpacked" the mask packed 8 pixels per
+            byte. "rle" skips rasterization altogether. Masks of any format
+            are decoded with `atlas.utils.masks.read_masks`.
+        instance_map (bool): Store the masks of every image as a single
+            16-bit PNG instance map in an "instance_map" column instead of
+            one PNG per instance in a "mask" column. Defaults to False.
+        mask_workers (int): The number of processes rasterizing the masks
+            of the COCO segmentation loader. Defaults to 1.
+        spill_dir (str): The directory in which the COCO loaders spill the
+            index of the annotation file, which is parsed incrementally so
+            that huge annotation files are sunk in bounded memory. Defaults
+            to the system temporary directory.
+        block_size (int): The size in bytes of the blocks the CSV loader
+            parses at once, in parallel. Defaults to 16 MiB.
+        column_types (dict): The Arrow types of CSV columns, by their name in
+            the file. Other columns are inferred from the first
+            `infer_blocks` blocks.
+        infer_blocks (int): The number of blocks the CSV loader infers the
+            column types from, widening a type whose later values do not
+            convert. None infers them from the whole file. Defaults to 1.
+        columns (list): The columns the Parquet loader reads. Only these
+            columns are decoded. Defaults to all columns.
+        filter: The rows the Parquet loader reads, as a
+            `pyarrow.compute` expression or in the filter format of
+            `pyarrow.parquet.read_table`. Row groups whose statistics rule
+            out the filter are not decoded.
+        source_column (str): For sources made of several files, the name of
+            a column recording the path of the file of every row. Delta
+            sinks then only rewrite the files that changed. Defaults to None.
+        file_workers (int): For sources made of several files, the number
+            of files read concurrently. Defaults to 4.
+        target_batch_bytes (int): The target size in bytes of each batch
+            written to Lance. Batches from the source are merged or split
+            to hit this size. Defaults to 64 MiB.
+        prefetch_depth (int): The number of batches each background producer
+            may read ahead of the Lance writer. Defaults to 4.
+        prefetch_workers (int): The number of background threads producing
+            batches. Datasets that support sharding (e.g. COCO, YOLO) are
+            split across the threads; the row order is preserved.
+            Defaults to 1.
+        num_workers (int): The number of processes writing the dataset. The
+            source is split into shards (image-id ranges for COCO, file ranges
+            for YOLO, byte ranges for JSONL and text files, contiguous row
+            ranges for Hugging Face datasets), each process writes its own
+            Lance fragments and all fragments are committed atomically as one
+            dataset version. Defaults to 1.
+        commit_every (int): Commit a new dataset version every this many
+            batches, together with a checkpoint of the source position.
+        commit_every_bytes (int): Commit a new dataset version every this
+            many bytes, together with a checkpoint of the source position.
+        resume (bool): Continue an interrupted checkpointed sink from the
+            checkpoint stored with the latest dataset version, without
+            rewriting rows that are already committed. Defaults to False.
+        delta (bool): Only ingest what changed since the last delta sink to
+            the same URI. Per-file fingerprints (size, mtime and optionally
+            a content hash) are recorded for COCO and YOLO images together
+            with their annotations; new and modified images are ingested and
+            the rows of modified or removed ones are deleted. Other file
+            sources are skipped when unchanged, have only their new lines
+            ingested when they were appended to, and are rewritten otherwise.
+            The write mode is chosen by the sink, except that a dataset
+            not written by a delta sink is only replaced with
+            mode="overwrite". Defaults to False.
+        hash_contents (bool): Also fingerprint files in delta sinks by the
+            SHA-1 of their contents. Defaults to False.
     """
     if not uri:
         raise ValueError("URI must be specified for the sink operation.")
@@ -118,6 +198,16 @@ def sink(
         "expand_level": kwargs.pop("expand_level", 0),
         "handle_nested_nulls": kwargs.pop("handle_nested_nulls", False),
     }
+    dataset_keys = (
+        "read_workers", "image_mode", "checksum", "spill_dir", "mask_format", "instance_map", "mask_workers",
+        "block_size", "column_types", "infer_blocks", "columns", "filter",
+        "source_column", "file_workers",
+    )
+    for key in dataset_keys:
+        if key in kwargs:
+            dataset_kwargs[key] = kwargs.pop(key)
+    if mode is None:
+        mode = "create" if kwargs.get("delta") else "overwrite"
     # Pass the remaining kwargs to the LanceDataSink
     sink = LanceDataSink(path=uri, mode=mode, **kwargs)
     sink.write(data, task=task, format=format, **dataset_kwargs)
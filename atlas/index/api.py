@@ -1,6 +1,7 @@
 from typing import Any, Dict, List, Optional
 import json
 import io
+import os
 
 import lance
 import lancedb
@@ -9,6 +10,8 @@ from rich.table import Table
 from rich.console import Console
 from PIL import Image
 
+from atlas.utils.blob import is_blob_field, is_reference_field, read_blobs, resolve_references, scan
+
 from .vectorizer.vectorizer import Vectorizer
 
 
@@ -25,15 +28,19 @@ class Indexer:
             uri (str): The URI of the Lance dataset.
         """
         self.uri = uri
-        db_path = uri.rsplit("/", 1)[0]
-        table_name = uri.rsplit("/", 1)[-1].replace(".lance", "")
-        
-        self.db = lancedb.connect(db_path)
-        
+        # A dataset `<dir>/<name>.lance` is the table `<name>` of the database
+        # `<dir>`, so that it is opened in place.
+        db_path, table_name = os.path.split(uri.rstrip("/"))
+        table_name = table_name.replace(".lance", "")
+
+        self.db = lancedb.connect(db_path or ".")
+
         if table_name in self.db.table_names():
             self.table = self.db.open_table(table_name)
         else:
-            data = lance.dataset(self.uri)
+            # Tables cannot be created from blob descriptors, so the dataset
+            # is copied from a scan that reads the blob bytes.
+            data = scan(lance.dataset(self.uri))
             self.table = self.db.create_table(table_name, data=data)
 
 
@@ -50,6 +57,11 @@ class Indexer:
                     return "image"
                 if "Audio" in decode_meta[column]:
                     return "audio"
+        # Image columns of the image loaders are stored as blobs, or as
+        # references to the image files.
+        field = lance_dataset.schema.field(column)
+        if is_blob_field(field) or is_reference_field(field):
+            return "image"
         # Default to text if no specific modality is found
         return "text"
 
@@ -101,13 +113,23 @@ class Indexer:
             )
 
             first_batch = True
+            lance_dataset = self.table.to_lance()
+            field = lance_dataset.schema.field(column)
             for batch in scanner.to_batches():
-                column_data = batch.column(column).to_pylist()
+                if is_blob_field(field):
+                    # Scans only return blob descriptors; fetch the bytes.
+                    column_data = read_blobs(lance_dataset, column, ids=batch.column("_rowid").to_pylist()).to_pylist()
+                elif is_reference_field(field):
+                    # Referenced images are read from their files.
+                    column_data = resolve_references(batch.column(column)).to_pylist()
+                else:
+                    column_data = batch.column(column).to_pylist()
                 embeddings = vectorizer.vectorize(column_data, batch_size=batch_size)
 
                 embedding_table = pa.Table.from_pydict(
                     {
-                        "_rowid": batch.column("_rowid"),
+                        # `_rowid` is reserved, so the row ids are stored as `row_id`.
+                        "row_id": batch.column("_rowid"),
                         vector_column_name: embeddings,
                     }
                 )
@@ -124,7 +146,7 @@ class Indexer:
                 return
 
             temp_table = self.db.open_table(temp_table_name)
-            self.table.merge(temp_table, left_on="_rowid", right_on="_rowid")
+            self.table.merge(temp_table, left_on="_rowid", right_on="row_id")
 
             self.db.drop_table(temp_table_name)
 
@@ -14,14 +14,24 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
+import functools
 import json
+import os
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Any, Dict, Generator, List, Optional
+from typing import Any, Dict, Generator, List, Optional, Tuple
 
 import lance
 import pyarrow as pa
 
+from atlas.tasks.data_model import delta as delta_sink
+from atlas.tasks.data_model import writer
+from atlas.utils.batching import DEFAULT_TARGET_BATCH_BYTES, estimate_row_bytes
+from atlas.utils.pipeline import DEFAULT_PREFETCH_DEPTH, prefetch
+
+DEFAULT_COMMIT_EVERY_BYTES = 1024 * 1024 * 1024  # 1 GiB
+
 
 @dataclass
 class TaskMetadata:
@@ -44,15 +54,130 @@ class BaseDataset(ABC):
     yielding batches of data as Arrow `RecordBatch` objects.
     """
 
+    supports_sharding = False
+    supports_seek = False
+    # The column that identifies an item in delta sinks, for datasets that
+    # fingerprint their items individually.
+    delta_key: Optional[str] = None
+
     def __init__(self, data: str):
         self.data = data
         self.metadata = TaskMetadata()
+        self.shard_index = 0
+        self.num_shards = 1
+        self.start_row = 0
+        self.only_items = None
+
+    def shards(self, num_shards: int) -> List["BaseDataset"]:
+        """
+        Splits the dataset into at most `num_shards` independent parts.
+
+        Each shard is a shallow copy of the dataset that only yields its own,
+        contiguous part of the rows from `to_batches`. Reading the shards one
+        after the other yields the same rows, in the same order, as reading the
+        whole dataset. Shards share the dataset's `metadata`.
+
+        Datasets that cannot be split, or that are read from a `start_row`,
+        return a single shard, themselves. Subclasses opt in by setting
+        `supports_sharding` and honouring `shard_range` in `to_batches`.
+
+        Args:
+            num_shards (int): The maximum number of shards to create.
+
+        Returns:
+            List[BaseDataset]: The shards of the dataset.
+        """
+        if num_shards <= 1 or not self.supports_sharding or self.start_row:
+            return [self]
+        shards = []
+        for index in range(num_shards):
+            shard = copy.copy(self)
+            shard.shard_index = index
+            shard.num_shards = num_shards
+            shards.append(shard)
+        return shards
+
+    def shard_range(self, total: int) -> Tuple[int, int]:
+        """
+        Returns the `[start, stop)` range of the `total` items that belong to
+        this shard.
+        """
+        per_shard, remainder = divmod(total, self.num_shards)
+        start = self.shard_index * per_shard + min(self.shard_index, remainder)
+        stop = start + per_shard + (1 if self.shard_index < remainder else 0)
+        return start, stop
+
+    @property
+    def source_id(self) -> Optional[str]:
+        """
+        Identifies the source of the dataset in checkpoints.
+        """
+        if isinstance(self.data, str):
+            return self.data
+        return getattr(self.data, "_fingerprint", None)
+
+    def prepare(self) -> None:
+        """
+        Parses what the dataset needs to know before it yields rows, such as
+        annotation indices and class names, and caches it.
+
+        `to_lance` calls this once before it builds the schema and splits the
+        dataset into shards, so that the source is parsed exactly once per
+        sink, also when the dataset declares its schema and is never probed.
+        """
+
+    def fingerprint_source(self, hash_contents: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Fingerprints the source of the dataset for delta sinks.
+
+        Args:
+            hash_contents (bool, optional): Whether to hash the contents of
+                files. Defaults to False.
+
+        Returns:
+            Optional[Dict[str, Any]]: The fingerprint of the source file, or of
+                the Hugging Face dataset, or None for directories.
+        """
+        if isinstance(self.data, str):
+            if os.path.isdir(self.data):
+                return None
+            return delta_sink.file_fingerprint(self.data, hash_contents, track_appends=True)
+        if self.source_id is None:
+            raise ValueError(f"{type(self).__name__} cannot fingerprint its source for a delta sink.")
+        return {"id": self.source_id}
+
+    def fingerprint_items(self, hash_contents: bool = False) -> Optional[Dict[str, str]]:
+        """
+        Fingerprints the items of the dataset for delta sinks.
+
+        Datasets that return item fingerprints must set `delta_key` to the
+        column holding the item keys, and only yield the items in
+        `only_items` from `to_batches` when it is set.
+
+        Args:
+            hash_contents (bool, optional): Whether to hash the contents of
+                files. Defaults to False.
+
+        Returns:
+            Optional[Dict[str, str]]: A fingerprint per item key, or None if
+                the source is only fingerprinted as a whole.
+        """
+        return None
 
     def to_lance(
         self,
         uri: str,
         mode: str = "create",
         batch_size: Optional[int] = None,
+        target_batch_bytes: int = DEFAULT_TARGET_BATCH_BYTES,
+        prefetch_depth: int = DEFAULT_PREFETCH_DEPTH,
+        prefetch_workers: int = 1,
+        num_workers: int = 1,
+        commit_every: Optional[int] = None,
+        commit_every_bytes: Optional[int] = None,
+        resume: bool = False,
+        delta: bool = False,
+        hash_contents: bool = False,
         **kwargs: Optional[Dict[str, Any]],
     ) -> None:
         """
@@ -60,7 +185,24 @@ class BaseDataset(ABC):
 
         This method handles the process of reading the data in batches, dynamically
         calculating the batch size if not provided, and writing the data to a Lance
-        dataset.
+        dataset. The batches produced by the source are re-batched so that every
+        batch handed to Lance is close to `target_batch_bytes` in size.
+
+        Batches are produced in background threads and handed to the writer
+        through bounded queues, so that reading and decoding the source overlaps
+        with Lance encoding and disk writes.
+
+        With `num_workers > 1`, the dataset is split into shards that are written
+        by separate processes. Each process writes its own Lance fragments and
+        all fragments are committed together as a single dataset version.
+
+        With `commit_every`, `commit_every_bytes` or `resume`, a new version is
+        committed periodically, together with a checkpoint of the position in
+        the source. A sink with `resume=True` continues from the checkpoint of
+        the latest version instead of starting over. The position is counted in
+        rows, which each dataset maps to its own source position (the image
+        index for COCO, the file index for YOLO, the line for JSONL files, the
+        row for Hugging Face datasets).
 
         Args:
             uri (str): The URI of the Lance dataset to be created.
@@ -69,36 +211,68 @@ class BaseDataset(ABC):
             batch_size (Optional[int], optional): The batch size to use when reading
                 the data. If not provided, a dynamic batch size will be calculated
                 based on the available system memory. Defaults to None.
+            target_batch_bytes (int, optional): The target size in bytes of each
+                batch written to Lance. Defaults to 64 MiB.
+            prefetch_depth (int, optional): The number of batches each producer
+                may buffer ahead of the writer. Defaults to 4.
+            prefetch_workers (int, optional): The number of producer threads.
+                The dataset is split into this many shards if it supports
+                sharding. Defaults to 1.
+            num_workers (int, optional): The number of processes writing shards
+                of the dataset. Only datasets that support sharding are split.
+                Defaults to 1.
+            commit_every (Optional[int], optional): Commit a new version after
+                this many batches. Defaults to None.
+            commit_every_bytes (Optional[int], optional): Commit a new version
+                after this many bytes. Defaults to None, or 1 GiB when resuming
+                without either interval set.
+            resume (bool, optional): Continue from the checkpoint of an
+                interrupted sink to the same URI. Defaults to False.
+            delta (bool, optional): Only write what changed since the last
+                delta sink to the same URI, as recorded by the fingerprints of
+                the source and of its items. `mode` is chosen by the sink,
+                except that a dataset not written by a delta sink is only
+                replaced with `mode="overwrite"`. Defaults to False.
+            hash_contents (bool, optional): Fingerprint files in delta sinks
+                by their contents, in addition to their size and modification
+                time. Defaults to False.
         """
         from atlas.utils.system import get_dynamic_batch_size
 
-        reader = self.to_batches(batch_size=1)  # read one row to estimate size
+        checkpointed = resume or commit_every or commit_every_bytes
+        deletions = None
+        if delta:
+            if checkpointed or num_workers > 1:
+                raise ValueError("Delta sinks cannot be combined with checkpoints or num_workers > 1.")
+            planned = delta_sink.plan(self, uri, mode, hash_contents)
+            if planned is None:
+                print(f"Nothing changed since the last sink to {uri}.")
+                return
+            mode, kwargs["transaction_properties"], deletions = planned
 
-        batches = iter(reader)
-        try:
-            first_batch = next(batches)
-        except StopIteration:
-            print("Warning: The dataset is empty. An empty Lance dataset will be created.")
-            return
-
-        row_size_in_bytes = first_batch.nbytes
+        self.prepare()
+        schema = getattr(self, "schema", None)
+        if schema is not None:
+            # The declared schema describes the data without reading any of it.
+            row_size_in_bytes = estimate_row_bytes(schema)
+        else:
+            probe = self.to_batches(batch_size=1)  # read one row to estimate size
+            try:
+                first_batch = next(iter(probe))
+            except StopIteration:
+                print("Warning: The dataset is empty. An empty Lance dataset will be created.")
+                return
+            finally:
+                if hasattr(probe, "close"):
+                    probe.close()
+            schema = first_batch.schema
+            row_size_in_bytes = first_batch.nbytes
 
         if batch_size is None:
             batch_size = get_dynamic_batch_size(row_size_in_bytes)
+            if row_size_in_bytes > 0:
+                batch_size = max(1, min(batch_size, target_batch_bytes // row_size_in_bytes))
 
-        reader = self.to_batches(batch_size=batch_size)
-
-        def new_reader():
-            try:
-                yield first_batch
-                for batch in batches:
-                    yield batch
-            finally:
-                # Ensure the generator is closed
-                if hasattr(reader, 'close'):
-                    reader.close()
-
-        schema = first_batch.schema
         if self.metadata:
             schema = schema.with_metadata({
                 "metadata": json.dumps(self.metadata.__dict__),
@@ -106,7 +280,76 @@ class BaseDataset(ABC):
                 })
 
         kwargs.pop("image_root", None)
-        lance.write_dataset(new_reader(), uri, schema=schema, mode=mode, **kwargs)
+
+        shards = self.shards(num_workers)
+        if len(shards) > 1:
+            if checkpointed:
+                raise ValueError("Checkpointed sinks cannot be combined with num_workers > 1.")
+            writer.write_shards(
+                shards, uri, schema, mode, batch_size, target_batch_bytes, prefetch_depth, kwargs
+            )
+            return
+
+        checkpoint = {"source": self.source_id, "loader": type(self).__name__, "position": 0}
+        if resume:
+            previous = writer.load_checkpoint(uri)
+            if previous is not None:
+                if (previous["source"], previous["loader"]) != (checkpoint["source"], checkpoint["loader"]):
+                    raise ValueError(f"The checkpoint at {uri} was written for a different source: {previous['source']}")
+                if previous.get("complete"):
+                    print(f"Sink to {uri} is already complete, nothing to resume.")
+                    return
+                checkpoint["position"] = previous["position"]
+                self.start_row = previous["position"]
+                mode = "append"
+            if not (commit_every or commit_every_bytes):
+                commit_every_bytes = DEFAULT_COMMIT_EVERY_BYTES
+
+        producers = [
+            functools.partial(writer.rebatched, shard, batch_size, target_batch_bytes)
+            for shard in self.shards(prefetch_workers)
+        ]
+        reader = prefetch(producers, depth=prefetch_depth)
+
+        error = None
+
+        def new_reader():
+            nonlocal error
+            try:
+                yield from reader
+            except Exception as e:
+                # Lance wraps errors raised by the reader; keep the original
+                # so the caller sees what actually failed.
+                error = e
+                raise
+            finally:
+                # Ensure the producer threads are stopped
+                reader.close()
+
+        if checkpointed:
+            writer.write_checkpointed(
+                new_reader(), uri, schema, mode, checkpoint, commit_every, commit_every_bytes, kwargs
+            )
+            return
+
+        try:
+            if deletions is not None:
+                # Replaced rows are deleted in the commit of the new ones.
+                writer.write_update(
+                    new_reader(),
+                    uri,
+                    schema,
+                    deletions.dataset,
+                    deletions.removed_fragment_ids,
+                    deletions.updated_fragments,
+                    kwargs,
+                )
+            else:
+                lance.write_dataset(new_reader(), uri, schema=schema, mode=mode, **kwargs)
+        except Exception:
+            if error is not None:
+                raise error
+            raise
 
     @staticmethod
     def get_metadata(uri: str) -> TaskMetadata:
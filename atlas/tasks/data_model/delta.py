@@ -0,0 +1,309 @@
+# Atlas: A data-centric AI framework
+#
+# Copyright (c) 2024-present, Atlas Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Incremental (delta) sinks. The fingerprints of the source, and of every item
+of it for datasets that track items (e.g. the images of a COCO or YOLO
+dataset), are recorded with each delta commit, so that the next sink only
+writes what changed.
+
+The source fingerprint is stored as the "atlas.delta" transaction property
+of the commit. Item fingerprints are written to an Arrow file under
+`<uri>/_atlas/` before the commit, and the property points to it, so a
+failed sink never leaves fingerprints that do not match the data.
+"""
+
+import hashlib
+import json
+import os
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import lance
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.fs
+from lance.fragment import FragmentMetadata
+
+from atlas.tasks.data_model import writer
+
+DELTA_KEY = "atlas.delta"
+STATE_DIR = "_atlas"
+TAIL_BYTES = 64 * 1024
+HASH_CHUNK_BYTES = 8 * 1024 * 1024
+
+
+def _hash_range(path: str, start: int, stop: int) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = stop - start
+        while remaining > 0:
+            chunk = f.read(min(HASH_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path: str, hash_contents: bool = False, track_appends: bool = False) -> Dict[str, Any]:
+    """
+    Fingerprints a file by its size and modification time, and optionally by
+    the SHA-1 of its contents.
+
+    Args:
+        path (str): The path of the file.
+        hash_contents (bool, optional): Whether to hash the whole file.
+            Defaults to False.
+        track_appends (bool, optional): Whether to also hash the last 64 KiB
+            of the file, so that a file that was only appended to can be told
+            apart from one that was rewritten. Defaults to False.
+
+    Returns:
+        Dict[str, Any]: The fingerprint of the file.
+    """
+    stat = os.stat(path)
+    fingerprint = {
+        "path": os.path.abspath(path),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+    }
+    if track_appends:
+        fingerprint["tail"] = _hash_range(path, max(0, stat.st_size - TAIL_BYTES), stat.st_size)
+    if hash_contents:
+        fingerprint["sha1"] = _hash_range(path, 0, stat.st_size)
+    return fingerprint
+
+
+def item_fingerprint(paths: List[str], hash_contents: bool = False, annotations: Any = None) -> str:
+    """
+    Fingerprints an item of a dataset by the files it is read from and,
+    optionally, by the annotations it carries.
+
+    Args:
+        paths (List[str]): The files of the item. Missing files are recorded
+            as missing.
+        hash_contents (bool, optional): Whether to hash the contents of the
+            files. Defaults to False.
+        annotations (Any, optional): JSON-serializable annotations of the item.
+
+    Returns:
+        str: The fingerprint of the item.
+    """
+    files = [file_fingerprint(path, hash_contents) if os.path.exists(path) else None for path in paths]
+    fingerprint = {"files": files}
+    if annotations is not None:
+        encoded = json.dumps(annotations, sort_keys=True, default=str).encode("utf-8")
+        fingerprint["annotations"] = hashlib.sha1(encoded).hexdigest()
+    return json.dumps(fingerprint, sort_keys=True)
+
+
+def is_append(previous: Dict[str, Any], current: Dict[str, Any]) -> bool:
+    """
+    Returns True if the file fingerprinted by `current` is the file
+    fingerprinted by `previous` with data appended to it.
+    """
+    if "size" not in current or previous.get("path") != current["path"] or current["size"] <= previous["size"]:
+        return False
+    size = previous["size"]
+    path = current["path"]
+    if _hash_range(path, max(0, size - TAIL_BYTES), size) != previous["tail"]:
+        return False
+    return "sha1" not in previous or _hash_range(path, 0, size) == previous["sha1"]
+
+
+def _filesystem(uri: str) -> Tuple[pa.fs.FileSystem, str]:
+    return pa.fs.FileSystem.from_uri(uri if "://" in uri else os.path.abspath(uri))
+
+
+def _save_items(uri: str, items: Dict[str, str]) -> str:
+    filesystem, root = _filesystem(uri)
+    name = f"{STATE_DIR}/items-{uuid.uuid4().hex}.arrow"
+    table = pa.table({"key": list(items.keys()), "fingerprint": list(items.values())})
+    filesystem.create_dir(f"{root}/{STATE_DIR}", recursive=True)
+    with filesystem.open_output_stream(f"{root}/{name}") as sink:
+        with pa.ipc.new_file(sink, table.schema) as file_writer:
+            file_writer.write_table(table)
+    return name
+
+
+def _load_items(uri: str, name: str) -> Dict[str, str]:
+    filesystem, root = _filesystem(uri)
+    with filesystem.open_input_file(f"{root}/{name}") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return dict(zip(table.column("key").to_pylist(), table.column("fingerprint").to_pylist()))
+
+
+def load_state(uri: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns the fingerprints recorded with the latest version of the dataset
+    at `uri`, or None if that version was not written by a delta sink.
+    """
+    dataset = writer.open_dataset(uri)
+    if dataset is None:
+        return None
+    transaction = dataset.read_transaction(dataset.version)
+    properties = (transaction.transaction_properties or {}) if transaction is not None else {}
+    if DELTA_KEY not in properties:
+        return None
+    state = json.loads(properties[DELTA_KEY])
+    if state.get("items") is not None:
+        state["items"] = _load_items(uri, state["items"])
+    return state
+
+
+# Fragment rows hold their offset in the low 32 bits of their row address.
+ROW_OFFSET_MASK = 0xFFFFFFFF
+
+
+@dataclass
+class Deletions:
+    """
+    Rows to delete from a version of a Lance dataset, in the commit that
+    appends their replacements.
+
+    Attributes:
+        dataset (lance.LanceDataset): The version the rows are deleted from.
+        removed_fragment_ids (List[int]): The ids of the fragments whose rows
+            are all deleted.
+        updated_fragments (List[FragmentMetadata]): The other fragments with
+            deleted rows, with their new deletion files.
+    """
+
+    dataset: lance.LanceDataset
+    removed_fragment_ids: List[int] = field(default_factory=list)
+    updated_fragments: List[FragmentMetadata] = field(default_factory=list)
+
+
+def find_deletions(dataset: lance.LanceDataset, column: str, keys: List[str]) -> Deletions:
+    """
+    Finds the rows of a Lance dataset whose `column` is one of `keys`, and
+    writes the deletion files of their fragments without committing them.
+
+    Keys are matched with Arrow compute against the column of every fragment,
+    so that any number of keys can be deleted without a SQL predicate.
+    """
+    deletions = Deletions(dataset)
+    value_set = pa.array(keys, type=pa.string())
+    for fragment in dataset.get_fragments():
+        table = fragment.to_table(columns=[column], with_row_address=True)
+        addresses = pc.filter(table.column("_rowaddr"), pc.is_in(table.column(column), value_set=value_set))
+        if len(addresses) == 0:
+            continue
+        offsets = pc.bit_wise_and(addresses, pa.scalar(ROW_OFFSET_MASK, pa.uint64()))
+        metadata = fragment.delete_rows(offsets.to_pylist())
+        if metadata is None:
+            deletions.removed_fragment_ids.append(fragment.fragment_id)
+        else:
+            deletions.updated_fragments.append(metadata)
+    return deletions
+
+
+def plan(
+    dataset, uri: str, mode: str = "create", hash_contents: bool = False
+) -> Optional[Tuple[str, Dict[str, str], Optional[Deletions]]]:
+    """
+    Compares the dataset with the fingerprints recorded at `uri` and prepares
+    the dataset so that it only yields what has to be written.
+
+    Items that were modified or removed since the last sink are to be deleted
+    from the Lance dataset in the same commit as the new data, and the dataset
+    is restricted to new and modified items.
+    Sources that are fingerprinted as a whole are skipped when unchanged, read
+    from the first new row when they were only appended to, and rewritten
+    otherwise.
+
+    A dataset whose latest version was not written by a delta sink of the same
+    loader has no fingerprints to compare with. It is only replaced with
+    `mode="overwrite"`, since its rows cannot be told apart from new ones.
+
+    Args:
+        dataset (BaseDataset): The dataset to sink.
+        uri (str): The URI of the Lance dataset.
+        mode (str, optional): The write mode requested for the sink. Only
+            "overwrite" replaces a dataset without fingerprints. Defaults to
+            "create".
+        hash_contents (bool, optional): Whether to fingerprint files by their
+            contents, in addition to their size and modification time.
+            Defaults to False.
+
+    Returns:
+        Optional[Tuple[str, Dict[str, str], Optional[Deletions]]]: The write
+            mode, the transaction properties to commit the new data with and
+            the rows to delete in that commit, or None if there is nothing
+            left to write.
+
+    Raises:
+        ValueError: If the dataset at `uri` was not written by a delta sink of
+            the same loader and `mode` is not "overwrite".
+    """
+    existing = writer.open_dataset(uri)
+    previous = load_state(uri) if existing is not None else None
+    loader = type(dataset).__name__
+    if existing is not None and (previous is None or previous["loader"] != loader):
+        written_by = "a delta sink" if previous is None else f"a delta sink of {loader}"
+        if mode != "overwrite":
+            raise ValueError(
+                f"The latest version of {uri} was not written by {written_by}, so a delta sink cannot tell "
+                f"which of its rows to keep. Pass mode='overwrite' to replace it."
+            )
+        previous = None
+    source = dataset.fingerprint_source(hash_contents)
+    items = dataset.fingerprint_items(hash_contents)
+
+    def properties():
+        state = {"loader": loader, "source": source, "items": None}
+        if items is not None:
+            state["items"] = _save_items(uri, items)
+        return {DELTA_KEY: json.dumps(state)}
+
+    if previous is None:
+        return ("overwrite" if existing is not None else "create"), properties(), None
+
+    if items is not None and previous.get("items") is not None:
+        before = previous["items"]
+        changed = {key for key, fingerprint in items.items() if before.get(key) != fingerprint}
+        removed = [key for key in before if key not in items]
+        if not changed and not removed:
+            return None
+        stale = [key for key in before if key in changed] + removed
+        deletions = find_deletions(existing, dataset.delta_key, stale) if stale else None
+        if not changed:
+            # Only removals: delete them and record the new fingerprints
+            # without new data.
+            writer.commit_fragments(
+                uri,
+                [],
+                existing.schema,
+                "append",
+                existing,
+                properties(),
+                deletions.removed_fragment_ids,
+                deletions.updated_fragments,
+            )
+            return None
+        dataset.only_items = changed
+        return "append", properties(), deletions
+
+    if source is not None and source == previous["source"]:
+        return None
+    if source is not None and previous["source"] is not None and is_append(previous["source"], source):
+        dataset.start_row = existing.count_rows()
+        return "append", properties(), None
+    # A rewritten source replaces the rows of its previous version.
+    return "overwrite", properties(), None
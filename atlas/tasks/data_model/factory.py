@@ -88,7 +88,8 @@ def create_dataset(
     Factory function to create a dataset object based on the given options.
 
     Args:
-        data (str): The data source.
+        data (Union[str, Any]): The data source: a file, a directory, a glob
+            pattern or a list of files, or a Hugging Face dataset.
         task (Optional[str], optional): The task for which the data is being sunk.
         format (Optional[str], optional): The format of the data.
         **kwargs: Additional options for creating the dataset.
@@ -96,6 +97,15 @@ def create_dataset(
     Returns:
         BaseDataset: A dataset object.
     """
+    from atlas.tasks.data_model.multi_file import MultiFileDataset, is_multi_file
+
+    # Directories given as COCO or YOLO datasets are read by their loaders.
+    dataset_directory = isinstance(data, str) and os.path.isdir(data) and format in ("coco", "yolo")
+    if isinstance(data, (str, list, tuple)) and not dataset_directory and is_multi_file(data):
+        return MultiFileDataset(data, task=task, format=format, **kwargs)
+    kwargs.pop("source_column", None)
+    kwargs.pop("file_workers", None)
+
     if not isinstance(data, str):  # Hugging Face dataset
         if task == "instruction":
             from atlas.tasks.instruction.instruction import InstructionDataset
@@ -145,11 +155,11 @@ def create_dataset(
         if format == "csv":
             from atlas.tasks.tabular.csv import CsvDataset
 
-            return CsvDataset(data)
+            return CsvDataset(data, **kwargs)
         elif format == "parquet":
             from atlas.tasks.tabular.parquet import ParquetDataset
 
-            return ParquetDataset(data)
+            return ParquetDataset(data, **kwargs)
     elif task == "text":
         if format == "text":
             from atlas.tasks.text.text import TextDataset
@@ -171,7 +181,7 @@ def create_dataset(
                 VisionLanguageDataset,
             )
 
-            return VisionLanguageDataset(data)
+            return VisionLanguageDataset(data, **kwargs)
     elif task == "cot":
         if format == "cot":
             from atlas.tasks.cot.cot import CoTDataset
@@ -0,0 +1,71 @@
+# Atlas: A data-centric AI framework
+#
+# Copyright (c) 2024-present, Atlas Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+import os
+from typing import Generator, Tuple
+
+import pyarrow as pa
+
+from atlas.tasks.data_model.base import BaseDataset
+from atlas.utils.batching import split_batches
+from atlas.utils.jsonl import JsonField, iter_records, read_jsonl, select_fields, source_schema
+
+
+class JsonlDataset(BaseDataset):
+    """
+    A dataset that reads JSON records, from a JSONL file or from an iterable
+    of dictionaries such as a Hugging Face dataset.
+
+    Subclasses declare their columns in `fields`. Files are parsed block by
+    block with `pyarrow.json`, and the fields are mapped with Arrow compute,
+    so that records are never converted to Python objects.
+    """
+
+    supports_seek = True
+    fields: Tuple[JsonField, ...] = ()
+
+    @property
+    def supports_sharding(self) -> bool:
+        # Only files can be split into byte ranges.
+        return isinstance(self.data, str)
+
+    def iter_records(self, batch_size: int) -> Generator[pa.RecordBatch, None, None]:
+        """
+        Yields the records of the dataset from its `start_row`, mapped to its
+        `fields`, in batches of at most `batch_size` rows.
+        """
+        schema = source_schema(self.fields)
+        if isinstance(self.data, str):
+            start, stop = self.shard_range(os.path.getsize(self.data))
+            tables = read_jsonl(self.data, schema, start, stop, skip_rows=self.start_row)
+        else:
+            tables = iter_records(itertools.islice(self.data, self.start_row, None), schema, batch_size)
+        for table in tables:
+            yield from split_batches(select_fields(table, self.fields), batch_size)
+
+    def to_batches(self, batch_size: int = 1024, **kwargs) -> Generator[pa.RecordBatch, None, None]:
+        """
+        Yields batches of the dataset as Arrow RecordBatches.
+        """
+        yield from self.iter_records(batch_size)
+
+    @property
+    def schema(self) -> pa.Schema:
+        """
+        Returns the schema of the dataset.
+        """
+        return pa.schema([pa.field(field.name, field.type) for field in self.fields])
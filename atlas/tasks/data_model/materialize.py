@@ -0,0 +1,109 @@
+# Atlas: A data-centric AI framework
+#
+# Copyright (c) 2024-present, Atlas Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Generator, Optional
+
+import lance
+import pyarrow as pa
+
+from atlas.tasks.data_model.base import DEFAULT_COMMIT_EVERY_BYTES, BaseDataset
+from atlas.utils.blob import blob_field, is_blob_field, is_reference_field, read_blobs, resolve_references
+from atlas.utils.io import DEFAULT_READ_WORKERS
+
+
+class ReferenceDataset(BaseDataset):
+    """
+    A dataset that reads a Lance dataset written with `image_mode="reference"`
+    and yields the bytes of the referenced files in place of the references.
+    """
+
+    supports_seek = True
+
+    def __init__(self, data: str, read_workers: int = DEFAULT_READ_WORKERS, verify: bool = True):
+        super().__init__(data)
+        self.read_workers = read_workers
+        self.verify = verify
+        self.dataset = lance.dataset(data)
+        self.metadata = BaseDataset.get_metadata(data)
+
+    @property
+    def schema(self) -> pa.Schema:
+        """
+        Returns the schema of the dataset, with blob columns for the
+        references.
+        """
+        return pa.schema(
+            [
+                blob_field(field.name) if is_reference_field(field) or is_blob_field(field) else field
+                for field in self.dataset.schema
+            ]
+        )
+
+    def to_batches(self, batch_size: int = 1024, **kwargs) -> Generator[pa.RecordBatch, None, None]:
+        """
+        Yields batches of the dataset as Arrow RecordBatches.
+        """
+        schema = self.schema
+        source_schema = self.dataset.schema
+        has_blobs = any(is_blob_field(field) for field in source_schema)
+        scanner = self.dataset.scanner(
+            batch_size=batch_size, offset=self.start_row or None, with_row_id=has_blobs
+        )
+        for batch in scanner.to_batches():
+            arrays = []
+            for field in source_schema:
+                column = batch.column(field.name)
+                if is_reference_field(field):
+                    column = resolve_references(column, self.read_workers, self.verify)
+                elif is_blob_field(field):
+                    column = read_blobs(self.dataset, field.name, ids=batch.column("_rowid").to_pylist())
+                arrays.append(column)
+            yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def materialize(
+    uri: str,
+    target_uri: str,
+    read_workers: int = DEFAULT_READ_WORKERS,
+    verify: bool = True,
+    commit_every_bytes: Optional[int] = DEFAULT_COMMIT_EVERY_BYTES,
+    **kwargs,
+) -> str:
+    """
+    Turns a dataset written with `image_mode="reference"` into a
+    self-contained one, with the referenced bytes stored as blobs.
+
+    The bytes are copied incrementally: a new version of the target is
+    committed every `commit_every_bytes`, and calling `materialize` again
+    after an interruption continues from the last commit.
+
+    Args:
+        uri (str): The URI of the reference dataset.
+        target_uri (str): The URI of the self-contained dataset.
+        read_workers (int, optional): The number of files read concurrently.
+            Defaults to 16.
+        verify (bool, optional): Check that the referenced files still have
+            their recorded size and checksum. Defaults to True.
+        commit_every_bytes (Optional[int], optional): Commit a new version of
+            the target after this many bytes. Defaults to 1 GiB.
+        **kwargs: Additional options passed to `BaseDataset.to_lance`.
+
+    Returns:
+        str: The URI of the self-contained dataset.
+    """
+    dataset = ReferenceDataset(uri, read_workers=read_workers, verify=verify)
+    dataset.to_lance(target_uri, mode="create", resume=True, commit_every_bytes=commit_every_bytes, **kwargs)
+    return target_uri
@@ -0,0 +1,197 @@
+# Atlas: A data-centric AI framework
+#
+# Copyright (c) 2024-present, Atlas Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import functools
+import glob
+import os
+from typing import Any, Dict, Generator, List, Optional, Sequence, Union
+
+import pyarrow as pa
+
+from atlas.tasks.data_model import delta as delta_sink
+from atlas.tasks.data_model.base import BaseDataset
+from atlas.utils.io import scan_files
+from atlas.utils.pipeline import prefetch
+
+# The extensions of the files a directory source is made of.
+FILE_EXTENSIONS = (".jsonl", ".csv", ".parquet", ".txt")
+# Formats whose datasets span an annotation file and image directories.
+UNSUPPORTED_FORMATS = ("coco", "yolo")
+DEFAULT_FILE_WORKERS = 4
+
+
+def is_multi_file(data: Union[str, Sequence[str]]) -> bool:
+    """
+    Returns True if `data` names several files: a list of paths, a glob
+    pattern, or a directory that is not a COCO or YOLO dataset.
+    """
+    from atlas.tasks.data_model.factory import infer_dataset_type
+
+    if isinstance(data, (list, tuple)):
+        return True
+    if glob.has_magic(data):
+        return True
+    return os.path.isdir(data) and infer_dataset_type(data) == (None, None)
+
+
+def expand_files(data: Union[str, Sequence[str]]) -> List[str]:
+    """
+    Returns the files of a multi-file source, in a deterministic order.
+
+    Args:
+        data (Union[str, Sequence[str]]): A list of paths, a glob pattern
+            (`**` matches directories recursively), or a directory whose
+            files all have the same extension.
+
+    Returns:
+        List[str]: The paths of the files.
+    """
+    if isinstance(data, (list, tuple)):
+        files = list(data)
+    elif glob.has_magic(data):
+        files = sorted(path for path in glob.glob(data, recursive=True) if os.path.isfile(path))
+    else:
+        files = scan_files([data], FILE_EXTENSIONS)[0]
+        extensions = {os.path.splitext(path)[1].lower() for path in files}
+        if len(extensions) > 1:
+            raise ValueError(f"{data} holds files of several formats: {sorted(extensions)}.")
+    if not files:
+        raise ValueError(f"No files found for {data}.")
+    return files
+
+
+class MultiFileDataset(BaseDataset):
+    """
+    A dataset made of several files of the same task and format, such as the
+    `part-*.jsonl` shards of an export, written as one Lance dataset.
+
+    Every file is read by its own loader. `file_workers` files are read
+    concurrently, and their batches are yielded in the order of the files.
+    The files are also split across the shards of `num_workers` and
+    `prefetch_workers`. COCO and YOLO datasets are not supported, since
+    their rows are keyed by file names that files may share.
+
+    Args:
+        data (Union[str, Sequence[str]]): A list of paths, a glob pattern or a
+            directory, see `expand_files`.
+        task (Optional[str], optional): The task of the files. Inferred from
+            the first file by default.
+        format (Optional[str], optional): The format of the files. Inferred
+            from the first file by default.
+        source_column (Optional[str], optional): The name of a column that
+            records the path of the file every row was read from. Defaults to
+            None, which adds no column.
+        file_workers (int, optional): The number of files read concurrently.
+            Defaults to 4.
+        **kwargs: The options of the loader of every file.
+    """
+
+    supports_sharding = True
+
+    def __init__(
+        self,
+        data: Union[str, Sequence[str]],
+        task: Optional[str] = None,
+        format: Optional[str] = None,
+        source_column: Optional[str] = None,
+        file_workers: int = DEFAULT_FILE_WORKERS,
+        **kwargs,
+    ):
+        from atlas.tasks.data_model.factory import create_dataset, infer_dataset_type
+
+        super().__init__(data)
+        self.files = expand_files(data)
+        if not task or not format:
+            inferred_task, inferred_format = infer_dataset_type(self.files[0])
+            task = task or inferred_task
+            format = format or inferred_format
+        if format in UNSUPPORTED_FORMATS:
+            raise ValueError(
+                f"{format.upper()} datasets cannot be sunk from several files ({data!r}). "
+                f"Sink every annotation file or dataset directory on its own."
+            )
+        self.datasets = [create_dataset(path, task=task, format=format, **kwargs) for path in self.files]
+        self.source_column = source_column
+        self.file_workers = file_workers
+        self.metadata = self.datasets[0].metadata
+
+    @property
+    def source_id(self) -> Optional[str]:
+        return self.data if isinstance(self.data, str) else "\n".join(self.files)
+
+    @property
+    def delta_key(self) -> Optional[str]:
+        # Files are tracked individually when their rows can be told apart.
+        return self.source_column
+
+    def prepare(self) -> None:
+        """
+        Prepares the loader of every file.
+        """
+        for dataset in self.datasets:
+            dataset.prepare()
+
+    def fingerprint_source(self, hash_contents: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Fingerprints all files together, so that any change rewrites the
+        dataset. With a `source_column`, files are fingerprinted as items
+        instead.
+        """
+        return {"files": [delta_sink.file_fingerprint(path, hash_contents) for path in self.files]}
+
+    def fingerprint_items(self, hash_contents: bool = False) -> Optional[Dict[str, str]]:
+        """
+        Fingerprints every file as an item when rows record their file in
+        `source_column`, so that delta sinks only rewrite changed files.
+        """
+        if self.source_column is None:
+            return None
+        return {path: delta_sink.item_fingerprint([path], hash_contents) for path in self.files}
+
+    def _read_file(self, index: int, batch_size: int) -> Generator[pa.RecordBatch, None, None]:
+        schema = self.schema
+        path = self.files[index]
+        for batch in self.datasets[index].to_batches(batch_size=batch_size):
+            if self.source_column is not None:
+                batch = batch.append_column(self.source_column, pa.repeat(pa.scalar(path), batch.num_rows))
+            if batch.schema != schema:
+                # Files whose types were inferred differently are cast to
+                # the types of the first file.
+                batch = batch.cast(schema)
+            yield batch
+
+    def to_batches(self, batch_size: int = 1024, **kwargs) -> Generator[pa.RecordBatch, None, None]:
+        """
+        Yields batches of the dataset as Arrow RecordBatches.
+        """
+        start, stop = self.shard_range(len(self.files))
+        indices = [
+            index for index in range(start, stop) if self.only_items is None or self.files[index] in self.only_items
+        ]
+        workers = max(1, self.file_workers)
+        for offset in range(0, len(indices), workers):
+            window = indices[offset : offset + workers]
+            yield from prefetch([functools.partial(self._read_file, index, batch_size) for index in window])
+
+    @property
+    def schema(self) -> Optional[pa.Schema]:
+        """
+        Returns the schema of the dataset, that of its first file.
+        """
+        schema = getattr(self.datasets[0], "schema", None)
+        if schema is None or self.source_column is None:
+            return schema
+        return schema.append(pa.field(self.source_column, pa.string()))
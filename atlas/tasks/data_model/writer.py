@@ -0,0 +1,297 @@
+# Atlas: A data-centric AI framework
+#
+# Copyright (c) 2024-present, Atlas Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Strategies used by `BaseDataset.to_lance` to write batches to Lance: sharded
+multi-process writes, checkpointed, resumable writes and updates that
+replace rows. All write uncommitted fragments first and commit them
+explicitly.
+"""
+
+import functools
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import lance
+import pyarrow as pa
+from lance.dataset import Transaction
+from lance.fragment import FragmentMetadata, write_fragments
+
+from atlas.utils.batching import rebatch
+from atlas.utils.pipeline import prefetch
+
+CHECKPOINT_KEY = "atlas.checkpoint"
+
+
+def open_dataset(uri: str) -> Optional[lance.LanceDataset]:
+    """
+    Opens the Lance dataset at `uri`, or returns None if there is none.
+    """
+    try:
+        return lance.dataset(uri)
+    except ValueError:
+        return None
+
+
+def skip_rows(batches: Iterable[pa.RecordBatch], num_rows: int) -> Iterator[pa.RecordBatch]:
+    """
+    Drops the first `num_rows` rows from a stream of batches.
+    """
+    for batch in batches:
+        if num_rows >= batch.num_rows:
+            num_rows -= batch.num_rows
+            continue
+        if num_rows > 0:
+            batch = batch.slice(num_rows)
+            num_rows = 0
+        yield batch
+
+
+def rebatched(dataset, batch_size: int, target_bytes: int) -> Iterator[pa.RecordBatch]:
+    """
+    Reads a dataset (or a shard of it) from its `start_row`, re-batched to
+    `target_bytes`.
+    """
+    batches = dataset.to_batches(batch_size=batch_size)
+    if dataset.start_row and not dataset.supports_seek:
+        batches = skip_rows(batches, dataset.start_row)
+    return rebatch(batches, target_bytes)
+
+
+def _fragment_mode(mode: str) -> str:
+    # Fragments written for an overwrite must not take their field ids from
+    # the dataset they replace.
+    return "overwrite" if mode == "overwrite" else "append"
+
+
+def commit_fragments(
+    uri: str,
+    fragments: List[FragmentMetadata],
+    schema: pa.Schema,
+    mode: str,
+    existing: Optional[lance.LanceDataset],
+    properties: Optional[Dict[str, str]] = None,
+    removed_fragment_ids: Sequence[int] = (),
+    updated_fragments: Sequence[FragmentMetadata] = (),
+) -> lance.LanceDataset:
+    """
+    Commits already written fragments as a single new version of the dataset.
+    Appends may delete rows of `existing` in the same commit.
+
+    Args:
+        uri (str): The URI of the Lance dataset.
+        fragments (List[FragmentMetadata]): The fragments to commit.
+        schema (pa.Schema): The schema of the dataset, including its metadata.
+        mode (str): "create", "overwrite" or "append".
+        existing (Optional[lance.LanceDataset]): The dataset the fragments
+            were written against, if it already existed.
+        properties (Optional[Dict[str, str]], optional): Transaction
+            properties stored atomically with the commit.
+        removed_fragment_ids (Sequence[int], optional): The ids of the
+            fragments of `existing` whose rows are all deleted.
+        updated_fragments (Sequence[FragmentMetadata], optional): The
+            fragments of `existing` with new deletion files.
+
+    Returns:
+        lance.LanceDataset: The committed dataset.
+    """
+    if existing is not None and mode == "create":
+        raise ValueError(f"Dataset already exists at {uri}. Use mode='overwrite' or mode='append'.")
+
+    if existing is not None and mode == "append" and (removed_fragment_ids or updated_fragments):
+        operation = lance.LanceOperation.Update(
+            removed_fragment_ids=list(removed_fragment_ids),
+            updated_fragments=list(updated_fragments),
+            new_fragments=fragments,
+        )
+    elif existing is not None and mode == "append":
+        operation = lance.LanceOperation.Append(fragments)
+    else:
+        operation = lance.LanceOperation.Overwrite(schema, fragments)
+    transaction = Transaction(
+        read_version=existing.version if existing is not None else 0,
+        operation=operation,
+        transaction_properties=properties or {},
+    )
+    return lance.LanceDataset.commit(uri, transaction)
+
+
+def write_update(
+    batches: Iterable[pa.RecordBatch],
+    uri: str,
+    schema: pa.Schema,
+    existing: lance.LanceDataset,
+    removed_fragment_ids: Sequence[int],
+    updated_fragments: Sequence[FragmentMetadata],
+    write_kwargs: Dict[str, Any],
+) -> lance.LanceDataset:
+    """
+    Appends batches to `existing` and deletes rows of it in a single commit,
+    so that replaced rows are never missing from, nor duplicated in, any
+    version of the dataset.
+    """
+    write_kwargs = dict(write_kwargs)
+    properties = write_kwargs.pop("transaction_properties", None)
+    data_schema = schema.remove_metadata()
+    reader = pa.RecordBatchReader.from_batches(data_schema, batches)
+    fragments = write_fragments(reader, uri, schema=data_schema, mode="append", **write_kwargs)
+    return commit_fragments(
+        uri, fragments, schema, "append", existing, properties, removed_fragment_ids, updated_fragments
+    )
+
+
+def write_shard(
+    shard,
+    uri: str,
+    schema: pa.Schema,
+    mode: str,
+    batch_size: int,
+    target_bytes: int,
+    prefetch_depth: int,
+    write_kwargs: Dict[str, Any],
+) -> List[FragmentMetadata]:
+    """
+    Writes one shard of a dataset as uncommitted Lance fragments. Runs in a
+    worker process.
+    """
+    reader = prefetch([functools.partial(rebatched, shard, batch_size, target_bytes)], depth=prefetch_depth)
+    try:
+        batches = pa.RecordBatchReader.from_batches(schema, reader)
+        return write_fragments(batches, uri, schema=schema, mode=_fragment_mode(mode), **write_kwargs)
+    finally:
+        reader.close()
+
+
+def write_shards(
+    shards: List,
+    uri: str,
+    schema: pa.Schema,
+    mode: str,
+    batch_size: int,
+    target_bytes: int,
+    prefetch_depth: int,
+    write_kwargs: Dict[str, Any],
+) -> lance.LanceDataset:
+    """
+    Writes the shards in parallel processes and commits all of their fragments
+    in a single transaction.
+    """
+    existing = open_dataset(uri)
+    if existing is not None and mode == "create":
+        raise ValueError(f"Dataset already exists at {uri}. Use mode='overwrite' or mode='append'.")
+
+    data_schema = schema.remove_metadata()
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(shards), mp_context=context) as executor:
+        futures = [
+            executor.submit(
+                write_shard, shard, uri, data_schema, mode, batch_size, target_bytes, prefetch_depth, write_kwargs
+            )
+            for shard in shards
+        ]
+        fragments = [fragment for future in futures for fragment in future.result()]
+
+    return commit_fragments(uri, fragments, schema, mode, existing)
+
+
+def load_checkpoint(uri: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns the checkpoint stored with the latest version of the dataset at
+    `uri`, or None if the dataset does not exist or its latest version was not
+    written by a checkpointed sink.
+    """
+    dataset = open_dataset(uri)
+    if dataset is None:
+        return None
+    transaction = dataset.read_transaction(dataset.version)
+    if transaction is None or CHECKPOINT_KEY not in (transaction.transaction_properties or {}):
+        return None
+    return json.loads(transaction.transaction_properties[CHECKPOINT_KEY])
+
+
+def write_checkpointed(
+    batches: Iterable[pa.RecordBatch],
+    uri: str,
+    schema: pa.Schema,
+    mode: str,
+    checkpoint: Dict[str, Any],
+    commit_every: Optional[int],
+    commit_every_bytes: Optional[int],
+    write_kwargs: Dict[str, Any],
+) -> Optional[lance.LanceDataset]:
+    """
+    Writes batches to Lance, committing a new version every `commit_every`
+    batches or `commit_every_bytes` bytes, whichever comes first.
+
+    Every commit stores `checkpoint` as a transaction property, with its
+    "position" advanced by the number of rows committed so far and "complete"
+    set on the last commit. Since the checkpoint is part of the commit, it can
+    never get ahead of or fall behind the data that is durably written.
+
+    Returns:
+        Optional[lance.LanceDataset]: The dataset after the last commit, or
+            None if there was nothing to write.
+    """
+    data_schema = schema.remove_metadata()
+    batches = iter(batches)
+    pending = next(batches, None)
+    existing = open_dataset(uri)
+    if existing is not None and mode == "create":
+        raise ValueError(f"Dataset already exists at {uri}. Use mode='overwrite' or mode='append'.")
+
+    while pending is not None:
+        written = {"rows": 0, "batches": 0, "bytes": 0}
+        error = None
+
+        def segment():
+            nonlocal pending, error
+            while pending is not None:
+                batch = pending
+                yield batch
+                written["rows"] += batch.num_rows
+                written["batches"] += 1
+                written["bytes"] += batch.nbytes
+                try:
+                    pending = next(batches, None)
+                except Exception as e:
+                    # Lance wraps errors raised by the reader; keep the
+                    # original so the caller sees what actually failed.
+                    error = e
+                    raise
+                if commit_every and written["batches"] >= commit_every:
+                    break
+                if commit_every_bytes and written["bytes"] >= commit_every_bytes:
+                    break
+
+        reader = pa.RecordBatchReader.from_batches(data_schema, segment())
+        try:
+            fragments = write_fragments(reader, uri, schema=data_schema, mode=_fragment_mode(mode), **write_kwargs)
+        except Exception:
+            # The uncommitted segment is dropped; the last commit stands.
+            if error is not None:
+                raise error
+            raise
+
+        checkpoint["position"] += written["rows"]
+        checkpoint["complete"] = pending is None
+        existing = commit_fragments(
+            uri, fragments, schema, mode, existing, {CHECKPOINT_KEY: json.dumps(checkpoint)}
+        )
+        mode = "append"
+
+    return existing
@@ -14,25 +14,136 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import io
-from typing import Generator
+from typing import Generator, Optional
 
 import pyarrow as pa
+import pyarrow.compute as pc
 from datasets import Dataset
 from datasets.features.features import ClassLabel, Value, Sequence, Image, Audio
 
 from atlas.tasks.data_model.base import BaseDataset
+from atlas.utils.blob import reference_field, reference_reader
+from atlas.utils.io import DEFAULT_READ_WORKERS, read_files
 from atlas.utils.system import check_ffmpeg
 
 
+def _is_plain(feature) -> bool:
+    """
+    Returns True if a feature is stored by Hugging Face in the Arrow layout
+    of the target schema, so that its column can be written as is.
+    """
+    if isinstance(feature, Value):
+        return True
+    if isinstance(feature, Sequence):
+        return _is_plain(feature.feature)
+    if isinstance(feature, dict):
+        return all(_is_plain(sub_feature) for sub_feature in feature.values())
+    if isinstance(feature, list):
+        return bool(feature) and _is_plain(feature[0])
+    return False  # ClassLabel, Image and Audio are converted
+
+
+def _has_class_labels(feature) -> bool:
+    if isinstance(feature, ClassLabel):
+        return True
+    if isinstance(feature, Sequence):
+        return _has_class_labels(feature.feature)
+    if isinstance(feature, dict):
+        return any(_has_class_labels(sub_feature) for sub_feature in feature.values())
+    if isinstance(feature, list):
+        return bool(feature) and _has_class_labels(feature[0])
+    return False
+
+
+def class_label_array(indices: pa.Array, feature: ClassLabel) -> pa.DictionaryArray:
+    """
+    Converts ClassLabel indices to a dictionary array, whose dictionary holds
+    every label name once. Negative indices, which mark unlabeled examples,
+    become nulls.
+    """
+    indices = indices.cast(pa.int32())
+    indices = pc.if_else(pc.less(indices, 0), pa.scalar(None, pa.int32()), indices)
+    return pa.DictionaryArray.from_arrays(indices, pa.array(feature.names, type=pa.string()))
+
+
+def _map_list_values(array: pa.ListArray, convert) -> pa.ListArray:
+    """
+    Converts the values of a list array, keeping its offsets and nulls.
+    """
+    start = array.offsets[0].as_py()
+    offsets = pc.subtract(array.offsets, start)
+    # The values covered by the offsets, including those behind null lists,
+    # which `flatten` would drop.
+    values = array.values.slice(start, array.offsets[-1].as_py() - start)
+    list_class = pa.LargeListArray if pa.types.is_large_list(array.type) else pa.ListArray
+    return list_class.from_arrays(offsets, convert(values), mask=array.is_null())
+
+
+def _convert_class_labels(array: pa.Array, feature) -> pa.Array:
+    """
+    Converts the ClassLabels of a column, at any depth of lists and dicts, to
+    dictionary arrays.
+    """
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    if isinstance(feature, ClassLabel):
+        return class_label_array(array, feature)
+    if isinstance(feature, (Sequence, list)):
+        sub_feature = feature.feature if isinstance(feature, Sequence) else feature[0]
+        return _map_list_values(array, lambda values: _convert_class_labels(values, sub_feature))
+    if isinstance(feature, dict):
+        names = sorted(feature)
+        children = [_convert_class_labels(array.field(name), feature[name]) for name in names]
+        return pa.StructArray.from_arrays(children, names=names, mask=array.is_null())
+    return array
+
+
+def _is_list(data_type: pa.DataType) -> bool:
+    return pa.types.is_list(data_type) or pa.types.is_large_list(data_type)
+
+
+def _extract(array: pa.Array, path: tuple, convert) -> pa.Array:
+    """
+    Takes the struct field at `path` from a column, through any lists on the
+    way, and converts the values found there.
+
+    Lists are flattened, their values extracted and the lists rebuilt from
+    the original offsets, so that the result has one list level for every
+    list crossed. Fields of null structs are null.
+    """
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    if not path:
+        return convert(array)
+    if _is_list(array.type):
+        return _map_list_values(array, lambda values: _extract(values, path, convert))
+    if array.type.get_field_index(path[0]) < 0:
+        return pa.nulls(len(array))  # A missing key, cast to the type of the column.
+    return _extract(pc.struct_field(array, path[0]), path[1:], convert)
+
+
 class HFDataset(BaseDataset):
     """
     A dataset that wraps a Hugging Face dataset.
     """
 
-    def __init__(self, data: Dataset, expand_level: int = 0, handle_nested_nulls: bool = False):
+    supports_sharding = True
+    supports_seek = True
+
+    def __init__(
+        self,
+        data: Dataset,
+        expand_level: int = 0,
+        handle_nested_nulls: bool = False,
+        read_workers: int = DEFAULT_READ_WORKERS,
+        image_mode: str = "bytes",
+        checksum: bool = False,
+    ):
         super().__init__(data)
-        self.expand_level = 1 if expand_level > 0 else 0
+        self.read_workers = read_workers
+        self.image_mode = image_mode
+        self._read_images = reference_reader(image_mode, read_workers, checksum)
+        self.expand_level = expand_level
         self.handle_nested_nulls = handle_nested_nulls
         self._expansion_map = {}
         self.metadata.decode_meta = self._get_decode_meta()
@@ -53,46 +164,49 @@ class HFDataset(BaseDataset):
             fields.extend(self._convert_feature_to_arrow_fields(name, feature, self.expand_level))
         return pa.schema(fields)
 
-    def _convert_feature_to_arrow_fields(self, name: str, feature, expand_level: int) -> list[pa.Field]:
+    def _convert_feature_to_arrow_fields(
+        self, name: str, feature, expand_level: int, root: Optional[str] = None, path: tuple = ()
+    ) -> list[pa.Field]:
         """
         _convert_feature_to_arrow_fields and _convert_feature_to_arrow_field work together to recursively
         define the schema. The former handles expansion of nested features, while the latter handles the
         conversion of individual features to Arrow fields.
+
+        Every level of expansion turns the fields of a dict, or of the dicts of a list, into columns
+        named after their path. Columns expanded from lists of dicts are lists of the field values.
+        The columns are recorded in `_expansion_map` with the root column and the path of the field.
         """
+        root = root or name
         # Expand dicts
         if expand_level > 0 and isinstance(feature, dict):
             fields = []
             # Sort keys to ensure consistent field order
-            sorted_items = sorted(feature.items())
-            for sub_name, sub_feature in sorted_items:
-                new_name = f"{name}_{sub_name}"
-                self._expansion_map[new_name] = (name, sub_name, "dict")
-                fields.extend(self._convert_feature_to_arrow_fields(new_name, sub_feature, expand_level - 1))
+            for sub_name, sub_feature in sorted(feature.items()):
+                fields.extend(
+                    self._convert_feature_to_arrow_fields(
+                        f"{name}_{sub_name}", sub_feature, expand_level - 1, root, path + (sub_name,)
+                    )
+                )
             return fields
         # Expand lists of dicts
         if expand_level > 0 and isinstance(feature, Sequence) and isinstance(feature.feature, dict):
-            fields = []
-            # Sort keys to ensure consistent field order
-            sorted_items = sorted(feature.feature.items())
-            for sub_name, sub_feature in sorted_items:
-                new_name = f"{name}_{sub_name}"
-                self._expansion_map[new_name] = (name, sub_name, "list_of_dicts")
-                # The sub-feature is now a list of the original sub-feature's type
-                list_of_sub_feature = Sequence(feature=sub_feature)
-                fields.append(self._convert_feature_to_arrow_field(new_name, list_of_sub_feature))
-            return fields
-        else:
-            return [self._convert_feature_to_arrow_field(name, feature)]
+            fields = self._convert_feature_to_arrow_fields(name, feature.feature, expand_level, root, path)
+            return [pa.field(field.name, pa.list_(field.type), metadata=field.metadata) for field in fields]
+        if path:
+            self._expansion_map[name] = (root, path, feature)
+        return [self._convert_feature_to_arrow_field(name, feature)]
 
     def _convert_feature_to_arrow_field(self, name: str, feature) -> pa.Field:
         """
         Converts a single Hugging Face feature to a PyArrow field. This method is called recursively
         for nested features like Sequence, dict, and list to define their nested structure.
         """
+        if isinstance(feature, Image) and self.image_mode == "reference":
+            return reference_field(name)
         if isinstance(feature, (Image, Audio)):
             return pa.field(name, pa.large_binary(), metadata={"lance:encoding": "binary"})
         if isinstance(feature, ClassLabel):
-            return pa.field(name, pa.string())
+            return pa.field(name, pa.dictionary(pa.int32(), pa.string()))
         if isinstance(feature, Value):
             return pa.field(name, feature.pa_type)
         # For a Sequence (list), recursively call this function to determine the type of the elements.
@@ -115,163 +229,97 @@ class HFDataset(BaseDataset):
             return pa.field(name, pa.list_(self._convert_feature_to_arrow_field("item", feature[0]).type))
         raise ValueError(f"Unsupported feature type for column '{name}': {feature}")
 
+    def _read_missing(self, values: pa.Array, paths: pa.Array, missing: pa.Array) -> pa.Array:
+        """
+        Replaces the values at `missing` with the contents of the files at
+        `paths`, which are read concurrently.
+        """
+        if not pc.any(missing).as_py():
+            return values
+        contents = read_files(pc.filter(paths, missing).to_pylist(), self.read_workers)
+        return pc.replace_with_mask(values, missing, pa.array(contents, type=pa.large_binary()))
+
     def _process_column(self, column_data: pa.Array, feature) -> pa.Array:
         if column_data is None:
             return column_data
 
-        if isinstance(feature, Image):
-            serialized_data = []
-            for img_data in column_data.to_pylist():
-                if not img_data:
-                    serialized_data.append(None)
-                    continue
-                if 'bytes' in img_data and img_data['bytes']:
-                    serialized_data.append(img_data['bytes'])
-                elif 'path' in img_data and img_data['path']:
-                    with open(img_data['path'], 'rb') as f:
-                        serialized_data.append(f.read())
-                else:
-                    buf = io.BytesIO()
-                    img_data.save(buf, format='PNG')
-                    serialized_data.append(buf.getvalue())
-            return pa.array(serialized_data, type=pa.large_binary())
-
-        if isinstance(feature, Audio):
-            serialized_data = []
-            for item in column_data.to_pylist():
-                if item and 'path' in item and item['path']:
-                    with open(item['path'], 'rb') as f:
-                        serialized_data.append(f.read())
-                elif item and 'bytes' in item:
-                    serialized_data.append(item['bytes'])
-                else:
-                    serialized_data.append(None)
-            return pa.array(serialized_data, type=pa.large_binary())
+        if isinstance(feature, (Image, Audio)):
+            # The bytes and paths are taken from the struct of the feature as
+            # Arrow arrays; only files that are not embedded are read.
+            if isinstance(column_data, pa.ChunkedArray):
+                column_data = column_data.combine_chunks()
+            paths = pc.struct_field(column_data, "path")
+            has_path = pc.fill_null(pc.greater(pc.utf8_length(paths), 0), False)
 
-        if isinstance(feature, ClassLabel):
-            return pa.array([feature.int2str(label) if label is not None else None for label in column_data.to_pylist()], type=pa.string())
+            if isinstance(feature, Image) and self._read_images is not None:
+                if pc.any(pc.and_(column_data.is_valid(), pc.invert(has_path))).as_py():
+                    raise ValueError("Images without a file path cannot be stored with image_mode='reference'.")
+                return self._read_images(paths.to_pylist())
 
-        if isinstance(feature, Sequence):
-            if isinstance(feature.feature, ClassLabel):
-                return pa.array([[feature.feature.int2str(l) for l in label_list] if label_list is not None else None for label_list in column_data.to_pylist()])
-            # This block handles a special case where a column is a list of dictionaries (Sequence of dicts),
-            # and some of the values within those dictionaries are ClassLabels. The default Arrow conversion
-            # does not handle converting the nested ClassLabels to strings, so we must do it manually.
-            # This is not the most performant approach as it iterates in Python, but it correctly handles the conversion.
-            if isinstance(feature.feature, dict):
-                processed_list = []
-                for list_of_dicts in column_data.to_pylist():
-                    if list_of_dicts is None:
-                        processed_list.append(None)
-                        continue
-                    new_list = []
-                    for item_dict in list_of_dicts:
-                        new_dict = {}
-                        sorted_items = sorted(item_dict.items())
-                        for k, v in sorted_items:
-                            sub_feature = feature.feature[k]
-                            if isinstance(sub_feature, ClassLabel) and v is not None:
-                                new_dict[k] = sub_feature.int2str(v)
-                            else:
-                                new_dict[k] = v
-                        new_list.append(new_dict)
-                    processed_list.append(new_list)
-                return pa.array(processed_list)
+            data = pc.struct_field(column_data, "bytes").cast(pa.large_binary())
+            if isinstance(feature, Image):
+                has_bytes = pc.fill_null(pc.greater(pc.binary_length(data), 0), False)
+                missing = pc.and_(has_path, pc.invert(has_bytes))
+            else:
+                missing = has_path  # Audio files are read from their path when they have one.
+            return self._read_missing(data, paths, missing)
+
+        if _has_class_labels(feature):
+            return _convert_class_labels(column_data, feature)
 
         return column_data
 
+    def _expanded_column(self, column_data: pa.Array, field: pa.Field) -> pa.Array:
+        """
+        Builds an expanded column from its root column with Arrow kernels.
+        """
+        _, path, feature = self._expansion_map[field.name]
+
+        values = _extract(column_data, path, lambda leaf: self._process_column(leaf, feature))
+        return values if values.type == field.type else values.cast(field.type)
+
     def to_batches(self, batch_size: int = 1024, **kwargs) -> Generator[pa.RecordBatch, None, None]:
         """
         Yields batches of the dataset as Arrow RecordBatches.
         The logic iterates through the fields of the *target schema* and constructs each column
         one by one. This approach is robust because it guarantees that the output will match the
         schema, and it cleanly separates the logic for handling expanded and non-expanded columns.
+
+        Columns are built from the Arrow batches of the dataset with Arrow kernels. Expanded fields
+        are null wherever the structs holding them are null or lack them, whether or not
+        `handle_nested_nulls` is set.
         """
         schema = self.to_arrow_schema()
 
-        if self.handle_nested_nulls:
-            # Slower, but robust path that handles missing keys and null values in nested dicts.
-            for batch in self.data.iter(batch_size=batch_size):
-                arrays = []
-                for field in schema:
-                    if field.name in self._expansion_map:
-                        original_name, sub_name, expansion_type = self._expansion_map[field.name]
-                        original_feature = self.data.features[original_name]
-
-                        if expansion_type == "dict":
-                            sub_feature = original_feature[sub_name]
-                            column_data = [row.get(sub_name) if row else None for row in batch[original_name]]
-                            processed_data = self._process_column(pa.array(column_data), sub_feature)
-                            arrays.append(pa.array(processed_data, type=field.type))
-                            continue
-                        elif expansion_type == "list_of_dicts":
-                            sub_feature = original_feature.feature[sub_name]
-                            processed_data = []
-                            for list_of_dicts in batch[original_name]:
-                                if list_of_dicts is None:
-                                    processed_data.append(None)
-                                    continue
-                                sub_list = [d.get(sub_name) if d else None for d in list_of_dicts]
-                                processed_data.append(sub_list)
-                            
-                            # Manually handle ClassLabel in list of dicts after expansion
-                            if isinstance(sub_feature, ClassLabel):
-                                processed_data = [[sub_feature.int2str(v) if v is not None else None for v in sub_list] if sub_list is not None else None for sub_list in processed_data]
-
-                            arrays.append(pa.array(processed_data, type=field.type))
-                            continue
-
-                    column_data = pa.array(batch[field.name])
-                    feature = self.data.features[field.name]
-                    processed_data = self._process_column(column_data, feature)
-                    arrays.append(pa.array(processed_data, type=field.type))
-
-                yield pa.RecordBatch.from_arrays(arrays, schema=schema)
-        else:
-            # Faster, Arrow-native path. This is less robust to missing nested data.
-            for batch in self.data.with_format("arrow").iter(batch_size=batch_size):
-                arrays = []
-                for field in schema:
-                    if field.name in self._expansion_map:
-                        original_name, sub_name, expansion_type = self._expansion_map[field.name]
-                        original_feature = self.data.features[original_name]
-
-                        if expansion_type == "dict":
-                            column_data = batch[original_name]
-                            if isinstance(column_data, pa.ChunkedArray):
-                                column_data = column_data.combine_chunks()
-                            
-                            sub_column_data = column_data.field(sub_name)
-                            sub_feature = original_feature[sub_name]
-                            
-                            processed_data = self._process_column(sub_column_data, sub_feature)
-                            arrays.append(pa.array(processed_data, type=field.type))
-                            continue
-                        elif expansion_type == "list_of_dicts":
-                            column_data = batch[original_name]
-                            if isinstance(column_data, pa.ChunkedArray):
-                                column_data = column_data.combine_chunks()
-
-                            # Extract sub-list from list of structs
-                            sub_lists = []
-                            for struct_list in column_data.to_pylist():
-                                if struct_list is None:
-                                    sub_lists.append(None)
-                                    continue
-                                sub_list = [d[sub_name] if d and sub_name in d else None for d in struct_list]
-                                sub_lists.append(sub_list)
-
-                            sub_feature = original_feature.feature[sub_name]
-                            processed_data = self._process_column(pa.array(sub_lists), Sequence(feature=sub_feature))
-                            arrays.append(pa.array(processed_data, type=field.type))
-                            continue
-
-                    column_data = batch[field.name]
-                    feature = self.data.features[field.name]
-                    processed_data = self._process_column(column_data, feature)
-                    arrays.append(pa.array(processed_data, type=field.type))
-
-                yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+        data = self.data
+        if self.start_row:
+            data = data.select(range(self.start_row, len(data)))
+        if self.num_shards > 1:
+            data = data.shard(num_shards=self.num_shards, index=self.shard_index, contiguous=True)
+
+        for batch in data.with_format("arrow").iter(batch_size=batch_size):
+            arrays = []
+            for field in schema:
+                if field.name in self._expansion_map:
+                    root = self._expansion_map[field.name][0]
+                    arrays.append(self._expanded_column(batch[root], field))
+                    continue
+
+                column_data = batch[field.name]
+                feature = self.data.features[field.name]
+                if _is_plain(feature):
+                    # Pass the Arrow buffers of the dataset through without
+                    # copying them. Only struct fields may need reordering.
+                    if column_data.type != field.type:
+                        column_data = column_data.cast(field.type)
+                    arrays.append(column_data)
+                    continue
+                processed_data = self._process_column(column_data, feature)
+                arrays.append(pa.array(processed_data, type=field.type))
+
+            # The columns may be chunked differently; the batches of the
+            # table are zero-copy slices of them.
+            yield from pa.Table.from_arrays(arrays, schema=schema).to_batches()
 
     @property
     def schema(self) -> pa.Schema:
@@ -14,85 +14,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import json
-from typing import Generator
-
 import pyarrow as pa
 
-from atlas.tasks.data_model.base import BaseDataset
+from atlas.tasks.data_model.jsonl import JsonlDataset
+from atlas.utils.jsonl import JsonField
 
 
-class InstructionDataset(BaseDataset):
+class InstructionDataset(JsonlDataset):
     """
     A dataset that reads data from a JSONL file, where each line is a JSON object
     with "instruction", "input", and "output" fields.
     """
 
-    def to_batches(self, batch_size: int = 1024, **kwargs) -> Generator[pa.RecordBatch, None, None]:
-        """
-        Yields batches of the dataset as Arrow RecordBatches.
-        """
-        instructions, inputs, outputs, responses = [], [], [], []
-
-        def process_record(record):
-            instructions.append(record.get("instruction", ""))
-            inputs.append(record.get("input", "") or record.get("context", ""))
-            outputs.append(record.get("output", ""))
-            responses.append(record.get("response", ""))
-
-
-        if isinstance(self.data, str):
-            with open(self.data, "r") as f:
-                for line in f:
-                    record = json.loads(line)
-                    process_record(record)
-                    if len(instructions) == batch_size:
-                        yield pa.RecordBatch.from_arrays(
-                            [
-                                pa.array(instructions, type=pa.string()),
-                                pa.array(inputs, type=pa.string()),
-                                pa.array(outputs, type=pa.string()),
-                                pa.array(responses, type=pa.string()),
-                            ],
-                            schema=self.schema,
-                        )
-                        instructions, inputs, outputs, responses = [], [], [], []
-        else:
-            for record in self.data:
-                process_record(record)
-                if len(instructions) == batch_size:
-                    yield pa.RecordBatch.from_arrays(
-                        [
-                            pa.array(instructions, type=pa.string()),
-                            pa.array(inputs, type=pa.string()),
-                            pa.array(outputs, type=pa.string()),
-                            pa.array(responses, type=pa.string()),
-                        ],
-                        schema=self.schema,
-                    )
-                    instructions, inputs, outputs, responses = [], [], [], []
-
-        if instructions:
-            yield pa.RecordBatch.from_arrays(
-                [
-                    pa.array(instructions, type=pa.string()),
-                    pa.array(inputs, type=pa.string()),
-                    pa.array(outputs, type=pa.string()),
-                    pa.array(responses, type=pa.string()),
-                ],
-                schema=self.schema,
-            )
-
-    @property
-    def schema(self) -> pa.Schema:
-        """
-        Returns the schema of the dataset.
-        """
-        return pa.schema(
-            [
-                pa.field("instruction", pa.string()),
-                pa.field("input", pa.string()),
-                pa.field("output", pa.string()),
-                pa.field("response", pa.string()),
-            ]
-        )
+    fields = (
+        JsonField("instruction", pa.string(), default=""),
+        JsonField("input", pa.string(), sources=("input", "context"), default=""),
+        JsonField("output", pa.string(), default=""),
+        JsonField("response", pa.string(), default=""),
+    )
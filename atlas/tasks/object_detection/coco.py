@@ -14,13 +14,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import json
 import os
 from typing import Generator
 
+import numpy as np
 import pyarrow as pa
+import pyarrow.compute as pc
 
 from atlas.tasks.data_model.base import BaseDataset
+from atlas.tasks.data_model.delta import item_fingerprint
+from atlas.utils.blob import blob_field, reference_field, reference_reader
+from atlas.utils.coco import SPILL_ROWS, CocoIndex
+from atlas.utils.image import fill_sizes
+from atlas.utils.io import DEFAULT_READ_WORKERS, prefetch_files
 
 
 class CocoDataset(BaseDataset):
@@ -28,8 +34,17 @@ class CocoDataset(BaseDataset):
     A dataset that reads data from a COCO JSON file.
     """
 
+    supports_sharding = True
+    supports_seek = True
+    delta_key = "file_name"
+
     def __init__(self, data: str, **kwargs):
         super().__init__(data)
+        self._index = None
+        self.spill_dir = kwargs.get("spill_dir")
+        self.read_workers = kwargs.get("read_workers", DEFAULT_READ_WORKERS)
+        self.image_mode = kwargs.get("image_mode", "bytes")
+        self._read_images = reference_reader(self.image_mode, self.read_workers, kwargs.get("checksum", False))
         self.image_root = kwargs.get("image_root")
         if self.image_root is None:
             self.image_root = self._infer_image_root()
@@ -47,84 +62,96 @@ class CocoDataset(BaseDataset):
                 return image_dir
         return annotation_dir
 
-    def to_batches(self, batch_size: int = 1024, **kwargs) -> Generator[pa.RecordBatch, None, None]:
+    def _load_annotations(self) -> CocoIndex:
         """
-        Yields batches of the dataset as Arrow RecordBatches.
+        Parses the annotation file once into an on-disk index and caches it,
+        so that all shards of the dataset share a single parsed copy.
+        """
+        if self._index is not None:
+            return self._index
+
+        self._index = CocoIndex(self.data, self.spill_dir)
+        if self._index.categories is not None:
+            self.metadata.class_names = self._index.categories
+        return self._index
+
+    def _image_path(self, file_name: str) -> str:
+        if self.image_root:
+            return os.path.join(self.image_root, file_name)
+        return file_name
+
+    def _positions(self, index: CocoIndex) -> np.ndarray:
+        """
+        Returns the positions in the index of the images read by this shard.
+        """
+        positions = np.arange(len(index))
+        if self.only_items is not None:
+            selected = pc.is_in(index.file_names, value_set=pa.array(list(self.only_items), pa.string()))
+            positions = positions[selected.to_numpy(zero_copy_only=False)]
+        positions = positions[self.start_row:]
+        start, stop = self.shard_range(len(positions))
+        return positions[start:stop]
+
+    def fingerprint_items(self, hash_contents: bool = False):
         """
-        with open(self.data, "r") as f:
-            coco_data = json.load(f)
-
-        images = {image["id"]: image for image in coco_data["images"]}
-        annotations_by_image = {}
-        for ann in coco_data.get("annotations", []):
-            annotations_by_image.setdefault(ann["image_id"], []).append(ann)
-
-        captions_by_image = {}
-        if "captions" in coco_data:
-            for cap in coco_data["captions"]:
-                captions_by_image.setdefault(cap["image_id"], []).append(cap["caption"])
-
-        if "categories" in coco_data:
-            self.metadata.class_names = {cat["id"]: cat["name"] for cat in coco_data["categories"]}
-
-        image_ids = list(images.keys())
-
-        for i in range(0, len(image_ids), batch_size):
-            batch_image_ids = image_ids[i : i + batch_size]
-
-            images_data = []
-            all_bboxes = []
-            all_labels = []
-            all_keypoints = []
-            all_captions = []
-            heights = []
-            widths = []
-            file_names = []
-
-            for image_id in batch_image_ids:
-                image_info = images[image_id]
-                image_path = (
-                    os.path.join(self.image_root, image_info["file_name"])
-                    if self.image_root
-                    else image_info["file_name"]
+        Fingerprints every image by its file and its annotations.
+        """
+        index = self._load_annotations()
+        fingerprints = {}
+        for start in range(0, len(index), SPILL_ROWS):
+            positions = np.arange(start, min(start + SPILL_ROWS, len(index)))
+            annotations = index.annotations(positions)
+            captions = index.captions(positions)
+            for i, image_info in enumerate(index.images(positions)):
+                fingerprints[image_info["file_name"]] = item_fingerprint(
+                    [self._image_path(image_info["file_name"])],
+                    hash_contents,
+                    [image_info, annotations[i], captions[i]],
                 )
-                with open(image_path, "rb") as f:
-                    images_data.append(f.read())
-
-                annotations = annotations_by_image.get(image_id, [])
-                bboxes = [ann.get("bbox") for ann in annotations]
-                labels = [ann.get("category_id") for ann in annotations]
-                keypoints = [ann.get("keypoints") for ann in annotations]
-
-                all_bboxes.append(bboxes)
-                all_labels.append(labels)
-                all_keypoints.append(keypoints)
-                all_captions.append(captions_by_image.get(image_id, []))
-                heights.append(image_info.get("height", 0))
-                widths.append(image_info.get("width", 0))
-                file_names.append(image_info.get("file_name", ""))
+        return fingerprints
+
+    def prepare(self):
+        self._load_annotations()
+
+    def shards(self, num_shards: int):
+        self._load_annotations()
+        return super().shards(num_shards)
 
+    def to_batches(self, batch_size: int = 1024, **kwargs) -> Generator[pa.RecordBatch, None, None]:
+        """
+        Yields batches of the dataset as Arrow RecordBatches.
+        """
+        index = self._load_annotations()
+        positions = self._positions(index)
+
+        position_batches = (positions[i : i + batch_size] for i in range(0, len(positions), batch_size))
+        for batch_positions, images_data in prefetch_files(
+            position_batches,
+            lambda batch: [self._image_path(name) for name in index.file_names.take(batch).to_pylist()],
+            self.read_workers,
+            type=pa.large_binary(),
+            read=self._read_images,
+        ):
+            images = index.image_columns(batch_positions)
+            annotations = index.annotation_lists(batch_positions)
+            widths, heights = fill_sizes(
+                images.column("width").combine_chunks(),
+                images.column("height").combine_chunks(),
+                None if self.image_mode == "reference" else images_data,
+                [self._image_path(name) for name in images.column("file_name").to_pylist()],
+            )
             batch = pa.RecordBatch.from_arrays(
                 [
-                    pa.array(images_data, type=pa.binary()),
-                    pa.array(all_bboxes, type=pa.list_(pa.list_(pa.float32()))),
-                    pa.array(all_labels, type=pa.list_(pa.int64())),
-                    pa.array(all_keypoints, type=pa.list_(pa.list_(pa.float32()))),
-                    pa.array(all_captions, type=pa.list_(pa.string())),
-                    pa.array(heights, type=pa.int64()),
-                    pa.array(widths, type=pa.int64()),
-                    pa.array(file_names, type=pa.string()),
-                ],
-                names=[
-                    "image",
-                    "bbox",
-                    "label",
-                    "keypoints",
-                    "captions",
-                    "height",
-                    "width",
-                    "file_name",
+                    images_data,
+                    annotations["bbox"],
+                    annotations["category_id"],
+                    annotations["keypoints"],
+                    index.caption_lists(batch_positions),
+                    heights,
+                    widths,
+                    images.column("file_name").combine_chunks(),
                 ],
+                schema=self.schema,
             )
             yield batch
 
@@ -135,7 +162,7 @@ class CocoDataset(BaseDataset):
         """
         return pa.schema(
             [
-                pa.field("image", pa.binary()),
+                reference_field("image") if self.image_mode == "reference" else blob_field("image"),
                 pa.field("bbox", pa.list_(pa.list_(pa.float32()))),
                 pa.field("label", pa.list_(pa.int64())),
                 pa.field("keypoints", pa.list_(pa.list_(pa.float32()))),
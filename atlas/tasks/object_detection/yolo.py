@@ -15,42 +15,201 @@
 # limitations under the License.
 
 import os
-from typing import Generator
-from PIL import Image
+from typing import Any, Dict, Generator, List, Optional, Sequence, Tuple
 import yaml
 
+import numpy as np
 import pyarrow as pa
+import pyarrow.compute as pc
 
 from atlas.tasks.data_model.base import BaseDataset
+from atlas.tasks.data_model.delta import item_fingerprint
+from atlas.utils.blob import blob_field, reference_field, reference_reader
+from atlas.utils.image import image_sizes
+from atlas.utils.io import DEFAULT_READ_WORKERS, prefetch_files, read_files, scan_files
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+SPLIT_KEYS = ("train", "val", "test")
+LABEL_READ_CHUNK = 4096
+
+
+def _label_dir(image_dir: str) -> str:
+    """
+    Returns the label directory of an image directory, by replacing its last
+    `images` component with `labels`, as YOLO does.
+    """
+    parts = os.path.normpath(image_dir).split(os.sep)
+    if "images" in parts:
+        position = len(parts) - 1 - parts[::-1].index("images")
+        parts[position] = "labels"
+    return os.sep.join(parts)
+
+
+def _stem(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _parse_labels(text: Optional[bytes]) -> Tuple[List[int], List[List[float]]]:
+    labels, bboxes = [], []
+    if text:
+        for line in text.decode("utf-8").splitlines():
+            parts = line.split()
+            if not parts:
+                continue
+            labels.append(int(parts[0]))
+            bboxes.append([round(float(x), 6) for x in parts[1:5]])
+    return labels, bboxes
 
 
 class YoloDataset(BaseDataset):
     """
-    A dataset that reads data from a YOLO detection file.
+    A dataset that reads data from a YOLO detection directory.
+
+    The splits are read from the `train`, `val` and `test` entries of
+    data.yaml, or are the subdirectories of `images/` without one. Every
+    image is paired with the label file of the same stem in the matching
+    `labels/` directory, and its split is written to the `split` column.
+    Rows are keyed by `path`, the path of the image relative to the dataset
+    directory, since images of different splits may share a `file_name`.
     """
 
+    supports_sharding = True
+    supports_seek = True
+    delta_key = "path"
+
     def __init__(self, data: str, **kwargs):
         super().__init__(data)
+        self.read_workers = kwargs.get("read_workers", DEFAULT_READ_WORKERS)
+        self.image_mode = kwargs.get("image_mode", "bytes")
+        self._read_images = reference_reader(self.image_mode, self.read_workers, kwargs.get("checksum", False))
+        self._files = None
+        self._index = None
+
+    def _data_dir(self) -> str:
+        # The coco128 dataset has a subdirectory with the same name.
+        data_dir = os.path.join(self.data, "coco128")
+        return data_dir if os.path.exists(data_dir) else self.data
+
+    def _data_yaml(self) -> Dict[str, Any]:
+        data_yaml_path = os.path.join(self.data, "data.yaml")
+        if not os.path.exists(data_yaml_path):
+            return {}
+        with open(data_yaml_path, "r") as f:
+            return yaml.safe_load(f) or {}
+
+    def _splits(self, data_yaml: Dict[str, Any]) -> List[Tuple[str, List[str]]]:
+        """
+        Returns the name and the image directories of every split.
+
+        A directory shared by several splits, as `train` and `val` are in
+        coco128, is read once, with the names of its splits joined by commas.
+        """
+        root = self._data_dir()
+        if data_yaml.get("path"):
+            root = os.path.join(self.data, data_yaml["path"])
+        split_names: Dict[str, List[str]] = {}
+        for key in SPLIT_KEYS:
+            entries = data_yaml.get(key)
+            if not entries:
+                continue
+            if isinstance(entries, str):
+                entries = [entries]
+            for entry in entries:
+                directory = os.path.normpath(os.path.join(root, entry))
+                if os.path.isdir(directory) and key not in split_names.setdefault(directory, []):
+                    split_names[directory].append(key)
+        if split_names:
+            return [(",".join(names), [directory]) for directory, names in split_names.items()]
+
+        image_root = os.path.join(self._data_dir(), "images")
+        with os.scandir(image_root) as entries:
+            subdirectories = sorted(entry.name for entry in entries if entry.is_dir())
+        if not subdirectories:
+            return [("", [image_root])]
+        return [(name, [os.path.join(image_root, name)]) for name in subdirectories]
 
-    def _load_yolo_metadata(self, max_class_id: int = 0):
+    def _list_files(self, data_yaml: Dict[str, Any]) -> Tuple[List[str], List[str], List[Optional[str]]]:
+        """
+        Lists the images of all splits with their split and label file, with
+        one directory scan per image and label directory, and caches them.
+        """
+        if self._files is not None:
+            return self._files
+        splits = self._splits(data_yaml)
+        image_dirs = [directory for _, directories in splits for directory in directories]
+        scanned_images = scan_files(image_dirs, IMAGE_EXTENSIONS, self.read_workers)
+        scanned_labels = scan_files([_label_dir(directory) for directory in image_dirs], (".txt",), self.read_workers)
+
+        image_files, split_names, label_files = [], [], []
+        scanned = iter(zip(scanned_images, scanned_labels))
+        for name, directories in splits:
+            for _ in directories:
+                images, labels = next(scanned)
+                labels_by_stem = {_stem(path): path for path in labels}
+                image_files.extend(images)
+                split_names.extend([name] * len(images))
+                label_files.extend(labels_by_stem.get(_stem(path)) for path in images)
+        self._files = (image_files, split_names, label_files)
+        return self._files
+
+    def _relative_path(self, image_path: str) -> str:
+        return os.path.relpath(image_path, self.data)
+
+    def _load_yolo_metadata(self, data_yaml: Dict[str, Any], max_class_id: int = 0):
         """
         Loads the class names from the data.yaml file.
-        If not found, it will generate a default mapping.
+        If not found, it will generate a default mapping from the largest
+        class id in the label files.
         """
-        data_yaml_path = os.path.join(self.data, "data.yaml")
-        if os.path.exists(data_yaml_path):
-            with open(data_yaml_path, "r") as f:
-                data_yaml = yaml.safe_load(f)
-                if "names" in data_yaml:
-                    self.metadata.class_names = {
-                        i: name for i, name in enumerate(data_yaml["names"])
-                    }
-                    return
-
-        # If no class names are found, generate default ones
-        if not self.metadata.class_names:
-            num_classes = max_class_id + 1
-            self.metadata.class_names = {i: str(i) for i in range(num_classes)}
+        names = data_yaml.get("names")
+        if isinstance(names, dict):
+            self.metadata.class_names = {int(i): name for i, name in names.items()}
+        elif names:
+            self.metadata.class_names = {i: name for i, name in enumerate(names)}
+        elif not self.metadata.class_names:
+            # If no class names are found, generate default ones
+            self.metadata.class_names = {i: str(i) for i in range(max_class_id + 1)}
+
+    def prepare(self):
+        """
+        Scans the directories and parses every label file once, into flat
+        arrays of labels and boxes, and loads the class names.
+        """
+        if self._index is not None:
+            return
+        data_yaml = self._data_yaml()
+        image_files, split_names, label_files = self._list_files(data_yaml)
+
+        counts, labels, bboxes = [], [], []
+        for start in range(0, len(label_files), LABEL_READ_CHUNK):
+            for text in read_files(label_files[start : start + LABEL_READ_CHUNK], self.read_workers):
+                image_labels, image_bboxes = _parse_labels(text)
+                counts.append(len(image_labels))
+                labels.extend(image_labels)
+                bboxes.extend(image_bboxes)
+        offsets = pa.array(np.concatenate([[0], np.cumsum(counts, dtype=np.int64)]), type=pa.int32())
+        self._index = {
+            "image_files": pa.array(image_files, type=pa.string()),
+            "path": pa.array([self._relative_path(path) for path in image_files], type=pa.string()),
+            "split": pa.array(split_names, type=pa.string()),
+            "label_files": label_files,
+            "label": pa.ListArray.from_arrays(offsets, pa.array(labels, type=pa.int64())),
+            "bbox": pa.ListArray.from_arrays(offsets, pa.array(bboxes, type=pa.list_(pa.float32()))),
+        }
+        self._load_yolo_metadata(data_yaml, max(labels, default=0))
+
+    def fingerprint_items(self, hash_contents: bool = False):
+        """
+        Fingerprints every image by its image and label files.
+        """
+        image_files, _, _ = self._list_files(self._data_yaml())
+        return {
+            self._relative_path(image_path): item_fingerprint(
+                [image_path, os.path.join(_label_dir(os.path.dirname(image_path)), _stem(image_path) + ".txt")],
+                hash_contents,
+            )
+            for image_path in image_files
+        }
 
     def to_batches(
         self, batch_size: int = 1024
@@ -58,89 +217,58 @@ class YoloDataset(BaseDataset):
         """
         Yields batches of the dataset as Arrow RecordBatches.
         """
-        # The coco128 dataset has a subdirectory with the same name.
-        data_dir = os.path.join(self.data, "coco128")
-        if not os.path.exists(data_dir):
-            data_dir = self.data
-
-        image_dir = os.path.join(data_dir, "images", "train2017")
-        label_dir = os.path.join(data_dir, "labels", "train2017")
-
-        image_files = []
-        for file in sorted(os.listdir(image_dir)):
-            if file.endswith((".jpg", ".png", ".jpeg")):
-                image_files.append(os.path.join(image_dir, file))
-
-        label_files = []
-        for file in sorted(os.listdir(label_dir)):
-            if file.endswith(".txt"):
-                label_files.append(os.path.join(label_dir, file))
-
-        # First pass to determine the max_class_id
-        max_class_id = 0
-        for label_path in label_files:
-            with open(label_path, "r") as f:
-                for line in f:
-                    parts = line.strip().split()
-                    class_id = int(parts[0])
-                    if class_id > max_class_id:
-                        max_class_id = class_id
-        
-        self._load_yolo_metadata(max_class_id)
-
-        for i in range(0, len(image_files), batch_size):
-            batch_image_files = image_files[i : i + batch_size]
-
-            images_data = []
-            all_bboxes = []
-            all_labels = []
-            heights = []
-            widths = []
-            file_names = []
-
-            for image_path in batch_image_files:
-                with open(image_path, "rb") as f:
-                    img_bytes = f.read()
-                    images_data.append(img_bytes)
-                with Image.open(image_path) as img:
-                    width, height = img.size
-                    widths.append(width)
-                    heights.append(height)
-                    file_names.append(os.path.basename(image_path))
-
-                label_path = os.path.join(label_dir, os.path.basename(os.path.splitext(image_path)[0]) + ".txt")
-                if label_path not in label_files:
-                    all_bboxes.append([])
-                    all_labels.append([])
-                    continue
-
-                bboxes = []
-                labels = []
-                with open(label_path, "r") as f:
-                    for line in f:
-                        parts = line.strip().split()
-                        class_id = int(parts[0])
-                        x_center, y_center, width, height = map(float, parts[1:])
-
-                        bboxes.append(
-                            [
-                                round(x, 6)
-                                for x in [x_center, y_center, width, height]
-                            ]
-                        )
-                        labels.append(class_id)
-                all_bboxes.append(bboxes)
-                all_labels.append(labels)
+        self.prepare()
+        index = self._index
+        schema = self.schema
+
+        positions = np.arange(len(index["image_files"]))
+        if self.only_items is not None:
+            only_items = pa.array(sorted(self.only_items), type=pa.string())
+            positions = positions[pc.is_in(index["path"], value_set=only_items).to_numpy(zero_copy_only=False)]
+        positions = positions[self.start_row:]
+        start, stop = self.shard_range(len(positions))
+        positions = positions[start:stop]
+
+        position_batches = (positions[i : i + batch_size] for i in range(0, len(positions), batch_size))
+        for batch_positions, images_data in prefetch_files(
+            position_batches,
+            lambda batch: index["image_files"].take(batch).to_pylist(),
+            self.read_workers,
+            type=pa.large_binary(),
+            read=self._read_images,
+        ):
+            image_files = index["image_files"].take(batch_positions).to_pylist()
+            widths, heights = image_sizes(None if self.image_mode == "reference" else images_data, image_files)
 
             batch = pa.RecordBatch.from_arrays(
                 [
-                    pa.array(images_data, type=pa.binary()),
-                    pa.array(all_bboxes, type=pa.list_(pa.list_(pa.float32()))),
-                    pa.array(all_labels, type=pa.list_(pa.int64())),
+                    images_data,
+                    index["bbox"].take(batch_positions),
+                    index["label"].take(batch_positions),
                     pa.array(heights, type=pa.int64()),
                     pa.array(widths, type=pa.int64()),
-                    pa.array(file_names, type=pa.string()),
+                    pa.array([os.path.basename(path) for path in image_files], type=pa.string()),
+                    index["split"].take(batch_positions),
+                    index["path"].take(batch_positions),
                 ],
-                names=["image", "bbox", "label", "height", "width", "file_name"],
+                schema=schema,
             )
             yield batch
+
+    @property
+    def schema(self) -> pa.Schema:
+        """
+        Returns the schema of the dataset.
+        """
+        return pa.schema(
+            [
+                reference_field("image") if self.image_mode == "reference" else blob_field("image"),
+                pa.field("bbox", pa.list_(pa.list_(pa.float32()))),
+                pa.field("label", pa.list_(pa.int64())),
+                pa.field("height", pa.int64()),
+                pa.field("width", pa.int64()),
+                pa.field("file_name", pa.string()),
+                pa.field("split", pa.string()),
+                pa.field("path", pa.string()),
+            ]
+        )
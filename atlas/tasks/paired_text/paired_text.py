@@ -14,79 +14,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import json
-from typing import Generator
-
 import pyarrow as pa
 
-from atlas.tasks.data_model.base import BaseDataset
+from atlas.tasks.data_model.jsonl import JsonlDataset
+from atlas.utils.jsonl import JsonField
 
 
-class PairedTextDataset(BaseDataset):
+class PairedTextDataset(JsonlDataset):
     """
     A dataset that reads data from a JSONL file, where each line is a JSON object
     with "sentence1", "sentence2", and "label" fields.
     """
 
-    def to_batches(self, batch_size: int = 1024, **kwargs) -> Generator[pa.RecordBatch, None, None]:
-        """
-        Yields batches of the dataset as Arrow RecordBatches.
-        """
-        sentence1s, sentence2s, labels = [], [], []
-
-        def process_record(record):
-            sentence1s.append(record.get("sentence1", ""))
-            sentence2s.append(record.get("sentence2", ""))
-            labels.append(record.get("label", -1.0))
-
-        if isinstance(self.data, str):
-            with open(self.data, "r") as f:
-                for line in f:
-                    record = json.loads(line)
-                    process_record(record)
-                    if len(sentence1s) == batch_size:
-                        yield pa.RecordBatch.from_arrays(
-                            [
-                                pa.array(sentence1s, type=pa.string()),
-                                pa.array(sentence2s, type=pa.string()),
-                                pa.array(labels, type=pa.float32()),
-                            ],
-                            schema=self.schema,
-                        )
-                        sentence1s, sentence2s, labels = [], [], []
-        else:
-            for record in self.data:
-                process_record(record)
-                if len(sentence1s) == batch_size:
-                    yield pa.RecordBatch.from_arrays(
-                        [
-                            pa.array(sentence1s, type=pa.string()),
-                            pa.array(sentence2s, type=pa.string()),
-                            pa.array(labels, type=pa.float32()),
-                        ],
-                        schema=self.schema,
-                    )
-                    sentence1s, sentence2s, labels = [], [], []
-
-        if sentence1s:
-            yield pa.RecordBatch.from_arrays(
-                [
-                    pa.array(sentence1s, type=pa.string()),
-                    pa.array(sentence2s, type=pa.string()),
-                    pa.array(labels, type=pa.float32()),
-                ],
-                schema=self.schema,
-            )
-
-    @property
-    def schema(self) -> pa.Schema:
-        """
-        Returns the schema of the dataset.
-        """
-        return pa.schema(
-            [
-                pa.field("sentence1", pa.string()),
-                pa.field("sentence2", pa.string()),
-                pa.field("label", pa.float32()),
-            ]
-        )
+    fields = (
+        JsonField("sentence1", pa.string(), default=""),
+        JsonField("sentence2", pa.string(), default=""),
+        JsonField("label", pa.float32(), default=-1.0),
+    )
@@ -14,16 +14,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import io
-import json
 import os
 from typing import Generator
 
 import numpy as np
 import pyarrow as pa
-from PIL import Image, ImageDraw
+import pyarrow.compute as pc
 
 from atlas.tasks.data_model.base import BaseDataset
+from atlas.tasks.data_model.delta import item_fingerprint
+from atlas.utils.blob import blob_field, reference_field, reference_reader
+from atlas.utils.coco import SPILL_ROWS, CocoIndex
+from atlas.utils.image import fill_sizes
+from atlas.utils.io import DEFAULT_READ_WORKERS, prefetch_files
+from atlas.utils.masks import MASK_FORMATS, encode_images, instance_map_field, mask_field, mask_pool
 
 
 class CocoSegmentationDataset(BaseDataset):
@@ -31,8 +35,24 @@ class CocoSegmentationDataset(BaseDataset):
     A dataset that reads data from a COCO JSON file for segmentation tasks.
     """
 
+    supports_sharding = True
+    supports_seek = True
+    delta_key = "file_name"
+
     def __init__(self, data: str, **kwargs):
         super().__init__(data)
+        self._index = None
+        self.spill_dir = kwargs.get("spill_dir")
+        self.mask_format = kwargs.get("mask_format", "png")
+        if self.mask_format not in MASK_FORMATS:
+            raise ValueError(f"Unknown mask_format {self.mask_format!r}, expected one of {MASK_FORMATS}.")
+        self.instance_map = kwargs.get("instance_map", False)
+        if self.instance_map and self.mask_format != "png":
+            raise ValueError("Instance maps are stored as PNG, mask_format cannot be combined with instance_map.")
+        self.mask_workers = kwargs.get("mask_workers", 1)
+        self.read_workers = kwargs.get("read_workers", DEFAULT_READ_WORKERS)
+        self.image_mode = kwargs.get("image_mode", "bytes")
+        self._read_images = reference_reader(self.image_mode, self.read_workers, kwargs.get("checksum", False))
         self.image_root = kwargs.get("image_root")
         if self.image_root is None:
             self.image_root = self._infer_image_root()
@@ -50,99 +70,127 @@ class CocoSegmentationDataset(BaseDataset):
                 return image_dir
         return annotation_dir
 
+    def _load_annotations(self) -> CocoIndex:
+        """
+        Parses the annotation file once into an on-disk index and caches it,
+        so that all shards of the dataset share a single parsed copy.
+        """
+        if self._index is not None:
+            return self._index
+
+        self._index = CocoIndex(self.data, self.spill_dir)
+        if self._index.categories is not None:
+            self.metadata.class_names = self._index.categories
+        return self._index
+
+    def _image_path(self, file_name: str) -> str:
+        if self.image_root:
+            return os.path.join(self.image_root, file_name)
+        return file_name
+
+    def _positions(self, index: CocoIndex) -> np.ndarray:
+        """
+        Returns the positions in the index of the images read by this shard.
+        """
+        positions = np.arange(len(index))
+        if self.only_items is not None:
+            selected = pc.is_in(index.file_names, value_set=pa.array(list(self.only_items), pa.string()))
+            positions = positions[selected.to_numpy(zero_copy_only=False)]
+        positions = positions[self.start_row:]
+        start, stop = self.shard_range(len(positions))
+        return positions[start:stop]
+
+    def fingerprint_items(self, hash_contents: bool = False):
+        """
+        Fingerprints every image by its file and its annotations.
+        """
+        index = self._load_annotations()
+        fingerprints = {}
+        for start in range(0, len(index), SPILL_ROWS):
+            positions = np.arange(start, min(start + SPILL_ROWS, len(index)))
+            annotations = index.annotations(positions)
+            for i, image_info in enumerate(index.images(positions)):
+                fingerprints[image_info["file_name"]] = item_fingerprint(
+                    [self._image_path(image_info["file_name"])],
+                    hash_contents,
+                    [image_info, annotations[i]],
+                )
+        return fingerprints
+
+    def prepare(self):
+        self._load_annotations()
+
+    def shards(self, num_shards: int):
+        self._load_annotations()
+        return super().shards(num_shards)
+
     def to_batches(self, batch_size: int = 1024, **kwargs) -> Generator[pa.RecordBatch, None, None]:
         """
         Yields batches of the dataset as Arrow RecordBatches.
         """
-        with open(self.data, "r") as f:
-            coco_data = json.load(f)
-
-        images = {image["id"]: image for image in coco_data["images"]}
-        annotations_by_image = {}
-        for ann in coco_data["annotations"]:
-            annotations_by_image.setdefault(ann["image_id"], []).append(ann)
-        if "categories" in coco_data:
-            self.metadata.class_names = {cat["id"]: cat["name"] for cat in coco_data["categories"]}
-
-        image_ids = list(images.keys())
-
-        for i in range(0, len(image_ids), batch_size):
-            batch_image_ids = image_ids[i : i + batch_size]
-
-            images_data = []
-            all_bboxes = []
-            all_masks = []
-            all_labels = []
-            heights = []
-            widths = []
-            file_names = []
-
-            for image_id in batch_image_ids:
-                image_info = images[image_id]
-                image_path = (
-                    os.path.join(self.image_root, image_info["file_name"])
-                    if self.image_root
-                    else image_info["file_name"]
+        index = self._load_annotations()
+        positions = self._positions(index)
+        schema = self.schema
+        mask_type = schema.field("instance_map" if self.instance_map else "mask").type
+
+        # The mask processes are shared by all batches and stopped with the sink.
+        with mask_pool(self.mask_workers) as pool:
+            position_batches = (positions[i : i + batch_size] for i in range(0, len(positions), batch_size))
+            for batch_positions, images_data in prefetch_files(
+                position_batches,
+                lambda batch: [self._image_path(name) for name in index.file_names.take(batch).to_pylist()],
+                self.read_workers,
+                type=pa.large_binary(),
+                read=self._read_images,
+            ):
+                images = index.image_columns(batch_positions)
+                annotations = index.annotation_lists(batch_positions)
+                widths, heights = fill_sizes(
+                    images.column("width").combine_chunks(),
+                    images.column("height").combine_chunks(),
+                    None if self.image_mode == "reference" else images_data,
+                    [self._image_path(name) for name in images.column("file_name").to_pylist()],
                 )
-                with open(image_path, "rb") as f:
-                    images_data.append(f.read())
-
-                annotations = annotations_by_image.get(image_id, [])
-                bboxes = [ann["bbox"] for ann in annotations]
-                labels = [ann["category_id"] for ann in annotations]
-                masks = []
-                for ann in annotations:
-                    mask = np.zeros(
-                        (image_info["height"], image_info["width"]), dtype=np.uint8
-                    )
-                    if isinstance(ann["segmentation"], list):
-                        for seg in ann["segmentation"]:
-                            poly = np.array(seg).reshape((len(seg) // 2, 2))
-                            img = Image.new(
-                                "L", (image_info["width"], image_info["height"]), 0
-                            )
-                            ImageDraw.Draw(img).polygon(
-                                tuple(map(tuple, poly)), outline=1, fill=1
-                            )
-                            mask = np.maximum(mask, np.array(img))
-                    else:
-                        from pycocotools import mask as mask_utils
-                        rle = mask_utils.frPyObjects(
-                            ann["segmentation"],
-                            image_info["height"],
-                            image_info["width"],
+                all_masks = encode_images(
+                    [
+                        ([ann["segmentation"] for ann in image_annotations], height, width)
+                        for image_annotations, height, width in zip(
+                            index.annotations(batch_positions), heights.to_pylist(), widths.to_pylist()
                         )
-                        mask = np.maximum(mask, mask_utils.decode(rle))
-                    img = Image.fromarray(mask * 255)  # scale mask to 0-255
-                    buf = io.BytesIO()
-                    img.save(buf, format='PNG')
-                    masks.append(buf.getvalue())
-
-                all_bboxes.append(bboxes)
-                all_masks.append(masks)
-                all_labels.append(labels)
-                heights.append(image_info["height"])
-                widths.append(image_info["width"])
-                file_names.append(image_info["file_name"])
-
-            batch = pa.RecordBatch.from_arrays(
-                [
-                    pa.array(images_data, type=pa.binary()),
-                    pa.array(all_bboxes, type=pa.list_(pa.list_(pa.float32()))),
-                    pa.array(all_masks, type=pa.list_(pa.binary())),
-                    pa.array(all_labels, type=pa.list_(pa.int64())),
-                    pa.array(heights, type=pa.int64()),
-                    pa.array(widths, type=pa.int64()),
-                    pa.array(file_names, type=pa.string()),
-                ],
-                names=[
-                    "image",
-                    "bbox",
-                    "mask",
-                    "label",
-                    "height",
-                    "width",
-                    "file_name",
-                ],
-            )
-            yield batch
+                    ],
+                    self.mask_format,
+                    self.instance_map,
+                    self.mask_workers,
+                    pool,
+                )
+
+                batch = pa.RecordBatch.from_arrays(
+                    [
+                        images_data,
+                        annotations["bbox"],
+                        pa.array(all_masks, type=mask_type),
+                        annotations["category_id"],
+                        heights,
+                        widths,
+                        images.column("file_name").combine_chunks(),
+                    ],
+                    schema=schema,
+                )
+                yield batch
+
+    @property
+    def schema(self) -> pa.Schema:
+        """
+        Returns the schema of the dataset.
+        """
+        return pa.schema(
+            [
+                reference_field("image") if self.image_mode == "reference" else blob_field("image"),
+                pa.field("bbox", pa.list_(pa.list_(pa.float32()))),
+                instance_map_field("instance_map") if self.instance_map else mask_field("mask", self.mask_format),
+                pa.field("label", pa.list_(pa.int64())),
+                pa.field("height", pa.int64()),
+                pa.field("width", pa.int64()),
+                pa.field("file_name", pa.string()),
+            ]
+        )
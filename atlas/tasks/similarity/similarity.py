@@ -14,77 +14,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Generator, Dict, Any
-
 import pyarrow as pa
 
-from atlas.tasks.data_model.base import BaseDataset
-
+from atlas.tasks.data_model.jsonl import JsonlDataset
+from atlas.utils.jsonl import JsonField
 
-import json
 
-class SimilarityDataset(BaseDataset):
+class SimilarityDataset(JsonlDataset):
     """
     A dataset for sentence similarity tasks.
     """
 
-    def to_batches(self, batch_size: int = 1024, **kwargs) -> Generator[pa.RecordBatch, None, None]:
-        """
-        Yields batches of the dataset as Arrow RecordBatches.
-        """
-        sentence1_list, sentence2_list, similarity_score_list = [], [], []
-        
-        # If self.data is a path to a file, open it and read line by line
-        if isinstance(self.data, str):
-            with open(self.data, "r") as f:
-                for line in f:
-                    record = json.loads(line)
-                    sentence1_list.append(record["sentence1"])
-                    sentence2_list.append(record["sentence2"])
-                    similarity_score_list.append(record["similarity_score"])
-                    if len(sentence1_list) == batch_size:
-                        yield pa.RecordBatch.from_arrays(
-                            [
-                                pa.array(sentence1_list, type=pa.string()),
-                                pa.array(sentence2_list, type=pa.string()),
-                                pa.array(similarity_score_list, type=pa.float32()),
-                            ],
-                            schema=self.schema,
-                        )
-                        sentence1_list, sentence2_list, similarity_score_list = [], [], []
-        else: # self.data is a generator
-            for record in self.data:
-                sentence1_list.append(record["sentence1"])
-                sentence2_list.append(record["sentence2"])
-                similarity_score_list.append(record["similarity_score"])
-                if len(sentence1_list) == batch_size:
-                    yield pa.RecordBatch.from_arrays(
-                        [
-                            pa.array(sentence1_list, type=pa.string()),
-                            pa.array(sentence2_list, type=pa.string()),
-                            pa.array(similarity_score_list, type=pa.float32()),
-                        ],
-                        schema=self.schema,
-                    )
-                    sentence1_list, sentence2_list, similarity_score_list = [], [], []
-
-        if sentence1_list:
-            yield pa.RecordBatch.from_arrays(
-                [
-                    pa.array(sentence1_list, type=pa.string()),
-                    pa.array(sentence2_list, type=pa.string()),
-                    pa.array(similarity_score_list, type=pa.float32()),
-                ],
-                schema=self.schema,
-            )
-
-    @property
-    def schema(self) -> pa.Schema:
-        """
-        Returns the schema of the dataset.
-        """
-        return pa.schema([
-            pa.field("sentence1", pa.string()),
-            pa.field("sentence2", pa.string()),
-            pa.field("similarity_score", pa.float32()),
-        ])
+    fields = (
+        JsonField("sentence1", pa.string()),
+        JsonField("sentence2", pa.string()),
+        JsonField("similarity_score", pa.float32()),
+    )
@@ -14,40 +14,145 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Generator
+import itertools
+import re
+from typing import Any, Dict, Generator, Optional
 
-import pandas as pd
 import pyarrow as pa
 from pyarrow import csv
-import lance
 
 from atlas.tasks.data_model.base import BaseDataset
+from atlas.utils.batching import split_batches
+
+DEFAULT_CSV_BLOCK_BYTES = 16 * 1024 * 1024  # 16 MiB
+# Arrow reports a value that does not match the type of its column as e.g.
+# "In CSV column #2: Row #902: CSV conversion error to int64: invalid value 'x'".
+CONVERSION_ERROR = re.compile(r"In CSV column #(\d+): .*CSV conversion error to .*: invalid value '(.*)'", re.S)
+
+
+def _widen(type: pa.DataType, value: str) -> pa.DataType:
+    """
+    Returns a type that holds both the values of `type` and `value`.
+    """
+    if pa.types.is_integer(type):
+        try:
+            float(value)
+            return pa.float64()
+        except ValueError:
+            pass
+    return pa.string()
 
 
 class CsvDataset(BaseDataset):
     """
     A dataset that reads data from a CSV file.
+
+    The file is streamed with Arrow's multithreaded CSV reader, which parses
+    blocks of `block_size` bytes in parallel, so that a file of any size is
+    sunk in constant memory. Column types are inferred from the first
+    `infer_blocks` blocks unless they are given in `column_types`: a column
+    whose values stop matching its type is widened, to `double` or `string`,
+    and the blocks are read again. Files whose types change after these
+    blocks need `column_types` or more `infer_blocks`, and fail with a
+    `ValueError` that names the column otherwise. Dots in column names are
+    replaced with underscores.
+
+    Args:
+        data (str): The path to the CSV file.
+        block_size (int, optional): The size in bytes of the blocks parsed at
+            once. Defaults to 16 MiB.
+        column_types (Optional[Dict[str, Any]], optional): The Arrow types of
+            some or all columns, by their name in the file. Defaults to None.
+        infer_blocks (Optional[int], optional): The number of blocks the
+            column types are inferred from. None infers them from the whole
+            file, at the cost of reading it twice. Defaults to 1.
     """
 
-    def to_lance(
+    supports_seek = True
+
+    def __init__(
         self,
-        uri: str,
-        mode: str = "create",
-        batch_size: int = 1024,
+        data: str,
+        block_size: int = DEFAULT_CSV_BLOCK_BYTES,
+        column_types: Optional[Dict[str, Any]] = None,
+        infer_blocks: Optional[int] = 1,
         **kwargs,
-    ) -> None:
+    ):
+        super().__init__(data)
+        self.block_size = block_size
+        self.column_types = column_types or {}
+        self.infer_blocks = infer_blocks
+        self._schema = None
+
+    def prepare(self) -> None:
         """
-        Converts the dataset to Lance format and saves it to the given URI.
+        Reads the header and infers the column types from the first
+        `infer_blocks` blocks, widening them until all of their values convert.
         """
-        df = pd.read_csv(self.data)
-        df.columns = df.columns.str.replace('.', '_', regex=False)
-        lance.write_dataset(df, uri, mode=mode, **kwargs)
+        if self._schema is not None:
+            return
+        column_types = dict(self.column_types)
+        while True:
+            reader = csv.open_csv(
+                self.data,
+                read_options=csv.ReadOptions(block_size=self.block_size),
+                convert_options=csv.ConvertOptions(column_types=column_types),
+            )
+            inferred = reader.schema
+            try:
+                # The first block is read when the reader is opened.
+                for _ in itertools.islice(reader, 1, self.infer_blocks):
+                    pass
+                break
+            except pa.ArrowInvalid as error:
+                match = CONVERSION_ERROR.search(str(error))
+                field = inferred.field(int(match.group(1))) if match else None
+                if field is None or field.name in self.column_types:
+                    raise self._conversion_error(error, inferred) from error
+                column_types[field.name] = _widen(field.type, match.group(2))
+            finally:
+                reader.close()
+        self._schema = pa.schema(
+            [pa.field(field.name.replace(".", "_"), field.type) for field in inferred]
+        )
 
-    def to_batches(self, batch_size: int = 1024) -> Generator[pa.RecordBatch, None, None]:
+    def to_batches(self, batch_size: int = 1024, **kwargs) -> Generator[pa.RecordBatch, None, None]:
         """
         Yields batches of the dataset as Arrow RecordBatches.
         """
+        schema = self.schema
+        # The renamed columns replace the header, and their types are fixed so
+        # that every block is converted the same way.
+        read_options = csv.ReadOptions(
+            block_size=self.block_size,
+            use_threads=True,
+            column_names=schema.names,
+            skip_rows=1,
+            skip_rows_after_names=self.start_row,
+        )
+        convert_options = csv.ConvertOptions(column_types={field.name: field.type for field in schema})
+        with csv.open_csv(self.data, read_options=read_options, convert_options=convert_options) as reader:
+            try:
+                for batch in reader:
+                    yield from split_batches(batch, batch_size)
+            except pa.ArrowInvalid as error:
+                raise self._conversion_error(error, schema) from error
 
-        reader = pd.read_csv(self.data, chunksize=batch_size)
-        for chunk in reader:
-            yield pa.Table.from_pandas(chunk).to_batches()[0]
+    def _conversion_error(self, error: pa.ArrowInvalid, schema: pa.Schema) -> Exception:
+        match = CONVERSION_ERROR.search(str(error))
+        if match is None:
+            return error
+        field = schema.field(int(match.group(1)))
+        return ValueError(
+            f"Column {field.name!r} of {self.data} was read as {field.type}, but holds the value "
+            f"{match.group(2)!r}. Declare its type in `column_types`, or infer the types from more "
+            f"blocks with `infer_blocks`."
+        )
+
+    @property
+    def schema(self) -> pa.Schema:
+        """
+        Returns the schema of the dataset.
+        """
+        self.prepare()
+        return self._schema
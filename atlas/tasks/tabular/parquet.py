@@ -14,37 +14,94 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Generator
+from typing import Any, Generator, List, Optional, Union
 
-import lance
 import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
 import pyarrow.parquet as pq
 
 from atlas.tasks.data_model.base import BaseDataset
+from atlas.utils.batching import split_batches
 
 
 class ParquetDataset(BaseDataset):
     """
     A dataset that reads data from a Parquet file.
+
+    The file is streamed row group by row group, with several row groups
+    decoded in parallel. `columns` and `filter` are pushed down into the
+    Parquet reader: only the selected columns are decoded, and row groups
+    whose statistics rule out the filter are skipped. With `num_workers > 1`,
+    the row groups are split across the processes.
+
+    Args:
+        data (str): The path to the Parquet file.
+        columns (Optional[List[str]], optional): The columns to read.
+            Defaults to None, which reads all columns.
+        filter (Optional[Union[pc.Expression, List[Any]]], optional): The rows
+            to read, as an Arrow compute expression such as
+            `pc.field("year") >= 2020`, or in the disjunctive normal form of
+            `pyarrow.parquet.read_table`. Defaults to None.
     """
 
-    def to_lance(
+    supports_sharding = True
+
+    def __init__(
         self,
-        uri: str,
-        mode: str = "create",
-        batch_size: int = 1024,
+        data: str,
+        columns: Optional[List[str]] = None,
+        filter: Optional[Union[pc.Expression, List[Any]]] = None,
         **kwargs,
-    ) -> None:
+    ):
+        super().__init__(data)
+        self.columns = columns
+        if filter is not None and not isinstance(filter, pc.Expression):
+            filter = pq.filters_to_expression(filter)
+        self.filter = filter
+        self._dataset = None
+
+    def _parquet(self) -> ds.Dataset:
+        if self._dataset is None:
+            self._dataset = ds.dataset(self.data, format="parquet")
+        return self._dataset
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_dataset"] = None
+        return state
+
+    def _row_groups(self) -> List[ds.ParquetFileFragment]:
         """
-        Converts the dataset to Lance format and saves it to the given URI.
+        Returns the row groups that may hold rows matching the filter.
         """
-        table = pq.read_table(self.data)
-        lance.write_dataset(table, uri, mode=mode, **kwargs)
+        row_groups = []
+        for fragment in self._parquet().get_fragments(filter=self.filter):
+            row_groups.extend(fragment.split_by_row_group(self.filter))
+        return row_groups
 
-    def to_batches(self, batch_size: int = 1024) -> Generator[pa.RecordBatch, None, None]:
+    def to_batches(self, batch_size: int = 1024, **kwargs) -> Generator[pa.RecordBatch, None, None]:
         """
         Yields batches of the dataset as Arrow RecordBatches.
         """
-        parquet_file = pq.ParquetFile(self.data)
-        for batch in parquet_file.iter_batches(batch_size=batch_size):
-            yield batch
+        parquet = self._parquet()
+        row_groups = self._row_groups()
+        start, stop = self.shard_range(len(row_groups))
+        # A dataset of row groups, so that several of them are read ahead
+        # and decoded in parallel.
+        source = ds.FileSystemDataset(row_groups[start:stop], parquet.schema, parquet.format, parquet.filesystem)
+        batches = source.to_batches(
+            columns=self.schema.names, filter=self.filter, batch_size=batch_size, use_threads=True
+        )
+        for batch in batches:
+            yield from split_batches(batch, batch_size)
+
+    @property
+    def schema(self) -> pa.Schema:
+        """
+        Returns the schema of the dataset.
+        """
+        schema = self._parquet().schema
+        if self.columns is None:
+            return schema
+        return pa.schema([schema.field(name) for name in self.columns], metadata=schema.metadata)
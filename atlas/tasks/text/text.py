@@ -14,11 +14,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import itertools
+import os
 from typing import Generator
 
 import pyarrow as pa
 
 from atlas.tasks.data_model.base import BaseDataset
+from atlas.utils.io import iter_lines
 
 
 class TextDataset(BaseDataset):
@@ -26,25 +29,28 @@ class TextDataset(BaseDataset):
     A dataset that reads data from a text file, where each line is a record.
     """
 
+    supports_sharding = True
+    supports_seek = True
+
     def to_batches(self, batch_size: int = 1024, **kwargs) -> Generator[pa.RecordBatch, None, None]:
         """
         Yields batches of the dataset as Arrow RecordBatches.
         """
-        with open(self.data, "r") as f:
-            lines = []
-            for line in f:
-                lines.append(line.strip())
-                if len(lines) == batch_size:
-                    yield pa.RecordBatch.from_arrays(
-                        [pa.array(lines, type=pa.string())],
-                        names=["text"],
-                    )
-                    lines = []
-            if lines:
+        start, stop = self.shard_range(os.path.getsize(self.data))
+        lines = []
+        for line in itertools.islice(iter_lines(self.data, start, stop), self.start_row, None):
+            lines.append(line.strip())
+            if len(lines) == batch_size:
                 yield pa.RecordBatch.from_arrays(
                     [pa.array(lines, type=pa.string())],
                     names=["text"],
                 )
+                lines = []
+        if lines:
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(lines, type=pa.string())],
+                names=["text"],
+            )
 
     @property
     def schema(self) -> pa.Schema:
@@ -14,54 +14,47 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import json
-import os
 from typing import Generator
 
 import pyarrow as pa
 
-from atlas.tasks.data_model.base import BaseDataset
+from atlas.tasks.data_model.jsonl import JsonlDataset
+from atlas.utils.blob import reference_field, reference_reader
+from atlas.utils.io import DEFAULT_READ_WORKERS, prefetch_files
+from atlas.utils.jsonl import JsonField
 
 
-class VisionLanguageDataset(BaseDataset):
+class VisionLanguageDataset(JsonlDataset):
     """
     A dataset that reads data from a JSONL file, where each line is a JSON object
     with "image" (path) and "text" fields.
     """
 
+    fields = (
+        JsonField("image", pa.string()),
+        JsonField("text", pa.string(), default=""),
+    )
+
+    def __init__(self, data: str, **kwargs):
+        super().__init__(data)
+        self.read_workers = kwargs.get("read_workers", DEFAULT_READ_WORKERS)
+        self.image_mode = kwargs.get("image_mode", "bytes")
+        self._read_images = reference_reader(
+            self.image_mode, self.read_workers, kwargs.get("checksum", False), missing_ok=True
+        )
+
     def to_batches(self, batch_size: int = 1024, **kwargs) -> Generator[pa.RecordBatch, None, None]:
         """
         Yields batches of the dataset as Arrow RecordBatches.
         """
-        with open(self.data, "r") as f:
-            images, texts = [], []
-            for line in f:
-                record = json.loads(line)
-                image_path = record.get("image")
-                if image_path and os.path.exists(image_path):
-                    with open(image_path, "rb") as img_f:
-                        images.append(img_f.read())
-                else:
-                    images.append(None)
-                texts.append(record.get("text", ""))
-
-                if len(images) == batch_size:
-                    yield pa.RecordBatch.from_arrays(
-                        [
-                            pa.array(images, type=pa.binary()),
-                            pa.array(texts, type=pa.string()),
-                        ],
-                        names=["image", "text"],
-                    )
-                    images, texts = [], []
-            if images:
-                yield pa.RecordBatch.from_arrays(
-                    [
-                        pa.array(images, type=pa.binary()),
-                        pa.array(texts, type=pa.string()),
-                    ],
-                    names=["image", "text"],
-                )
+        for batch, images in prefetch_files(
+            self.iter_records(batch_size),
+            lambda batch: [path or None for path in batch.column("image").to_pylist()],
+            self.read_workers,
+            missing_ok=True,
+            read=self._read_images,
+        ):
+            yield pa.RecordBatch.from_arrays([images, batch.column("text")], schema=self.schema)
 
     @property
     def schema(self) -> pa.Schema:
@@ -70,7 +63,7 @@ class VisionLanguageDataset(BaseDataset):
         """
         return pa.schema(
             [
-                pa.field("image", pa.binary()),
+                reference_field("image") if self.image_mode == "reference" else pa.field("image", pa.binary()),
                 pa.field("text", pa.string()),
             ]
         )
@@ -0,0 +1,154 @@
+# Atlas: A data-centric AI framework
+#
+# Copyright (c) 2024-present, Atlas Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Generator, Iterable, List
+
+import pyarrow as pa
+
+DEFAULT_TARGET_BATCH_BYTES = 64 * 1024 * 1024  # 64 MiB
+
+# Guesses for the size of variable-width values, used before any data is read.
+ESTIMATED_BINARY_BYTES = 256 * 1024  # e.g. an encoded image
+ESTIMATED_STRING_BYTES = 256
+ESTIMATED_LIST_LENGTH = 8
+
+
+def estimate_row_bytes(schema: pa.Schema) -> int:
+    """
+    Estimates the size of a row of `schema` in bytes without reading any data.
+
+    Fixed-width values count their width; strings, binaries and lists count a
+    typical size. The estimate only sizes the batches read from a source, the
+    batches written to Lance are sized from the actual data by `rebatch`.
+    """
+
+    def estimate(data_type: pa.DataType) -> int:
+        if pa.types.is_binary(data_type) or pa.types.is_large_binary(data_type):
+            return ESTIMATED_BINARY_BYTES
+        if pa.types.is_string(data_type) or pa.types.is_large_string(data_type):
+            return ESTIMATED_STRING_BYTES
+        if pa.types.is_list(data_type) or pa.types.is_large_list(data_type):
+            return ESTIMATED_LIST_LENGTH * estimate(data_type.value_type)
+        if pa.types.is_fixed_size_list(data_type):
+            return data_type.list_size * estimate(data_type.value_type)
+        if pa.types.is_struct(data_type):
+            return sum(estimate(data_type.field(i).type) for i in range(data_type.num_fields))
+        try:
+            return max(1, data_type.bit_width // 8)
+        except ValueError:
+            return 8
+
+    return max(1, sum(estimate(field.type) for field in schema))
+
+
+class RowSizeEstimator:
+    """
+    Keeps a running average of the size of a row in bytes.
+
+    The estimate is updated with every batch that goes through it, so it adapts
+    to sources whose rows vary a lot in size (e.g. images of different
+    resolutions) instead of trusting a single probe row.
+    """
+
+    def __init__(self):
+        self.total_bytes = 0
+        self.total_rows = 0
+
+    def update(self, batch: pa.RecordBatch) -> None:
+        self.total_bytes += batch.nbytes
+        self.total_rows += batch.num_rows
+
+    @property
+    def row_size(self) -> float:
+        if self.total_rows == 0:
+            return 0.0
+        return self.total_bytes / self.total_rows
+
+    def rows_for(self, target_bytes: int) -> int:
+        """
+        Returns the number of rows that fit into `target_bytes`, given the
+        current estimate. Always at least 1.
+        """
+        row_size = self.row_size
+        if row_size <= 0:
+            return 1
+        return max(1, int(target_bytes // row_size))
+
+
+def split_batches(batch: pa.RecordBatch, batch_size: int) -> Generator[pa.RecordBatch, None, None]:
+    """
+    Splits a batch into zero-copy slices of at most `batch_size` rows.
+    """
+    for offset in range(0, batch.num_rows, batch_size):
+        yield batch.slice(offset, batch_size)
+
+
+def _concat(batches: List[pa.RecordBatch]) -> pa.RecordBatch:
+    if len(batches) == 1:
+        return batches[0]
+    table = pa.Table.from_batches(batches).combine_chunks()
+    return table.to_batches(max_chunksize=table.num_rows)[0]
+
+
+def rebatch(
+    batches: Iterable[pa.RecordBatch],
+    target_bytes: int = DEFAULT_TARGET_BATCH_BYTES,
+) -> Generator[pa.RecordBatch, None, None]:
+    """
+    Merges or splits a stream of RecordBatches so that each output batch is
+    close to `target_bytes` in size.
+
+    Small batches are buffered and concatenated, large batches are sliced
+    (zero-copy). The number of rows per output batch is derived from a running
+    average of the row size over everything seen so far.
+
+    Args:
+        batches (Iterable[pa.RecordBatch]): The input batches. They must all
+            share the same schema.
+        target_bytes (int, optional): The target size of an output batch in
+            bytes. Defaults to 64 MiB.
+
+    Yields:
+        pa.RecordBatch: The re-batched data.
+    """
+    estimator = RowSizeEstimator()
+    pending: List[pa.RecordBatch] = []
+    pending_rows = 0
+
+    for batch in batches:
+        if batch.num_rows == 0:
+            continue
+        estimator.update(batch)
+        pending.append(batch)
+        pending_rows += batch.num_rows
+
+        rows_per_batch = estimator.rows_for(target_bytes)
+        while pending_rows >= rows_per_batch:
+            out, needed = [], rows_per_batch
+            while needed > 0:
+                head = pending[0]
+                if head.num_rows <= needed:
+                    out.append(pending.pop(0))
+                    needed -= head.num_rows
+                else:
+                    out.append(head.slice(0, needed))
+                    pending[0] = head.slice(needed)
+                    needed = 0
+            pending_rows -= rows_per_batch
+            yield _concat(out)
+
+    if pending:
+        yield _concat(pending)
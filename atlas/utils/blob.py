@@ -0,0 +1,270 @@
+# Atlas: A data-centric AI framework
+#
+# Copyright (c) 2024-present, Atlas Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Helpers for binary columns that are not read with the rest of a row.
+
+Blob-encoded columns are stored apart from the other columns and are only
+read when asked for: scans and takes return a small descriptor per value
+instead of the bytes, which are fetched with `read_blobs`, `take` or `scan`.
+
+Reference columns do not store the bytes at all, only the path, size and
+optionally the checksum of the file they come from. Their bytes are read
+from the files with `resolve_references` or `take`.
+"""
+
+import functools
+import hashlib
+import os
+from typing import Callable, List, Optional, Sequence
+
+import lance
+import pyarrow as pa
+
+from atlas.utils.io import DEFAULT_READ_WORKERS, file_checksums, file_sizes, read_binary_array
+
+BLOB_METADATA = {"lance-encoding:blob": "true"}
+REFERENCE_METADATA = {"atlas.encoding": "reference"}
+IMAGE_MODES = ("bytes", "reference")
+REFERENCE_TYPE = pa.struct(
+    [
+        pa.field("path", pa.string()),
+        pa.field("size", pa.int64()),
+        pa.field("checksum", pa.string()),
+    ]
+)
+
+
+def blob_field(name: str) -> pa.Field:
+    """
+    Returns a `large_binary` field that Lance stores with blob encoding.
+    """
+    return pa.field(name, pa.large_binary(), metadata=BLOB_METADATA)
+
+
+def is_blob_field(field: pa.Field) -> bool:
+    """
+    Returns True if the field is a Lance blob column.
+    """
+    if field.metadata and field.metadata.get(b"lance-encoding:blob") == b"true":
+        return True
+    return getattr(field.type, "extension_name", "").startswith("lance.blob")
+
+
+def reference_field(name: str) -> pa.Field:
+    """
+    Returns a field holding references to files instead of their bytes.
+    """
+    return pa.field(name, REFERENCE_TYPE, metadata=REFERENCE_METADATA)
+
+
+def is_reference_field(field: pa.Field) -> bool:
+    """
+    Returns True if the field holds references to files.
+    """
+    return bool(field.metadata) and field.metadata.get(b"atlas.encoding") == b"reference"
+
+
+def build_references(
+    paths: Sequence[Optional[str]],
+    max_workers: int = DEFAULT_READ_WORKERS,
+    missing_ok: bool = False,
+    checksum: bool = False,
+) -> pa.StructArray:
+    """
+    References files by their absolute path and size, without reading them.
+
+    Args:
+        paths (Sequence[Optional[str]]): The paths of the files. None yields a
+            null.
+        max_workers (int, optional): The number of files stat-ed (and hashed)
+            concurrently. Defaults to 16.
+        missing_ok (bool, optional): Return a null for files that do not
+            exist instead of raising. Defaults to False.
+        checksum (bool, optional): Also record the SHA-1 of every file, which
+            reads them. Defaults to False.
+
+    Returns:
+        pa.StructArray: The references.
+    """
+    sizes = file_sizes(paths, max_workers, missing_ok)
+    valid = [size >= 0 for size in sizes]
+    paths = [os.path.abspath(path) if ok else None for path, ok in zip(paths, valid)]
+    checksums = file_checksums(paths, max_workers) if checksum else [None] * len(paths)
+    return pa.StructArray.from_arrays(
+        [
+            pa.array(paths, type=pa.string()),
+            pa.array([size if ok else None for size, ok in zip(sizes, valid)], type=pa.int64()),
+            pa.array(checksums, type=pa.string()),
+        ],
+        fields=list(REFERENCE_TYPE),
+        mask=pa.array([not ok for ok in valid], type=pa.bool_()),
+    )
+
+
+def reference_reader(
+    image_mode: str,
+    max_workers: int = DEFAULT_READ_WORKERS,
+    checksum: bool = False,
+    missing_ok: bool = False,
+) -> Optional[Callable[[Sequence[Optional[str]]], pa.Array]]:
+    """
+    Returns the function image loaders use to turn paths into a column:
+    None to read the files ("bytes" mode), or `build_references`
+    ("reference" mode).
+    """
+    if image_mode not in IMAGE_MODES:
+        raise ValueError(f"Unknown image_mode {image_mode!r}, expected one of {IMAGE_MODES}.")
+    if image_mode == "bytes":
+        return None
+    return functools.partial(build_references, max_workers=max_workers, missing_ok=missing_ok, checksum=checksum)
+
+
+def resolve_references(
+    references: pa.Array,
+    max_workers: int = DEFAULT_READ_WORKERS,
+    verify: bool = True,
+) -> pa.Array:
+    """
+    Reads the bytes of referenced files, concurrently.
+
+    Args:
+        references (pa.Array): References built by `build_references`.
+        max_workers (int, optional): The number of files read concurrently.
+            Defaults to 16.
+        verify (bool, optional): Check that every file still has its
+            referenced size and, if recorded, checksum. Defaults to True.
+
+    Returns:
+        pa.Array: The bytes, as a `large_binary` array.
+    """
+    if isinstance(references, pa.ChunkedArray):
+        references = references.combine_chunks()
+    records = references.to_pylist()
+    paths = [record["path"] if record else None for record in records]
+    values = read_binary_array(paths, max_workers=max_workers, type=pa.large_binary())
+    if verify:
+        for record, value in zip(records, values):
+            if record is None:
+                continue
+            data = value.as_buffer()
+            if data.size != record["size"] or (
+                record["checksum"] is not None and hashlib.sha1(data).hexdigest() != record["checksum"]
+            ):
+                raise ValueError(f"{record['path']} changed since it was referenced.")
+    return values
+
+
+def blob_columns(dataset: lance.LanceDataset) -> List[str]:
+    """
+    Returns the names of the blob columns of a Lance dataset.
+    """
+    return [field.name for field in dataset.schema if is_blob_field(field)]
+
+
+def read_blobs(
+    dataset: lance.LanceDataset,
+    column: str,
+    indices: Optional[Sequence[int]] = None,
+    ids: Optional[Sequence[int]] = None,
+) -> pa.Array:
+    """
+    Reads the bytes of a blob column for the given rows.
+
+    Args:
+        dataset (lance.LanceDataset): The Lance dataset.
+        column (str): The name of the blob column.
+        indices (Optional[Sequence[int]], optional): The row offsets.
+        ids (Optional[Sequence[int]], optional): The row ids, e.g. the
+            `_rowid` column of a scan. Used instead of `indices`.
+
+    Returns:
+        pa.Array: The bytes, as a `large_binary` array in the given row order.
+    """
+    if ids is not None:
+        blob_files = dataset.take_blobs(column, ids=list(ids))
+    else:
+        blob_files = dataset.take_blobs(column, indices=list(indices))
+    values = []
+    for blob_file in blob_files:
+        if blob_file is None:
+            values.append(None)
+            continue
+        with blob_file:
+            values.append(blob_file.read())
+    return pa.array(values, type=pa.large_binary())
+
+
+def take(dataset: lance.LanceDataset, indices: Sequence[int], columns: Optional[List[str]] = None) -> pa.Table:
+    """
+    Takes rows from a Lance dataset, with the bytes of blob columns instead of
+    their descriptors and the bytes of referenced files instead of the
+    references.
+
+    Args:
+        dataset (lance.LanceDataset): The Lance dataset.
+        indices (Sequence[int]): The row offsets.
+        columns (Optional[List[str]], optional): The columns to read.
+            Defaults to all columns.
+
+    Returns:
+        pa.Table: The rows.
+    """
+    indices = list(indices)
+    table = dataset.take(indices, columns=columns)
+    for column in blob_columns(dataset):
+        if column in table.column_names:
+            position = table.schema.get_field_index(column)
+            table = table.set_column(position, column, read_blobs(dataset, column, indices=indices))
+    for field in dataset.schema:
+        if is_reference_field(field) and field.name in table.column_names:
+            position = table.schema.get_field_index(field.name)
+            table = table.set_column(position, field.name, resolve_references(table.column(field.name)))
+    return table
+
+
+def scan(dataset: lance.LanceDataset, batch_size: int = 1024) -> pa.RecordBatchReader:
+    """
+    Scans a Lance dataset with the bytes of blob columns instead of their
+    descriptors, e.g. to copy it into another dataset or table, which cannot
+    be written from descriptors.
+
+    Args:
+        dataset (lance.LanceDataset): The Lance dataset.
+        batch_size (int, optional): The number of rows per batch. Defaults to
+            1024.
+
+    Returns:
+        pa.RecordBatchReader: The rows, with blob columns as `blob_field`s.
+    """
+    columns = blob_columns(dataset)
+    schema = dataset.schema
+    for column in columns:
+        schema = schema.set(schema.get_field_index(column), blob_field(column))
+
+    def batches():
+        for batch in dataset.scanner(with_row_id=bool(columns), batch_size=batch_size).to_batches():
+            if not columns:
+                yield batch
+                continue
+            ids = batch.column("_rowid").to_pylist()
+            batch = batch.drop_columns(["_rowid"])
+            for column in columns:
+                position = batch.schema.get_field_index(column)
+                batch = batch.set_column(position, schema.field(column), read_blobs(dataset, column, ids=ids))
+            yield batch
+
+    return pa.RecordBatchReader.from_batches(schema, batches())
@@ -0,0 +1,246 @@
+# Atlas: A data-centric AI framework
+#
+# Copyright (c) 2024-present, Atlas Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+An on-disk index of COCO annotation files.
+
+The annotation file is parsed incrementally and its images, annotations and
+captions are spilled to Arrow IPC files, with the annotations and captions
+sorted by image id. The files are memory-mapped when they are read, so that
+sinking a multi-gigabyte annotation file only holds the rows of the batch
+being built in memory.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import weakref
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from atlas.utils.io import iter_json_members
+
+SPILL_ROWS = 64 * 1024
+
+_SCHEMAS = {
+    "images": pa.schema(
+        [
+            pa.field("id", pa.int64()),
+            pa.field("file_name", pa.string()),
+            pa.field("height", pa.int64()),
+            pa.field("width", pa.int64()),
+            pa.field("json", pa.string()),
+        ]
+    ),
+    "annotations": pa.schema(
+        [
+            pa.field("image_id", pa.int64()),
+            pa.field("category_id", pa.int64()),
+            pa.field("bbox", pa.list_(pa.float32())),
+            pa.field("keypoints", pa.list_(pa.float32())),
+            pa.field("json", pa.string()),
+        ]
+    ),
+    "captions": pa.schema([pa.field("image_id", pa.int64()), pa.field("caption", pa.string())]),
+}
+
+
+class _SpillWriter:
+    """
+    Buffers rows and writes them to an Arrow IPC file every `SPILL_ROWS` rows.
+    """
+
+    def __init__(self, path: str, schema: pa.Schema):
+        self.schema = schema
+        self.writer = pa.ipc.new_file(path, schema)
+        self.columns = [[] for _ in schema]
+
+    def append(self, *values):
+        for column, value in zip(self.columns, values):
+            column.append(value)
+        if len(self.columns[0]) >= SPILL_ROWS:
+            self.flush()
+
+    def flush(self):
+        if self.columns[0]:
+            arrays = [pa.array(column, type=field.type) for column, field in zip(self.columns, self.schema)]
+            self.writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+            self.columns = [[] for _ in self.schema]
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+def _read_table(path: str) -> pa.Table:
+    return pa.ipc.open_file(pa.memory_map(path)).read_all()
+
+
+class CocoIndex:
+    """
+    An index of a COCO annotation file, spilled to a temporary directory.
+
+    Images keep the order of the annotation file. The annotations and
+    captions of every image keep their order too, and are found through the
+    ranges of the image in the files sorted by image id.
+
+    The index can be pickled to worker processes, which read the files of
+    the original index; the directory is removed when the original index is
+    garbage collected.
+
+    Args:
+        path (str): The path to the COCO annotation file.
+        spill_dir (Optional[str], optional): The directory in which the
+            temporary directory is created. Defaults to the system temporary
+            directory.
+    """
+
+    def __init__(self, path: str, spill_dir: Optional[str] = None):
+        self.directory = tempfile.mkdtemp(prefix="atlas-coco-", dir=spill_dir)
+        self._cleanup = weakref.finalize(self, shutil.rmtree, self.directory, True)
+        self._tables = {}
+        self.categories = None
+
+        writers = {name: _SpillWriter(self._path(name, "unsorted"), schema) for name, schema in _SCHEMAS.items()}
+        try:
+            for key, value, text in iter_json_members(path):
+                if key == "images":
+                    writers["images"].append(
+                        value["id"], value.get("file_name", ""), value.get("height", 0), value.get("width", 0), text
+                    )
+                elif key == "annotations":
+                    writers["annotations"].append(
+                        value["image_id"], value.get("category_id"), value.get("bbox"), value.get("keypoints"), text
+                    )
+                elif key == "captions":
+                    writers["captions"].append(value["image_id"], value["caption"])
+                elif key == "categories":
+                    self.categories = self.categories or {}
+                    self.categories[value["id"]] = value["name"]
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+        os.replace(self._path("images", "unsorted"), self._path("images"))
+        image_ids = self._table("images").column("id").to_numpy()
+        self._ranges = {name: self._group(name, image_ids) for name in ("annotations", "captions")}
+
+    def _path(self, name: str, suffix: str = "sorted") -> str:
+        return os.path.join(self.directory, f"{name}-{suffix}.arrow")
+
+    def _table(self, name: str) -> pa.Table:
+        if name not in self._tables:
+            self._tables[name] = _read_table(self._path(name))
+        return self._tables[name]
+
+    def _group(self, name: str, image_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sorts the rows of a spilled file by image id, keeping their order
+        within an image, and returns the range of rows of every image.
+        """
+        unsorted = _read_table(self._path(name, "unsorted"))
+        order = pc.sort_indices(unsorted, sort_keys=[("image_id", "ascending")])
+        with pa.ipc.new_file(self._path(name), unsorted.schema) as writer:
+            for start in range(0, len(order), SPILL_ROWS):
+                writer.write_table(unsorted.take(order[start : start + SPILL_ROWS]))
+        sorted_ids = unsorted.column("image_id").take(order).to_numpy()
+        del unsorted
+        os.remove(self._path(name, "unsorted"))
+        return np.searchsorted(sorted_ids, image_ids, "left"), np.searchsorted(sorted_ids, image_ids, "right")
+
+    def _gather(self, name: str, positions: np.ndarray) -> Tuple[pa.Table, np.ndarray]:
+        """
+        Returns the rows of the images at `positions`, and the offsets of the
+        rows of every image.
+        """
+        starts, stops = self._ranges[name]
+        starts, counts = starts[positions], stops[positions] - starts[positions]
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        indices = np.arange(offsets[-1], dtype=np.int64) + np.repeat(starts - offsets[:-1], counts)
+        return self._table(name).take(indices), offsets
+
+    def __len__(self) -> int:
+        return self._table("images").num_rows
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_tables"] = {}
+        state["_cleanup"] = None
+        return state
+
+    @property
+    def file_names(self) -> pa.ChunkedArray:
+        """
+        Returns the file names of all images.
+        """
+        return self._table("images").column("file_name")
+
+    def image_columns(self, positions: np.ndarray) -> pa.Table:
+        """
+        Returns the `file_name`, `height` and `width` of the images at
+        `positions`.
+        """
+        return self._table("images").select(["file_name", "height", "width"]).take(positions)
+
+    def images(self, positions: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Returns the images at `positions`.
+        """
+        texts = self._table("images").column("json").take(positions).to_pylist()
+        return [json.loads(text) for text in texts]
+
+    def annotations(self, positions: np.ndarray) -> List[List[Dict[str, Any]]]:
+        """
+        Returns the annotations of the images at `positions`.
+        """
+        rows, offsets = self._gather("annotations", positions)
+        annotations = [json.loads(text) for text in rows.column("json").to_pylist()]
+        return [annotations[start:stop] for start, stop in zip(offsets[:-1], offsets[1:])]
+
+    def annotation_lists(self, positions: np.ndarray) -> Dict[str, pa.ListArray]:
+        """
+        Returns the `category_id`, `bbox` and `keypoints` of the annotations
+        of the images at `positions`, as list arrays with one list per image.
+
+        The lists are built from the offsets of the images into the sorted
+        annotations, without converting any annotation to Python objects.
+        """
+        rows, offsets = self._gather("annotations", positions)
+        offsets = pa.array(offsets, type=pa.int32())
+        return {
+            name: pa.ListArray.from_arrays(offsets, rows.column(name).combine_chunks())
+            for name in ("category_id", "bbox", "keypoints")
+        }
+
+    def caption_lists(self, positions: np.ndarray) -> pa.ListArray:
+        """
+        Returns the captions of the images at `positions`, as a list array
+        with one list per image.
+        """
+        rows, offsets = self._gather("captions", positions)
+        return pa.ListArray.from_arrays(pa.array(offsets, type=pa.int32()), rows.column("caption").combine_chunks())
+
+    def captions(self, positions: np.ndarray) -> List[List[str]]:
+        """
+        Returns the captions of the images at `positions`.
+        """
+        rows, offsets = self._gather("captions", positions)
+        captions = rows.column("caption").to_pylist()
+        return [captions[start:stop] for start, stop in zip(offsets[:-1], offsets[1:])]
@@ -0,0 +1,181 @@
+# Atlas: A data-centric AI framework
+#
+# Copyright (c) 2024-present, Atlas Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Reads the dimensions of images from their headers, without decoding them.
+
+JPEG, PNG, WebP and GIF headers are parsed directly; other formats fall back
+to PIL, which also only reads the header but costs far more per image.
+"""
+
+import struct
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pyarrow as pa
+from PIL import Image
+
+HEADER_BYTES = 64 * 1024
+
+# JPEG start-of-frame markers, which hold the dimensions. 0xC4 (DHT),
+# 0xC8 (JPG) and 0xCC (DAC) share the range but are not frames.
+_JPEG_SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# Markers without a length field.
+_JPEG_STANDALONE = frozenset(range(0xD0, 0xDA)) | {0x01}
+
+
+def _jpeg_size(data: memoryview) -> Optional[Tuple[int, int]]:
+    position = 2
+    size = len(data)
+    while position + 4 <= size:
+        if data[position] != 0xFF:
+            return None
+        marker = data[position + 1]
+        if marker == 0xFF:  # fill byte
+            position += 1
+            continue
+        if marker in _JPEG_STANDALONE:
+            position += 2
+            continue
+        if marker in _JPEG_SOF:
+            if position + 9 > size:
+                return None
+            height, width = struct.unpack_from(">HH", data, position + 5)
+            return width, height
+        (length,) = struct.unpack_from(">H", data, position + 2)
+        position += 2 + length
+    return None
+
+
+def _webp_size(data: memoryview) -> Optional[Tuple[int, int]]:
+    chunk = bytes(data[12:16])
+    if chunk == b"VP8 " and len(data) >= 30:
+        width, height = struct.unpack_from("<HH", data, 26)
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(data) >= 25:
+        (bits,) = struct.unpack_from("<I", data, 21)
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(data) >= 30:
+        width = int.from_bytes(data[24:27], "little") + 1
+        height = int.from_bytes(data[27:30], "little") + 1
+        return width, height
+    return None
+
+
+def probe_size(data: Union[bytes, memoryview, pa.Buffer]) -> Optional[Tuple[int, int]]:
+    """
+    Parses the width and height of a JPEG, PNG, WebP or GIF image from its
+    first bytes.
+
+    Args:
+        data (Union[bytes, memoryview, pa.Buffer]): The image, or at least its
+            header.
+
+    Returns:
+        Optional[Tuple[int, int]]: The width and height, or None if the format
+            is not recognized or the header is incomplete.
+    """
+    data = memoryview(data)
+    if len(data) < 24:
+        return None
+    head = bytes(data[:12])
+    if head.startswith(b"\xff\xd8"):
+        return _jpeg_size(data)
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        width, height = struct.unpack_from(">II", data, 16)
+        return width, height
+    if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+        return _webp_size(data)
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        width, height = struct.unpack_from("<HH", data, 6)
+        return width, height
+    return None
+
+
+def _file_size(path: str) -> Tuple[int, int]:
+    with open(path, "rb") as f:
+        size = probe_size(f.read(HEADER_BYTES))
+    if size is not None:
+        return size
+    with Image.open(path) as img:
+        return img.size
+
+
+def _image_size(value: Optional[pa.Scalar], path: Optional[str]) -> Tuple[int, int]:
+    if value is not None and value.is_valid:
+        # Parse the bytes in place, without copying them.
+        buffer = value.as_buffer()
+        size = probe_size(buffer)
+        if size is not None:
+            return size
+        with Image.open(pa.BufferReader(buffer)) as img:
+            return img.size
+    return _file_size(path)
+
+
+def image_sizes(
+    images: Optional[pa.Array] = None, paths: Optional[Sequence[str]] = None
+) -> Tuple[List[int], List[int]]:
+    """
+    Returns the widths and heights of images, from the bytes already read or
+    from the headers of their files.
+
+    Args:
+        images (Optional[pa.Array], optional): The encoded images, as a binary
+            array. Null values are read from `paths`.
+        paths (Optional[Sequence[str]], optional): The paths of the images,
+            used when `images` is not given.
+
+    Returns:
+        Tuple[List[int], List[int]]: The widths and the heights.
+    """
+    count = len(images) if images is not None else len(paths)
+    sizes = [
+        _image_size(images[i] if images is not None else None, paths[i] if paths is not None else None)
+        for i in range(count)
+    ]
+    return [size[0] for size in sizes], [size[1] for size in sizes]
+
+
+def fill_sizes(
+    widths: pa.Array,
+    heights: pa.Array,
+    images: Optional[pa.Array],
+    paths: Sequence[str],
+) -> Tuple[pa.Array, pa.Array]:
+    """
+    Fills in the widths and heights that are missing (null or 0), such as
+    those of COCO images without `width` and `height`, by probing the images.
+    Images that cannot be identified keep a size of 0.
+
+    Args:
+        widths (pa.Array): The known widths.
+        heights (pa.Array): The known heights.
+        images (Optional[pa.Array]): The encoded images, or None to read the
+            headers of the files.
+        paths (Sequence[str]): The paths of the images.
+
+    Returns:
+        Tuple[pa.Array, pa.Array]: The widths and heights, as int64 arrays.
+    """
+    widths = widths.fill_null(0).to_numpy(zero_copy_only=False).astype(np.int64)
+    heights = heights.fill_null(0).to_numpy(zero_copy_only=False).astype(np.int64)
+    for i in ((widths == 0) | (heights == 0)).nonzero()[0]:
+        try:
+            widths[i], heights[i] = _image_size(images[i] if images is not None else None, paths[i])
+        except OSError:
+            pass  # Not an image that can be identified, the size stays unknown.
+    return pa.array(widths, type=pa.int64()), pa.array(heights, type=pa.int64())
@@ -0,0 +1,418 @@
+# Atlas: A data-centric AI framework
+#
+# Copyright (c) 2024-present, Atlas Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import functools
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Generator, Iterable, List, Optional, Sequence, TextIO, Tuple, TypeVar
+
+import numpy as np
+import pyarrow as pa
+
+T = TypeVar("T")
+
+DEFAULT_READ_WORKERS = 16
+CHECKSUM_CHUNK_BYTES = 8 * 1024 * 1024
+JSON_CHUNK_CHARS = 1024 * 1024
+
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# The characters that may continue a number, e.g. "1." of "1.5".
+_JSON_NUMBER_TAIL = re.compile(r"[0-9.eE+\-]*")
+
+
+def iter_lines(
+    path: str, start: int = 0, stop: Optional[int] = None
+) -> Generator[str, None, None]:
+    """
+    Yields the lines of a text file whose first byte lies in `[start, stop)`.
+
+    Splitting a file into consecutive byte ranges and reading each range with
+    this function yields every line exactly once, which makes it possible to
+    read a single large file in parallel without an index.
+
+    Args:
+        path (str): The path to the file.
+        start (int, optional): The byte offset to start at. Defaults to 0.
+        stop (Optional[int], optional): The byte offset to stop at. Defaults
+            to None, which reads until the end of the file.
+
+    Yields:
+        str: The decoded lines, including their trailing newline.
+    """
+    with open(path, "rb") as f:
+        if start > 0:
+            # Skip the line that started in the previous range, unless the
+            # previous range ended exactly on a line boundary.
+            f.seek(start - 1)
+            f.readline()
+        while stop is None or f.tell() < stop:
+            line = f.readline()
+            if not line:
+                break
+            yield line.decode("utf-8")
+
+
+class _JsonReader:
+    """
+    Decodes JSON values one at a time from a text file read in chunks.
+    """
+
+    def __init__(self, f: TextIO, chunk_chars: int):
+        self.f = f
+        self.chunk_chars = chunk_chars
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        # Read at least as much as is buffered, so that a value spanning many
+        # chunks is decoded a logarithmic number of times.
+        chunk = self.f.read(max(self.chunk_chars, len(self.buffer) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            self.pos = _JSON_WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                raise ValueError(f"Unexpected end of JSON in {self.f.name}.")
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if char not in chars:
+            raise ValueError(f"Expected one of {chars!r} in {self.f.name}, found {char!r}.")
+        self.pos += 1
+        return char
+
+    def value(self) -> Tuple[Any, str]:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number may continue in the next chunk while it is only
+            # followed by characters that could be part of it.
+            if (
+                type(value) in (int, float)
+                and not self.eof
+                and _JSON_NUMBER_TAIL.match(self.buffer, end).end() == len(self.buffer)
+                and self._fill()
+            ):
+                continue
+            text = self.buffer[self.pos : end]
+            self.pos = end
+            return value, text
+
+
+def iter_json_members(
+    path: str, chunk_chars: int = JSON_CHUNK_CHARS
+) -> Generator[Tuple[str, Any, str], None, None]:
+    """
+    Incrementally parses a JSON file holding a single object, such as a COCO
+    annotation file, without loading it into memory.
+
+    Array members are yielded one element at a time, the other members are
+    yielded whole, so that only one element is held in memory at once.
+
+    Args:
+        path (str): The path to the JSON file.
+        chunk_chars (int, optional): The number of characters read at once.
+            Defaults to 1 Mi.
+
+    Yields:
+        Tuple[str, Any, str]: The key of the member, the decoded element or
+            value, and its JSON text.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        reader = _JsonReader(f, chunk_chars)
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+        while True:
+            key, _ = reader.value()
+            reader.expect(":")
+            if reader.peek() != "[":
+                yield (key, *reader.value())
+            else:
+                reader.expect("[")
+                if reader.peek() == "]":
+                    reader.expect("]")
+                else:
+                    while True:
+                        yield (key, *reader.value())
+                        if reader.expect(",]") == "]":
+                            break
+            if reader.expect(",}") == "}":
+                return
+
+
+@functools.lru_cache(maxsize=None)
+def _executor(max_workers: int) -> ThreadPoolExecutor:
+    # One pool per parallelism level, shared by all loaders in the process.
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="atlas-read")
+
+
+def _read(path: Optional[str], missing_ok: bool) -> Optional[bytes]:
+    if path is None:
+        return None
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        if missing_ok:
+            return None
+        raise
+
+
+def read_files(
+    paths: Sequence[Optional[str]],
+    max_workers: int = DEFAULT_READ_WORKERS,
+    missing_ok: bool = False,
+) -> List[Optional[bytes]]:
+    """
+    Reads whole files concurrently and returns their contents in order.
+
+    Args:
+        paths (Sequence[Optional[str]]): The paths of the files. None yields
+            None.
+        max_workers (int, optional): The number of files read concurrently.
+            Defaults to 16.
+        missing_ok (bool, optional): Return None for files that do not exist
+            instead of raising. Defaults to False.
+
+    Returns:
+        List[Optional[bytes]]: The contents of the files.
+    """
+    if max_workers <= 1 or len(paths) <= 1:
+        return [_read(path, missing_ok) for path in paths]
+    return list(_executor(max_workers).map(functools.partial(_read, missing_ok=missing_ok), paths))
+
+
+def _scan(directory: str, extensions: Tuple[str, ...]) -> List[str]:
+    try:
+        with os.scandir(directory) as entries:
+            paths = [entry.path for entry in entries if entry.name.lower().endswith(extensions) and entry.is_file()]
+    except FileNotFoundError:
+        return []
+    return sorted(paths)
+
+
+def scan_files(
+    directories: Sequence[str],
+    extensions: Tuple[str, ...],
+    max_workers: int = DEFAULT_READ_WORKERS,
+) -> List[List[str]]:
+    """
+    Lists the files with the given extensions in several directories
+    concurrently, with a single `os.scandir` per directory.
+
+    Args:
+        directories (Sequence[str]): The directories. Directories that do not
+            exist are empty.
+        extensions (Tuple[str, ...]): The lower-case extensions of the files,
+            e.g. (".jpg", ".png").
+        max_workers (int, optional): The number of directories scanned
+            concurrently. Defaults to 16.
+
+    Returns:
+        List[List[str]]: The sorted paths of the files in every directory.
+    """
+    scan = functools.partial(_scan, extensions=extensions)
+    if max_workers <= 1 or len(directories) <= 1:
+        return [scan(directory) for directory in directories]
+    return list(_executor(max_workers).map(scan, directories))
+
+
+def _stat_size(path: Optional[str], missing_ok: bool) -> int:
+    if path is None:
+        return -1
+    try:
+        return os.stat(path).st_size
+    except FileNotFoundError:
+        if missing_ok:
+            return -1
+        raise
+
+
+def file_sizes(
+    paths: Sequence[Optional[str]],
+    max_workers: int = DEFAULT_READ_WORKERS,
+    missing_ok: bool = False,
+) -> List[int]:
+    """
+    Returns the sizes of files, stat-ing them concurrently. None paths, and
+    missing files with `missing_ok`, have a size of -1.
+    """
+    stat = functools.partial(_stat_size, missing_ok=missing_ok)
+    if max_workers <= 1 or len(paths) <= 1:
+        return [stat(path) for path in paths]
+    return list(_executor(max_workers).map(stat, paths))
+
+
+def _checksum(path: Optional[str]) -> Optional[str]:
+    if path is None:
+        return None
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHECKSUM_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_checksums(paths: Sequence[Optional[str]], max_workers: int = DEFAULT_READ_WORKERS) -> List[Optional[str]]:
+    """
+    Returns the SHA-1 hex digests of files, hashing them concurrently.
+    """
+    if max_workers <= 1 or len(paths) <= 1:
+        return [_checksum(path) for path in paths]
+    return list(_executor(max_workers).map(_checksum, paths))
+
+
+def _read_into(path: str, target: memoryview) -> None:
+    with open(path, "rb", buffering=0) as f:
+        view = target
+        while len(view):
+            read = f.readinto(view)
+            if not read:
+                raise IOError(f"{path} was truncated while it was being read.")
+            view = view[read:]
+
+
+def read_binary_array(
+    paths: Sequence[Optional[str]],
+    max_workers: int = DEFAULT_READ_WORKERS,
+    missing_ok: bool = False,
+    type: pa.DataType = pa.binary(),
+) -> pa.Array:
+    """
+    Reads whole files into an Arrow binary array without intermediate copies.
+
+    The files are sized first, then read concurrently straight into a single
+    Arrow buffer at their offsets, so that the contents are copied exactly
+    once and no Python `bytes` objects are created.
+
+    Args:
+        paths (Sequence[Optional[str]]): The paths of the files. None yields
+            a null.
+        max_workers (int, optional): The number of files read concurrently.
+            Defaults to 16.
+        missing_ok (bool, optional): Return a null for files that do not
+            exist instead of raising. Defaults to False.
+        type (pa.DataType, optional): `pa.binary()` or `pa.large_binary()`.
+            Defaults to `pa.binary()`.
+
+    Returns:
+        pa.Array: The contents of the files.
+    """
+    parallel = max_workers > 1 and len(paths) > 1
+    sizes = file_sizes(paths, max_workers, missing_ok)
+
+    valid = np.array([size >= 0 for size in sizes], dtype=bool)
+    offsets = np.zeros(len(paths) + 1, dtype=np.int64)
+    np.cumsum(np.maximum(sizes, 0), out=offsets[1:])
+    total = int(offsets[-1])
+    if pa.types.is_binary(type):
+        if total > np.iinfo(np.int32).max:
+            raise ValueError(
+                f"The files of a batch add up to {total} bytes, more than a binary column can hold. "
+                "Use a smaller batch size."
+            )
+        offsets = offsets.astype(np.int32)
+
+    data = pa.allocate_buffer(total)
+    view = memoryview(data)
+    reads = [
+        (path, view[offsets[i] : offsets[i + 1]]) for i, path in enumerate(paths) if valid[i] and sizes[i] > 0
+    ]
+    if parallel:
+        # Consume the results to re-raise any error.
+        list(_executor(max_workers).map(lambda read: _read_into(*read), reads))
+    else:
+        for read in reads:
+            _read_into(*read)
+
+    null_count = int(len(paths) - valid.sum())
+    validity = pa.py_buffer(np.packbits(valid, bitorder="little")) if null_count else None
+    return pa.Array.from_buffers(type, len(paths), [validity, pa.py_buffer(offsets), data], null_count=null_count)
+
+
+def prefetch_files(
+    batches: Iterable[T],
+    paths: Callable[[T], Sequence[Optional[str]]],
+    max_workers: int = DEFAULT_READ_WORKERS,
+    missing_ok: bool = False,
+    type: pa.DataType = pa.binary(),
+    read: Optional[Callable[[Sequence[Optional[str]]], pa.Array]] = None,
+) -> Generator[Tuple[T, pa.Array], None, None]:
+    """
+    Reads the files of consecutive batches into Arrow binary arrays, one
+    batch ahead.
+
+    The next batch is read in the background while the current one is
+    yielded, so that reading overlaps with whatever the caller does with it.
+
+    Args:
+        batches (Iterable[T]): The batches, e.g. lists of records.
+        paths (Callable[[T], Sequence[Optional[str]]]): Returns the paths of
+            the files of a batch.
+        max_workers (int, optional): The number of files read concurrently.
+            Defaults to 16.
+        missing_ok (bool, optional): Return a null for files that do not
+            exist instead of raising. Defaults to False.
+        type (pa.DataType, optional): The type of the arrays. Defaults to
+            `pa.binary()`.
+        read (Optional[Callable[[Sequence[Optional[str]]], pa.Array]], optional):
+            Turns the paths of a batch into an array, in place of reading the
+            files, e.g. to reference them. Defaults to `read_binary_array`.
+
+    Yields:
+        Tuple[T, pa.Array]: Each batch with the contents of its files, in
+            order.
+    """
+    if read is None:
+        read = functools.partial(read_binary_array, max_workers=max_workers, missing_ok=missing_ok, type=type)
+    if max_workers <= 1:
+        for batch in batches:
+            yield batch, read(paths(batch))
+        return
+
+    # A dedicated thread waits on the reads of the next batch; the reads
+    # themselves run on the shared pool.
+    ahead = ThreadPoolExecutor(max_workers=1, thread_name_prefix="atlas-read-ahead")
+    try:
+        pending = None
+        for batch in batches:
+            future = ahead.submit(read, paths(batch))
+            if pending is not None:
+                yield pending[0], pending[1].result()
+            pending = (batch, future)
+        if pending is not None:
+            yield pending[0], pending[1].result()
+    finally:
+        ahead.shutdown(wait=True, cancel_futures=True)
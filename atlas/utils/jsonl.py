@@ -0,0 +1,224 @@
+# Atlas: A data-centric AI framework
+#
+# Copyright (c) 2024-present, Atlas Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Block-wise JSONL reading with `pyarrow.json`.
+
+A file is split into blocks of whole lines, and every block is parsed by
+Arrow against an explicit schema, so that no line is decoded into Python
+objects. Loaders declare their columns as `JsonField`s, which map one or more
+source fields to a column and fill in defaults with Arrow compute.
+"""
+
+import mmap
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Generator, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.json as pj
+
+DEFAULT_BLOCK_BYTES = 16 * 1024 * 1024  # 16 MiB
+COUNT_CHUNK_BYTES = 8 * 1024 * 1024
+# The bytes `pyarrow.json` skips around records: blank lines hold nothing else.
+WHITESPACE = np.frombuffer(b"\t\n\r ", dtype=np.uint8)
+
+
+@dataclass(frozen=True)
+class JsonField:
+    """
+    A column read from JSON records.
+
+    Attributes:
+        name (str): The name of the column.
+        type (pa.DataType): The type of the column.
+        sources (Tuple[str, ...]): The fields the column is read from, in
+            order of preference: a source is used when the previous ones are
+            null or empty. Nested fields are separated by dots. Defaults to
+            the name of the column.
+        default (Any): The value of the column when all sources are null.
+    """
+
+    name: str
+    type: pa.DataType
+    sources: Tuple[str, ...] = ()
+    default: Any = None
+
+    @property
+    def paths(self) -> Tuple[str, ...]:
+        return self.sources or (self.name,)
+
+
+def source_schema(fields: Sequence[JsonField]) -> pa.Schema:
+    """
+    Returns the schema of the JSON records the fields are read from.
+    """
+    tree: Dict[str, Any] = {}
+    for field in fields:
+        for path in field.paths:
+            node = tree
+            *parents, leaf = path.split(".")
+            for parent in parents:
+                node = node.setdefault(parent, {})
+            node[leaf] = field.type
+
+    def build(node: Dict[str, Any]) -> List[pa.Field]:
+        return [
+            pa.field(name, pa.struct(build(child)) if isinstance(child, dict) else child)
+            for name, child in node.items()
+        ]
+
+    return pa.schema(build(tree))
+
+
+def _column(table: pa.Table, path: str) -> pa.Array:
+    names = path.split(".")
+    column = table.column(names[0]).combine_chunks()
+    for name in names[1:]:
+        column = pc.struct_field(column, name)
+    return column
+
+
+def _is_empty(values: pa.Array) -> pa.Array:
+    empty = pc.is_null(values)
+    if pa.types.is_string(values.type) or pa.types.is_large_string(values.type):
+        empty = pc.or_(empty, pc.equal(pc.utf8_length(values), 0))
+    elif pa.types.is_list(values.type) or pa.types.is_large_list(values.type):
+        empty = pc.or_(empty, pc.equal(pc.list_value_length(values), 0))
+    return pc.fill_null(empty, True)
+
+
+def select_fields(table: pa.Table, fields: Sequence[JsonField]) -> pa.RecordBatch:
+    """
+    Maps a table of JSON records, read with `source_schema(fields)`, to the
+    columns declared by the fields.
+    """
+    arrays = []
+    for field in fields:
+        paths = field.paths
+        values = _column(table, paths[0])
+        for path in paths[1:]:
+            values = pc.if_else(_is_empty(values), _column(table, path), values)
+        if field.default is not None:
+            values = values.fill_null(pa.scalar(field.default, type=field.type))
+        arrays.append(values)
+    schema = pa.schema([pa.field(field.name, field.type) for field in fields])
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _line_start(data: mmap.mmap, offset: int) -> int:
+    """
+    Returns the offset of the first line that starts at or after `offset`.
+    """
+    if offset <= 0:
+        return 0
+    newline = data.find(b"\n", offset - 1)
+    return len(data) if newline < 0 else newline + 1
+
+
+def _skip_records(data: mmap.mmap, start: int, end: int, count: int) -> int:
+    """
+    Returns the offset after the first `count` records of `[start, end)`.
+
+    Blank lines are not records, since `pyarrow.json` skips them, so that
+    the n-th record read is the n-th record skipped.
+    """
+    filled_line = False  # Whether the line running into the chunk has a record.
+    while count > 0 and start < end:
+        chunk_end = min(start + COUNT_CHUNK_BYTES, end)
+        chunk = np.frombuffer(data[start:chunk_end], dtype=np.uint8)
+        newlines = np.flatnonzero(chunk == ord("\n"))
+        # filled[i] is the number of non-whitespace bytes before chunk[i].
+        filled = np.concatenate([[0], np.cumsum(~np.isin(chunk, WHITESPACE), dtype=np.int64)])
+        line_starts = np.concatenate([[0], newlines[:-1] + 1])
+        records = filled[newlines + 1] > filled[line_starts]
+        if len(records):
+            records[0] |= filled_line
+            totals = np.cumsum(records)
+            if totals[-1] >= count:
+                return start + int(newlines[np.searchsorted(totals, count)]) + 1
+            count -= int(totals[-1])
+            filled_line = False
+        tail = int(newlines[-1]) + 1 if len(newlines) else 0
+        filled_line = filled_line or bool(filled[-1] > filled[tail])
+        start = chunk_end
+    return min(start, end)
+
+
+def read_jsonl(
+    path: str,
+    schema: pa.Schema,
+    start: int = 0,
+    stop: Optional[int] = None,
+    skip_rows: int = 0,
+    block_bytes: int = DEFAULT_BLOCK_BYTES,
+) -> Generator[pa.Table, None, None]:
+    """
+    Reads the lines of a JSONL file whose first byte lies in `[start, stop)`,
+    block by block, with `pyarrow.json`.
+
+    Args:
+        path (str): The path to the JSONL file.
+        schema (pa.Schema): The schema of the records. Other fields are
+            ignored and missing fields are null.
+        start (int, optional): The byte offset to start at. Defaults to 0.
+        stop (Optional[int], optional): The byte offset to stop at. Defaults
+            to None, which reads until the end of the file.
+        skip_rows (int, optional): The number of records to skip from the
+            start. Blank lines are not counted. Defaults to 0.
+        block_bytes (int, optional): The size of the blocks parsed at once.
+            Blocks end on a line boundary, so that a block holds at least one
+            line. Defaults to 16 MiB.
+
+    Yields:
+        pa.Table: The records of every block.
+    """
+    if os.path.getsize(path) == 0:
+        return
+    parse_options = pj.ParseOptions(explicit_schema=schema, unexpected_field_behavior="ignore")
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        end = _line_start(data, len(data) if stop is None else stop)
+        position = _skip_records(data, _line_start(data, start), end, skip_rows)
+        while position < end:
+            block_end = min(position + block_bytes, end)
+            if block_end < end:
+                newline = data.rfind(b"\n", position, block_end)
+                if newline < 0:  # A line longer than a block.
+                    newline = data.find(b"\n", block_end, end)
+                block_end = end if newline < 0 else newline + 1
+            block = data[position:block_end]
+            read_options = pj.ReadOptions(block_size=len(block) + 1)
+            yield pj.read_json(pa.BufferReader(block), read_options=read_options, parse_options=parse_options)
+            position = block_end
+
+
+def iter_records(
+    records: Iterable[Dict[str, Any]], schema: pa.Schema, batch_size: int
+) -> Generator[pa.Table, None, None]:
+    """
+    Converts an iterable of records, such as a Hugging Face dataset, to
+    tables of `batch_size` records with the given schema.
+    """
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == batch_size:
+            yield pa.Table.from_pylist(batch, schema=schema)
+            batch = []
+    if batch:
+        yield pa.Table.from_pylist(batch, schema=schema)
@@ -0,0 +1,289 @@
+# Atlas: A data-centric AI framework
+#
+# Copyright (c) 2024-present, Atlas Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Encoding and decoding of instance segmentation masks.
+
+Masks are stored as a `list<large_binary>` column with one value per
+instance, in one of three formats recorded in the field metadata:
+
+- "png": a PNG image of the mask, scaled to 0-255.
+- "rle": the counts of the COCO compressed run-length encoding. The size of
+  the mask is the `height` and `width` of the row.
+- "bitpacked": the mask in row-major order, packed 8 pixels per byte.
+
+"rle" stores polygons and RLE annotations without rasterizing them, which
+makes it the smallest and fastest format to write.
+
+Alternatively, all instances of an image are stored together as an instance
+map: a 16-bit PNG whose pixels hold the index of the instance covering them,
+starting at 1, and 0 for the background.
+"""
+
+import contextlib
+import functools
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import lance
+import numpy as np
+import pyarrow as pa
+from PIL import Image
+
+MASK_FORMAT_KEY = "atlas.mask_format"
+MASK_FORMATS = ("png", "rle", "bitpacked")
+INSTANCE_MAP_FORMAT = "instance_map"
+MAX_INSTANCES = np.iinfo(np.uint16).max
+
+
+def mask_field(name: str, mask_format: str = "png") -> pa.Field:
+    """
+    Returns a mask field that records its format in its metadata.
+    """
+    if mask_format not in MASK_FORMATS:
+        raise ValueError(f"Unknown mask_format {mask_format!r}, expected one of {MASK_FORMATS}.")
+    return pa.field(name, pa.list_(pa.large_binary()), metadata={MASK_FORMAT_KEY: mask_format})
+
+
+def instance_map_field(name: str) -> pa.Field:
+    """
+    Returns an instance map field, holding one 16-bit PNG per image.
+    """
+    return pa.field(name, pa.large_binary(), metadata={MASK_FORMAT_KEY: INSTANCE_MAP_FORMAT})
+
+
+def get_mask_format(field: pa.Field) -> str:
+    """
+    Returns the format of a mask field. Fields without a recorded format
+    hold PNG masks.
+    """
+    if field.metadata and MASK_FORMAT_KEY.encode() in field.metadata:
+        return field.metadata[MASK_FORMAT_KEY.encode()].decode()
+    return "png"
+
+
+def annotation_rle(segmentation: Any, height: int, width: int) -> Dict[str, Any]:
+    """
+    Converts a COCO segmentation (polygons, uncompressed or compressed RLE)
+    to compressed RLE, without rasterizing it.
+    """
+    from pycocotools import mask as mask_utils
+
+    if isinstance(segmentation, list):
+        return mask_utils.merge(mask_utils.frPyObjects(segmentation, height, width))
+    if isinstance(segmentation["counts"], list):
+        return mask_utils.frPyObjects(segmentation, height, width)
+    counts = segmentation["counts"]
+    return {"size": segmentation["size"], "counts": counts.encode() if isinstance(counts, str) else counts}
+
+
+def rasterize(segmentations: Sequence[Any], height: int, width: int) -> np.ndarray:
+    """
+    Rasterizes the COCO segmentations of the instances of an image together.
+
+    Args:
+        segmentations (Sequence[Any]): The `segmentation` of every instance.
+        height (int): The height of the image.
+        width (int): The width of the image.
+
+    Returns:
+        np.ndarray: A `uint8` array of shape (instances, height, width).
+    """
+    if len(segmentations) == 0:
+        return np.zeros((0, height, width), dtype=np.uint8)
+    from pycocotools import mask as mask_utils
+
+    rles = [annotation_rle(segmentation, height, width) for segmentation in segmentations]
+    return np.ascontiguousarray(mask_utils.decode(rles).transpose(2, 0, 1))
+
+
+def to_instance_map(masks: np.ndarray) -> np.ndarray:
+    """
+    Merges the masks of the instances of an image into an instance map.
+    Where instances overlap, the later one wins.
+    """
+    if len(masks) > MAX_INSTANCES:
+        raise ValueError(f"An instance map holds at most {MAX_INSTANCES} instances, got {len(masks)}.")
+    if len(masks) == 0:
+        return np.zeros(masks.shape[1:], dtype=np.uint16)
+    ids = np.arange(1, len(masks) + 1, dtype=np.uint16)[:, None, None]
+    return (masks.astype(np.uint16) * ids).max(axis=0)
+
+
+def _png(array: np.ndarray) -> bytes:
+    buf = io.BytesIO()
+    Image.fromarray(array).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def encode_masks(segmentations: Sequence[Any], height: int, width: int, mask_format: str = "png") -> List[bytes]:
+    """
+    Encodes the COCO segmentations of the instances of an image.
+
+    Args:
+        segmentations (Sequence[Any]): The `segmentation` of every instance.
+        height (int): The height of the image.
+        width (int): The width of the image.
+        mask_format (str, optional): "png", "rle" or "bitpacked". Defaults
+            to "png".
+
+    Returns:
+        List[bytes]: The encoded mask of every instance.
+    """
+    if mask_format == "rle":
+        return [annotation_rle(segmentation, height, width)["counts"] for segmentation in segmentations]
+    masks = rasterize(segmentations, height, width)
+    if mask_format == "bitpacked":
+        return [np.packbits(mask.reshape(-1)).tobytes() for mask in masks]
+    return [_png(mask * 255) for mask in masks]  # scale mask to 0-255
+
+
+def encode_instance_map(segmentations: Sequence[Any], height: int, width: int) -> bytes:
+    """
+    Encodes the COCO segmentations of the instances of an image as a 16-bit
+    PNG instance map.
+    """
+    return _png(to_instance_map(rasterize(segmentations, height, width)))
+
+
+def _encode_image(item: Tuple[Sequence[Any], int, int], mask_format: str, instance_map: bool):
+    if instance_map:
+        return encode_instance_map(*item)
+    return encode_masks(*item, mask_format)
+
+
+@contextlib.contextmanager
+def mask_pool(max_workers: int) -> Iterator[Optional[ProcessPoolExecutor]]:
+    """
+    Opens a process pool for `encode_images`, shared by the batches of a sink
+    and shut down when it ends, or None with `max_workers <= 1`.
+    """
+    if max_workers <= 1:
+        yield None
+        return
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        yield pool
+
+
+def encode_images(
+    items: Sequence[Tuple[Sequence[Any], int, int]],
+    mask_format: str = "png",
+    instance_map: bool = False,
+    max_workers: int = 1,
+    pool: Optional[ProcessPoolExecutor] = None,
+) -> List[Any]:
+    """
+    Encodes the masks of a batch of images, spreading the images across a
+    process pool.
+
+    Args:
+        items (Sequence[Tuple[Sequence[Any], int, int]]): The segmentations,
+            height and width of every image.
+        mask_format (str, optional): The format of the masks, see
+            `encode_masks`. Defaults to "png".
+        instance_map (bool, optional): Encode an instance map per image
+            instead of a mask per instance. Defaults to False.
+        max_workers (int, optional): The number of processes. With 1, the
+            masks are encoded in the calling thread. Defaults to 1.
+        pool (Optional[ProcessPoolExecutor], optional): A pool opened with
+            `mask_pool`. Defaults to None, which opens one for this call.
+
+    Returns:
+        List[Any]: The encoded masks (a list of bytes) or instance map (bytes)
+            of every image.
+    """
+    encode = functools.partial(_encode_image, mask_format=mask_format, instance_map=instance_map)
+    if max_workers <= 1 or len(items) <= 1:
+        return [encode(item) for item in items]
+    chunksize = max(1, len(items) // (4 * max_workers))
+    if pool is None:
+        with mask_pool(max_workers) as pool:
+            return list(pool.map(encode, items, chunksize=chunksize))
+    return list(pool.map(encode, items, chunksize=chunksize))
+
+
+def decode_masks(masks: Sequence[bytes], height: int, width: int, mask_format: str = "png") -> np.ndarray:
+    """
+    Decodes the masks of the instances of an image.
+
+    Args:
+        masks (Sequence[bytes]): The encoded masks.
+        height (int): The height of the image.
+        width (int): The width of the image.
+        mask_format (str, optional): The format of the masks. Defaults to
+            "png".
+
+    Returns:
+        np.ndarray: A `uint8` array of shape (instances, height, width) with
+            1 inside the masks and 0 outside.
+    """
+    if len(masks) == 0:
+        return np.zeros((0, height, width), dtype=np.uint8)
+    if mask_format == "rle":
+        from pycocotools import mask as mask_utils
+
+        rles = [{"size": [height, width], "counts": counts} for counts in masks]
+        return np.ascontiguousarray(mask_utils.decode(rles).transpose(2, 0, 1))
+    if mask_format == "bitpacked":
+        return np.stack(
+            [
+                np.unpackbits(np.frombuffer(mask, dtype=np.uint8), count=height * width).reshape(height, width)
+                for mask in masks
+            ]
+        )
+    return np.stack([(np.array(Image.open(io.BytesIO(mask)).convert("L")) > 0).astype(np.uint8) for mask in masks])
+
+
+def decode_instance_map(data: bytes) -> np.ndarray:
+    """
+    Decodes an instance map into a `uint16` array of shape (height, width).
+    """
+    return np.array(Image.open(io.BytesIO(data))).astype(np.uint16)
+
+
+def read_masks(
+    dataset: lance.LanceDataset, indices: Sequence[int], column: Optional[str] = None
+) -> List[np.ndarray]:
+    """
+    Reads and decodes the masks of the given rows of a segmentation dataset.
+
+    Args:
+        dataset (lance.LanceDataset): The Lance dataset.
+        indices (Sequence[int]): The row offsets.
+        column (Optional[str], optional): The mask column. Defaults to
+            "mask", or "instance_map" for datasets written with instance
+            maps, which are split into one mask per label.
+
+    Returns:
+        List[np.ndarray]: The masks of every row, as returned by
+            `decode_masks`.
+    """
+    if column is None:
+        column = "mask" if "mask" in dataset.schema.names else "instance_map"
+    mask_format = get_mask_format(dataset.schema.field(column))
+    if mask_format == INSTANCE_MAP_FORMAT:
+        table = dataset.take(list(indices), columns=[column, "label"]).to_pydict()
+        return [
+            (decode_instance_map(data)[None] == np.arange(1, len(labels) + 1)[:, None, None]).astype(np.uint8)
+            for data, labels in zip(table[column], table["label"])
+        ]
+    table = dataset.take(list(indices), columns=[column, "height", "width"]).to_pydict()
+    return [
+        decode_masks(masks, height, width, mask_format)
+        for masks, height, width in zip(table[column], table["height"], table["width"])
+    ]
@@ -0,0 +1,105 @@
+# Atlas: A data-centric AI framework
+#
+# Copyright (c) 2024-present, Atlas Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import queue
+import threading
+from typing import Any, Callable, Generator, Iterable, List, Sequence
+
+DEFAULT_PREFETCH_DEPTH = 4
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _produce(
+    producer: Callable[[], Iterable[Any]],
+    out: "queue.Queue",
+    stop: threading.Event,
+) -> None:
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        iterator = producer()
+        try:
+            for item in iterator:
+                if not put(item):
+                    return
+        finally:
+            if hasattr(iterator, "close"):
+                iterator.close()
+    except BaseException as e:  # re-raised in the consumer thread
+        put(_Failure(e))
+        return
+    put(_DONE)
+
+
+def prefetch(
+    producers: Sequence[Callable[[], Iterable[Any]]],
+    depth: int = DEFAULT_PREFETCH_DEPTH,
+) -> Generator[Any, None, None]:
+    """
+    Runs each producer in a background thread and yields their items in order.
+
+    Every producer gets its own bounded queue of `depth` items, so at most
+    `len(producers) * depth` items are held in memory at any time. Items are
+    yielded producer by producer, in the order the producers were given, which
+    keeps the output deterministic while all producers run concurrently.
+
+    Exceptions raised by a producer are re-raised in the consuming thread.
+    Closing the returned generator stops all producers.
+
+    Args:
+        producers (Sequence[Callable[[], Iterable[Any]]]): Callables returning
+            the iterables to consume, typically `to_batches` of dataset shards.
+        depth (int, optional): The maximum number of items buffered per
+            producer. Defaults to 4.
+
+    Yields:
+        The items of every producer, in order.
+    """
+    stop = threading.Event()
+    queues: List[queue.Queue] = [queue.Queue(maxsize=max(1, depth)) for _ in producers]
+    threads = [
+        threading.Thread(target=_produce, args=(producer, q, stop), daemon=True)
+        for producer, q in zip(producers, queues)
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        for q in queues:
+            while True:
+                item = q.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
@@ -25,6 +25,8 @@ import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 
 from atlas.tasks.data_model.base import BaseDataset
+from atlas.utils.blob import take
+from atlas.utils.masks import decode_instance_map, decode_masks, get_mask_format
 
 
 def visualize(uri: str, num_samples: int = 5, output_file: str = None):
@@ -49,7 +51,7 @@ def visualize(uri: str, num_samples: int = 5, output_file: str = None):
         return
 
     sample_indices = random.sample(range(total_rows), min(num_samples, total_rows))
-    samples = dataset.take(sample_indices).to_pydict()
+    samples = take(dataset, sample_indices).to_pydict()
     metadata = BaseDataset.get_metadata(uri)
     if metadata:
         samples["class_names"] = metadata.class_names
@@ -116,17 +118,21 @@ def visualize(uri: str, num_samples: int = 5, output_file: str = None):
                                     color="white",
                                 )
 
+                masks = []
                 if "mask" in row:
-                    masks = row["mask"]
-                    for idx, mask_bytes in enumerate(masks):
-                        mask_image = Image.open(io.BytesIO(mask_bytes)).convert("L")
-                        mask_np = np.array(mask_image)
-                        # Generate a random color for each mask
-                        color = np.random.randint(0, 255, size=3)
-                        rgba_mask = np.zeros((*mask_np.shape, 4), dtype=np.uint8)
-                        rgba_mask[mask_np > 0, :3] = color  # Set color where mask is present
-                        rgba_mask[mask_np > 0, 3] = 130     # Set alpha (transparency)
-                        ax.imshow(rgba_mask)
+                    masks = decode_masks(
+                        row["mask"], row["height"], row["width"], get_mask_format(dataset.schema.field("mask"))
+                    )
+                elif "instance_map" in row:
+                    instance_map = decode_instance_map(row["instance_map"])
+                    masks = [instance_map == i for i in range(1, int(instance_map.max()) + 1)]
+                for mask_np in masks:
+                    # Generate a random color for each mask
+                    color = np.random.randint(0, 255, size=3)
+                    rgba_mask = np.zeros((*mask_np.shape, 4), dtype=np.uint8)
+                    rgba_mask[mask_np > 0, :3] = color  # Set color where mask is present
+                    rgba_mask[mask_np > 0, 3] = 130     # Set alpha (transparency)
+                    ax.imshow(rgba_mask)
 
             except Exception as e:
                 print(f"Could not display image: {e}")
@@ -10,7 +10,7 @@ setup(
         ],
     },
     install_requires=[
-        'pylance',
+        'pylance>=13.0.0',
         'pyarrow',
         'pandas',
         'click',
@@ -21,7 +21,7 @@ setup(
         'pycocotools',
         'datasets',
         'torchcodec',
-        'lancedb',
+        'lancedb>=0.40.0',
         'tqdm',
         'rich'
     ],
@@ -0,0 +1,88 @@
+# Atlas: A data-centric AI framework
+#
+# Copyright (c) 2024-present, Atlas Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import unittest
+
+import lance
+import pyarrow as pa
+from datasets import ClassLabel, Dataset, Features, Sequence, Value
+
+from atlas.data_sinks import sink
+from atlas.tasks.hf.hf import HFDataset
+
+
+class TestHFClassLabels(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = "test_hf_class_labels"
+        names = ["cat", "dog"]
+        features = Features({
+            "label": ClassLabel(names=names),
+            "labels": Sequence(ClassLabel(names=names)),
+            "objects": [{"category": ClassLabel(names=names), "area": Value("float32")}],
+        })
+        self.dataset = Dataset.from_dict(
+            {
+                "label": [0, 1, -1],
+                "labels": [[1, 0], None, []],
+                "objects": [[{"category": 1, "area": 2.0}], [], [{"category": 0, "area": 1.0}, None]],
+            },
+            features=features,
+        )
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_dictionary_arrays(self):
+        for handle_nested_nulls in (False, True):
+            dataset = HFDataset(self.dataset, handle_nested_nulls=handle_nested_nulls)
+            table = pa.Table.from_batches(dataset.to_batches(batch_size=2))
+            label = table.column("label").chunk(0)
+            self.assertEqual(label.type, pa.dictionary(pa.int32(), pa.string()))
+            self.assertEqual(label.dictionary.to_pylist(), ["cat", "dog"])
+            self.assertEqual(table.column("label").to_pylist(), ["cat", "dog", None])
+            self.assertEqual(table.column("labels").to_pylist(), [["dog", "cat"], None, []])
+            self.assertEqual(
+                table.column("objects").to_pylist(),
+                [[{"area": 2.0, "category": "dog"}], [], [{"area": 1.0, "category": "cat"}, None]],
+            )
+
+    def test_null_lists_covering_values(self):
+        from atlas.tasks.hf.hf import _convert_class_labels, _extract
+
+        # The null list still spans the values 1 and 0 of the child array.
+        labels = pa.ListArray.from_arrays(
+            pa.array([0, 2, 4, 5], pa.int32()), pa.array([0, 1, 1, 0, 1]), mask=pa.array([False, True, False])
+        )
+        converted = _convert_class_labels(labels, Sequence(ClassLabel(names=["cat", "dog"])))
+        self.assertEqual(converted.to_pylist(), [["cat", "dog"], None, ["dog"]])
+        self.assertEqual(converted.slice(1).to_pylist(), [None, ["dog"]])
+
+        structs = pa.StructArray.from_arrays([pa.array([1, 2, 3, 4, 5])], names=["id"])
+        objects = pa.ListArray.from_arrays(pa.array([0, 2, 4, 5], pa.int32()), structs, mask=pa.array([False, True, False]))
+        self.assertEqual(_extract(objects, ("id",), lambda values: values).to_pylist(), [[1, 2], None, [5]])
+
+    def test_expanded_class_labels(self):
+        uri = os.path.join(self.test_dir, "labels.lance")
+        sink(self.dataset, uri, task="hf", expand_level=1)
+        table = lance.dataset(uri).to_table()
+        self.assertEqual(table.column("objects_category").to_pylist(), [["dog"], [], ["cat", None]])
+
+
+if __name__ == "__main__":
+    unittest.main()
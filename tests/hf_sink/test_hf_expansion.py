@@ -64,18 +64,52 @@ class TestHFExpansion(unittest.TestCase):
         self.assertListEqual(table.column("nested_b").to_pylist(), ["one", "two", None, None, None, "four"])
         self.assertListEqual(table.column("nested_c").to_pylist(), [None, True, None, None, None, None])
 
-    def test_expansion_with_nulls_fast_path_incorrect(self):
-        uri = os.path.join(self.test_dir, "expansion_fast_incorrect.lance")
+    def test_expansion_with_nulls_fast_path(self):
+        uri = os.path.join(self.test_dir, "expansion_fast.lance")
         # Note: handle_nested_nulls=False is the default
         sink(self.dataset, uri, task="hf", expand_level=1)
 
-        retrieved_data = lance.dataset(uri)
-        table = retrieved_data.to_table()
-        
-        # The fast path produces incorrect data for missing values.
-        self.assertNotEqual(table.column("nested_a").to_pylist(), [1, 2, 3, None, None, None])
-        # Specifically, it should produce a 0 for the missing integer value.
-        self.assertEqual(table.column("nested_a").to_pylist()[4], 0)
+        table = lance.dataset(uri).to_table()
+        # Leaf nulls and missing keys stay null, as with handle_nested_nulls.
+        self.assertListEqual(table.column("nested_a").to_pylist(), [1, 2, 3, None, None, None])
+        self.assertListEqual(table.column("nested_b").to_pylist(), ["one", "two", None, None, None, "four"])
+        self.assertListEqual(table.column("nested_c").to_pylist(), [None, True, None, None, None, None])
+
+    def test_expansion_of_nested_lists_of_dicts(self):
+        features = Features({
+            "objects": [{
+                "name": Value("string"),
+                "parts": [{"id": Value("int64"), "box": {"x": Value("float32"), "y": Value("float32")}}],
+            }],
+        })
+        data = [
+            {"objects": [{"name": "a", "parts": [{"id": 1, "box": {"x": 0.5, "y": 1.0}}]}, {"name": "b", "parts": []}]},
+            {"objects": []},
+            {"objects": None},
+            {"objects": [{"name": "c", "parts": [{"id": 2, "box": None}, {"id": 3, "box": {"x": 2.0, "y": 3.0}}]}]},
+        ]
+        dataset = Dataset.from_list(data, features=features)
+        for handle_nested_nulls in (False, True):
+            expected = {
+                "objects_name": [["a", "b"], [], None, ["c"]],
+                "objects_parts_id": [[[1], []], [], None, [[2, 3]]],
+                # The null box of part 2 stays null.
+                "objects_parts_box_x": [[[0.5], []], [], None, [[None, 2.0]]],
+            }
+            uri = os.path.join(self.test_dir, f"depth_{handle_nested_nulls}.lance")
+            sink(dataset, uri, task="hf", expand_level=3, handle_nested_nulls=handle_nested_nulls)
+            table = lance.dataset(uri).to_table()
+            self.assertEqual(
+                table.column_names, ["objects_name", "objects_parts_box_x", "objects_parts_box_y", "objects_parts_id"]
+            )
+            for name, values in expected.items():
+                self.assertEqual(table.column(name).to_pylist(), values)
+
+        uri = os.path.join(self.test_dir, "depth_1.lance")
+        sink(dataset, uri, task="hf", expand_level=1)
+        table = lance.dataset(uri).to_table()
+        self.assertEqual(table.column_names, ["objects_name", "objects_parts"])
+        self.assertEqual(table.column("objects_parts").to_pylist()[0][0], [{"box": {"x": 0.5, "y": 1.0}, "id": 1}])
 
 
 if __name__ == '__main__':
@@ -0,0 +1,58 @@
+# Atlas: A data-centric AI framework
+#
+# Copyright (c) 2024-present, Atlas Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import pyarrow as pa
+from datasets import ClassLabel, Dataset, Features, Sequence, Value
+
+from atlas.tasks.hf.hf import HFDataset
+
+
+class TestHFFastPath(unittest.TestCase):
+    def setUp(self):
+        self.features = Features({
+            "text": Value("string"),
+            "tokens": Sequence(Value("int32")),
+            "meta": {"z": Value("int64"), "a": Value("string")},
+            "label": ClassLabel(names=["neg", "pos"]),
+        })
+        self.dataset = Dataset.from_dict(
+            {
+                "text": ["a", "b", "c"],
+                "tokens": [[1], [2, 3], []],
+                "meta": [{"z": 1, "a": "x"}, {"z": 2, "a": "y"}, {"z": 3, "a": "z"}],
+                "label": [0, 1, 0],
+            },
+            features=self.features,
+        )
+
+    def test_plain_columns_are_not_copied(self):
+        table = pa.Table.from_batches(HFDataset(self.dataset).to_batches(batch_size=2))
+        self.assertEqual(table.column("text").to_pylist(), ["a", "b", "c"])
+        self.assertEqual(table.column("tokens").to_pylist(), [[1], [2, 3], []])
+        # Struct fields follow the sorted order of the schema.
+        self.assertEqual(table.column("meta").to_pylist()[0], {"a": "x", "z": 1})
+        self.assertEqual(table.column("label").to_pylist(), ["neg", "pos", "neg"])
+
+        source = self.dataset.data.table.column("text").chunk(0)
+        batch = next(HFDataset(self.dataset).to_batches(batch_size=3))
+        text = batch.column(batch.schema.get_field_index("text"))
+        self.assertEqual(text.buffers()[2].address, source.buffers()[2].address)
+
+
+if __name__ == "__main__":
+    unittest.main()
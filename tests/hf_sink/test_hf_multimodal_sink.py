@@ -104,5 +104,23 @@ class HFMultimodalDataSinkTest(unittest.TestCase):
             original_audio_bytes = f.read()
         self.assertEqual(retrieved_audio_bytes, original_audio_bytes)
 
+    def test_embedded_and_path_images(self):
+        from unittest import mock
+
+        from atlas.tasks.hf import hf
+
+        with open(self.image_path, "rb") as f:
+            image_bytes = f.read()
+        embedded = {"bytes": b"embedded", "path": "ignored.png"}
+        dataset = Dataset.from_dict(
+            {"image": [embedded, {"bytes": None, "path": self.image_path}, None]}
+        ).cast_column("image", Image(decode=False))
+        with mock.patch.object(hf, "read_files", wraps=hf.read_files) as read_files:
+            table = pa.Table.from_batches(hf.HFDataset(dataset).to_batches())
+        # Only the image without embedded bytes is read from its file.
+        read_files.assert_called_once()
+        self.assertEqual(read_files.call_args.args[0], [self.image_path])
+        self.assertEqual(table.column("image").to_pylist(), [b"embedded", image_bytes, None])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
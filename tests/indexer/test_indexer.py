@@ -152,4 +152,106 @@ def test_list_indexes(capsys, lance_dataset):
     captured = capsys.readouterr()
     assert "vector" in captured.out
     assert "vector_idx" in captured.out
-    assert "id" not in captured.out or "id_idx" not in captured.out
\ No newline at end of file
+    assert "id" not in captured.out or "id_idx" not in captured.out
+
+def test_indexer_on_sunk_coco_dataset():
+    """
+    Tests that a sunk COCO dataset, whose images are blob columns, can be
+    opened in place and copied into a new table with the image bytes.
+    """
+    import json
+
+    from atlas.data_sinks import sink
+    from atlas.utils.blob import read_blobs
+
+    image_dir = os.path.join(TEST_DIR, "images")
+    os.makedirs(image_dir, exist_ok=True)
+    images = []
+    for i in range(3):
+        path = os.path.join(image_dir, f"image{i}.jpg")
+        with open(path, "wb") as f:
+            f.write(b"image" * (i + 1))
+        images.append(path)
+    coco_path = os.path.join(TEST_DIR, "coco.json")
+    with open(coco_path, "w") as f:
+        json.dump(
+            {
+                "images": [{"id": i, "file_name": path} for i, path in enumerate(images)],
+                "annotations": [
+                    {"id": i, "image_id": i, "category_id": 1, "bbox": [1, 2, 3, 4]} for i in range(3)
+                ],
+                "categories": [{"id": 1, "name": "cat"}],
+            },
+            f,
+        )
+    expected = [b"image" * (i + 1) for i in range(3)]
+
+    try:
+        # A `.lance` dataset is the table of its directory.
+        dataset_path = os.path.join(TEST_DIR, "coco.lance")
+        sink(coco_path, dataset_path, task="object_detection", format="coco")
+        idx = indexer_api.Indexer(dataset_path)
+        assert idx.table.count_rows() == 3
+        assert read_blobs(idx.table.to_lance(), "image", indices=[0, 1, 2]).to_pylist() == expected
+
+        # Other datasets are copied into a new table, blob bytes included.
+        dataset_path = os.path.join(TEST_DIR, "coco_copy")
+        sink(coco_path, dataset_path, task="object_detection", format="coco")
+        idx = indexer_api.Indexer(dataset_path)
+        assert idx.table.count_rows() == 3
+        assert read_blobs(idx.table.to_lance(), "image", indices=[0, 1, 2]).to_pylist() == expected
+        assert idx._get_modality("image") == "image"
+    finally:
+        shutil.rmtree(TEST_DIR, ignore_errors=True)
+
+
+def test_indexer_on_reference_images(monkeypatch):
+    """
+    Tests that reference-mode image columns are embedded as images, from the
+    bytes of the referenced files.
+    """
+    import json
+
+    from atlas.data_sinks import sink
+
+    os.makedirs(TEST_DIR, exist_ok=True)
+    images = []
+    for i in range(3):
+        path = os.path.join(TEST_DIR, f"image{i}.jpg")
+        with open(path, "wb") as f:
+            f.write(b"image" * (i + 1))
+        images.append(path)
+    coco_path = os.path.join(TEST_DIR, "coco.json")
+    with open(coco_path, "w") as f:
+        json.dump(
+            {
+                "images": [{"id": i, "file_name": path} for i, path in enumerate(images)],
+                "annotations": [],
+                "categories": [{"id": 1, "name": "cat"}],
+            },
+            f,
+        )
+
+    vectorized = []
+
+    class FakeVectorizer:
+        def __init__(self, model_name=None, modality="text"):
+            self.modality = modality
+
+        def vectorize(self, data, batch_size=32):
+            vectorized.append((self.modality, data))
+            return [np.full(4, len(value), dtype="float32") for value in data]
+
+    monkeypatch.setattr(indexer_api, "Vectorizer", FakeVectorizer)
+    try:
+        dataset_path = os.path.join(TEST_DIR, "coco.lance")
+        sink(coco_path, dataset_path, task="object_detection", format="coco", image_mode="reference")
+        idx = indexer_api.Indexer(dataset_path)
+        assert idx._get_modality("image") == "image"
+        idx.create_index("image", "vector", num_partitions=1, num_sub_vectors=1)
+
+        assert [modality for modality, _ in vectorized] == ["image"]
+        assert vectorized[0][1] == [b"image" * (i + 1) for i in range(3)]
+        assert "vector" in idx.table.schema.names
+    finally:
+        shutil.rmtree(TEST_DIR, ignore_errors=True)
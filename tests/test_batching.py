@@ -0,0 +1,60 @@
+import unittest
+
+import pyarrow as pa
+
+from atlas.utils.batching import RowSizeEstimator, estimate_row_bytes, rebatch
+
+
+def _make_batch(start, num_rows, payload_size=100):
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array(range(start, start + num_rows), type=pa.int64()),
+            pa.array([b"x" * payload_size] * num_rows, type=pa.binary()),
+        ],
+        names=["id", "payload"],
+    )
+
+
+class BatchingTest(unittest.TestCase):
+    def test_estimate_row_bytes(self):
+        fixed = pa.schema([pa.field("a", pa.int64()), pa.field("b", pa.list_(pa.float32(), 4))])
+        self.assertEqual(estimate_row_bytes(fixed), 8 + 16)
+        with_image = pa.schema([pa.field("image", pa.large_binary()), pa.field("label", pa.list_(pa.int64()))])
+        self.assertGreater(estimate_row_bytes(with_image), estimate_row_bytes(fixed))
+
+    def test_row_size_estimator(self):
+        estimator = RowSizeEstimator()
+        self.assertEqual(estimator.rows_for(1024), 1)
+        batch = _make_batch(0, 10)
+        estimator.update(batch)
+        self.assertAlmostEqual(estimator.row_size, batch.nbytes / 10)
+        self.assertEqual(estimator.rows_for(batch.nbytes), 10)
+
+    def test_rebatch_merges_small_batches(self):
+        row_size = _make_batch(0, 1).nbytes
+        batches = [_make_batch(i, 1) for i in range(100)]
+        out = list(rebatch(batches, target_bytes=row_size * 25))
+        self.assertEqual([b.num_rows for b in out], [25, 25, 25, 25])
+        ids = [i for b in out for i in b.column("id").to_pylist()]
+        self.assertEqual(ids, list(range(100)))
+
+    def test_rebatch_splits_large_batches(self):
+        batch = _make_batch(0, 100)
+        out = list(rebatch([batch], target_bytes=batch.nbytes // 4))
+        self.assertEqual(sum(b.num_rows for b in out), 100)
+        self.assertTrue(all(b.num_rows <= 25 for b in out))
+        ids = [i for b in out for i in b.column("id").to_pylist()]
+        self.assertEqual(ids, list(range(100)))
+
+    def test_rebatch_keeps_remainder(self):
+        row_size = _make_batch(0, 1).nbytes
+        batches = [_make_batch(0, 7), _make_batch(7, 3)]
+        out = list(rebatch(batches, target_bytes=row_size * 4))
+        self.assertEqual([b.num_rows for b in out], [4, 4, 2])
+
+    def test_rebatch_skips_empty_batches(self):
+        self.assertEqual(list(rebatch([_make_batch(0, 0)])), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import json
+import os
+import tempfile
+import unittest
+
+import lance
+import pyarrow as pa
+
+from atlas.data_sinks import sink
+from atlas.tasks.data_model.base import BaseDataset
+from atlas.tasks.data_model.writer import load_checkpoint
+from atlas.tasks.instruction.instruction import InstructionDataset
+
+
+class FlakyDataset(BaseDataset):
+    """
+    Yields `num_rows` rows and fails once `fail_at` rows have been read.
+    """
+
+    def __init__(self, data, num_rows, fail_at=None):
+        super().__init__(data)
+        self.num_rows = num_rows
+        self.fail_at = fail_at
+
+    def to_batches(self, batch_size=1024, **kwargs):
+        for start in range(0, self.num_rows, batch_size):
+            if self.fail_at is not None and start >= self.fail_at:
+                raise RuntimeError("source went away")
+            stop = min(start + batch_size, self.num_rows)
+            yield pa.RecordBatch.from_arrays([pa.array(range(start, stop), type=pa.int64())], names=["id"])
+
+
+class FlakyInstructionDataset(InstructionDataset):
+    def __init__(self, data, fail=False):
+        super().__init__(data)
+        self.fail = fail
+
+    def to_batches(self, batch_size=1024, **kwargs):
+        for i, batch in enumerate(super().to_batches(batch_size=batch_size)):
+            if self.fail and i == 2:
+                raise RuntimeError("source went away")
+            yield batch
+
+
+class CheckpointTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.uri = os.path.join(self.tmpdir.name, "data.lance")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_periodic_commits(self):
+        sink(FlakyDataset("source", 100), self.uri, batch_size=10, target_batch_bytes=80, commit_every=2)
+        dataset = lance.dataset(self.uri)
+        self.assertEqual(dataset.count_rows(), 100)
+        self.assertEqual(dataset.version, 5)
+        checkpoint = load_checkpoint(self.uri)
+        self.assertEqual(checkpoint["position"], 100)
+        self.assertTrue(checkpoint["complete"])
+
+    def test_resume_after_failure(self):
+        with self.assertRaises(RuntimeError):
+            sink(
+                FlakyDataset("source", 100, fail_at=50),
+                self.uri,
+                batch_size=10,
+                target_batch_bytes=80,
+                commit_every=2,
+                prefetch_depth=1,
+            )
+        checkpoint = load_checkpoint(self.uri)
+        self.assertFalse(checkpoint["complete"])
+        committed = checkpoint["position"]
+        self.assertEqual(lance.dataset(self.uri).count_rows(), committed)
+
+        sink(FlakyDataset("source", 100), self.uri, batch_size=10, commit_every=2, resume=True)
+        table = lance.dataset(self.uri).to_table()
+        self.assertEqual(table.column("id").to_pylist(), list(range(100)))
+        self.assertTrue(load_checkpoint(self.uri)["complete"])
+
+        # Resuming a complete sink is a no-op.
+        version = lance.dataset(self.uri).version
+        sink(FlakyDataset("source", 100), self.uri, resume=True)
+        self.assertEqual(lance.dataset(self.uri).version, version)
+
+    def test_resume_rejects_other_source(self):
+        with self.assertRaises(RuntimeError):
+            sink(
+                FlakyDataset("source", 100, fail_at=50), self.uri, batch_size=10, target_batch_bytes=80, commit_every=1
+            )
+        with self.assertRaises(ValueError):
+            sink(FlakyDataset("other", 100), self.uri, resume=True)
+
+    def test_resume_jsonl(self):
+        jsonl_path = os.path.join(self.tmpdir.name, "data.jsonl")
+        with open(jsonl_path, "w") as f:
+            for i in range(30):
+                f.write(json.dumps({"instruction": f"i{i}", "output": f"o{i}"}) + "\n")
+
+        with self.assertRaises(RuntimeError):
+            sink(
+                FlakyInstructionDataset(jsonl_path, fail=True),
+                self.uri,
+                batch_size=10,
+                target_batch_bytes=1,
+                commit_every=1,
+                prefetch_depth=1,
+            )
+        self.assertLess(load_checkpoint(self.uri)["position"], 30)
+
+        sink(FlakyInstructionDataset(jsonl_path), self.uri, batch_size=10, resume=True)
+        table = lance.dataset(self.uri).to_table()
+        self.assertEqual(table.column("instruction").to_pylist(), [f"i{i}" for i in range(30)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import json
+import os
+import pickle
+import tempfile
+import unittest
+
+import numpy as np
+
+from atlas.utils.coco import CocoIndex
+from atlas.utils.io import iter_json_members
+
+
+class CocoIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.coco_path = os.path.join(self.tmpdir.name, "coco.json")
+        # Annotations before images and out of image order, as some exporters write them.
+        self.coco_data = {
+            "info": {"description": "test", "year": 2024},
+            "annotations": [
+                {"id": 1, "image_id": 30, "category_id": 2, "bbox": [1, 1, 1, 1]},
+                {"id": 2, "image_id": 10, "category_id": 1, "bbox": [2, 2, 2, 2]},
+                {"id": 3, "image_id": 30, "category_id": 1, "bbox": [3, 3, 3, 3]},
+            ],
+            "images": [
+                {"id": 30, "file_name": "c.jpg", "height": 3, "width": 4},
+                {"id": 10, "file_name": "a.jpg", "height": 1, "width": 2},
+                {"id": 20, "file_name": "b.jpg", "height": 5, "width": 6},
+            ],
+            "captions": [{"image_id": 20, "caption": "a cat"}, {"image_id": 20, "caption": "a dog"}],
+            "categories": [{"id": 1, "name": "cat"}, {"id": 2, "name": "dog"}],
+        }
+        with open(self.coco_path, "w") as f:
+            json.dump(self.coco_data, f, indent=1)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_iter_json_members(self):
+        members = list(iter_json_members(self.coco_path, chunk_chars=5))
+        self.assertEqual(members[0][:2], ("info", self.coco_data["info"]))
+        self.assertEqual([value for key, value, _ in members if key == "images"], self.coco_data["images"])
+        for _, value, text in members:
+            self.assertEqual(json.loads(text), value)
+
+    def test_index(self):
+        index = CocoIndex(self.coco_path, spill_dir=self.tmpdir.name)
+        positions = np.arange(len(index))
+        self.assertEqual(index.categories, {1: "cat", 2: "dog"})
+        self.assertEqual(index.images(positions), self.coco_data["images"])
+        self.assertEqual(index.file_names.to_pylist(), ["c.jpg", "a.jpg", "b.jpg"])
+        self.assertEqual(
+            [[ann["id"] for ann in anns] for anns in index.annotations(positions)],
+            [[1, 3], [2], []],
+        )
+        self.assertEqual(index.captions(np.array([2, 0])), [["a cat", "a dog"], []])
+
+        lists = index.annotation_lists(np.array([0, 2, 1]))
+        self.assertEqual(lists["category_id"].to_pylist(), [[2, 1], [], [1]])
+        self.assertEqual(lists["bbox"].to_pylist(), [[[1, 1, 1, 1], [3, 3, 3, 3]], [], [[2, 2, 2, 2]]])
+        self.assertEqual(lists["keypoints"].to_pylist(), [[None, None], [], [None]])
+        self.assertEqual(index.caption_lists(np.array([2, 0])).to_pylist(), [["a cat", "a dog"], []])
+        self.assertEqual(index.image_columns(np.array([1])).to_pylist(), [{"file_name": "a.jpg", "height": 1, "width": 2}])
+
+        # Pickled copies read the files of the original index, which removes them.
+        directory = index.directory
+        copy = pickle.loads(pickle.dumps(index))
+        self.assertEqual(copy.annotations(np.array([1]))[0][0]["id"], 2)
+        del copy
+        self.assertTrue(os.path.isdir(directory))
+        del index
+        self.assertFalse(os.path.isdir(directory))
+
+
+if __name__ == "__main__":
+    unittest.main()
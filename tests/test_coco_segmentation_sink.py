@@ -1,4 +1,5 @@
 import json
+import multiprocessing
 import os
 import unittest
 
@@ -10,6 +11,8 @@ import pyarrow as pa
 from PIL import Image
 
 from atlas.data_sinks import sink
+from atlas.utils.blob import read_blobs
+from atlas.utils.masks import encode_images, get_mask_format, read_masks
 
 
 class CocoSegmentationSinkTest(unittest.TestCase):
@@ -62,7 +65,7 @@ class CocoSegmentationSinkTest(unittest.TestCase):
 
         with open(os.path.join(self.image_dir, "image0.jpg"), "rb") as f:
             image_data = f.read()
-        self.assertEqual(table.column("image").to_pylist()[0], image_data)
+        self.assertEqual(read_blobs(dataset, "image", indices=[0]).to_pylist()[0], image_data)
 
         self.assertEqual(table.column("bbox").to_pylist()[0], [[10.0, 20.0, 30.0, 40.0]])
         self.assertEqual(table.column("label").to_pylist()[0], [1])
@@ -73,6 +76,53 @@ class CocoSegmentationSinkTest(unittest.TestCase):
         self.assertEqual(mask.shape, (100, 100))
         self.assertTrue(np.any(mask > 0))
 
+    def test_mask_formats(self):
+        expected = np.zeros((100, 100), dtype=np.uint8)
+        expected[20:61, 10:41] = 1
+        for mask_format in ["png", "rle", "bitpacked"]:
+            sink(self.coco_path, self.lance_path, task="segmentation", format="coco", mask_format=mask_format)
+            dataset = lance.dataset(self.lance_path)
+            self.assertEqual(get_mask_format(dataset.schema.field("mask")), mask_format)
+            masks = read_masks(dataset, [0])[0]
+            self.assertEqual(masks.shape, (1, 100, 100))
+            # Polygon rasterizers differ on edge pixels only.
+            self.assertLessEqual(np.abs(masks[0].astype(int) - expected).sum(), 100)
+
+        with self.assertRaises(ValueError):
+            sink(self.coco_path, self.lance_path, task="segmentation", format="coco", mask_format="jpeg")
+
+    def test_instance_map(self):
+        with open(self.coco_path) as f:
+            coco_data = json.load(f)
+        coco_data["annotations"].append(
+            {"id": 1, "image_id": 0, "category_id": 1, "bbox": [30, 50, 20, 20], "segmentation": [[30, 50, 50, 50, 50, 70, 30, 70]]}
+        )
+        with open(self.coco_path, "w") as f:
+            json.dump(coco_data, f)
+
+        sink(self.coco_path, self.lance_path, task="segmentation", format="coco")
+        per_instance = read_masks(lance.dataset(self.lance_path), [0])[0]
+
+        sink(self.coco_path, self.lance_path, task="segmentation", format="coco", instance_map=True, mask_workers=2)
+        dataset = lance.dataset(self.lance_path)
+        self.assertIn("instance_map", dataset.schema.names)
+        self.assertNotIn("mask", dataset.schema.names)
+        masks = read_masks(dataset, [0])[0]
+        self.assertEqual(masks.shape, (2, 100, 100))
+        # The second instance covers the first where they overlap.
+        np.testing.assert_array_equal(masks[1], per_instance[1])
+        np.testing.assert_array_equal(masks[0], per_instance[0] & (1 - per_instance[1]))
+        # The mask processes do not outlive the sink.
+        self.assertEqual(multiprocessing.active_children(), [])
+
+        items = [([ann["segmentation"] for ann in coco_data["annotations"]], 100, 100)] * 3
+        for instance_map in [False, True]:
+            self.assertEqual(
+                encode_images(items, instance_map=instance_map, max_workers=2),
+                encode_images(items, instance_map=instance_map),
+            )
+        self.assertEqual(multiprocessing.active_children(), [])
+
 
 if __name__ == "__main__":
     unittest.main()
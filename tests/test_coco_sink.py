@@ -7,6 +7,7 @@ import pandas as pd
 import pyarrow as pa
 
 from atlas.data_sinks import sink
+from atlas.utils.blob import is_blob_field, read_blobs
 
 
 class CocoSinkTest(unittest.TestCase):
@@ -61,7 +62,9 @@ class CocoSinkTest(unittest.TestCase):
             with open(os.path.join(self.image_dir, f"image{i}.jpg"), "rb") as f:
                 images_data.append(f.read())
 
-        self.assertEqual(table.column("image").to_pylist(), images_data)
+        # Images are blob-encoded: scans only see descriptors, the bytes are read on demand.
+        self.assertTrue(is_blob_field(dataset.schema.field("image")))
+        self.assertEqual(read_blobs(dataset, "image", indices=[0, 1, 2]).to_pylist(), images_data)
         self.assertEqual(
             table.column("bbox").to_pylist(),
             [[[10.0, 20.0, 30.0, 40.0]], [[50.0, 60.0, 70.0, 80.0]], [[90.0, 100.0, 110.0, 120.0]]],
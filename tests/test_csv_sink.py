@@ -30,6 +30,34 @@ class CsvSinkTest(unittest.TestCase):
         self.assertEqual(table.column("a").to_pylist(), [1, 2, 3])
         self.assertEqual(table.column("b").to_pylist(), ["x", "y", "z"])
 
+    def test_sink_csv_streaming(self):
+        with open(self.csv_path, "w") as f:
+            f.write("id,user.name,score\n")
+            for i in range(1000):
+                f.write(f"{i},name{i},{i if i < 900 else 'n/a'}\n")
+        sink(self.csv_path, self.lance_path, block_size=1024, column_types={"score": pa.string()})
+        table = lance.dataset(self.lance_path).to_table()
+        self.assertEqual(table.column_names, ["id", "user_name", "score"])
+        self.assertEqual(table.column("id").to_pylist(), list(range(1000)))
+        self.assertEqual(table.column("score")[950].as_py(), "n/a")
+
+    def test_sink_csv_late_type_change(self):
+        with open(self.csv_path, "w") as f:
+            f.write("id,score,ratio\n")
+            for i in range(1000):
+                f.write(f"{i},{i if i < 900 else 'high'},{i if i < 950 else i + 0.5}\n")
+
+        with self.assertRaisesRegex(ValueError, "'score'.*'high'.*column_types"):
+            sink(self.csv_path, self.lance_path, block_size=1024)
+
+        sink(self.csv_path, self.lance_path, block_size=1024, infer_blocks=None, mode="overwrite")
+        table = lance.dataset(self.lance_path).to_table()
+        self.assertEqual(table.schema.field("score").type, pa.string())
+        self.assertEqual(table.schema.field("ratio").type, pa.float64())
+        self.assertEqual(table.column("score")[0].as_py(), "0")
+        self.assertEqual(table.column("score")[950].as_py(), "high")
+        self.assertEqual(table.column("ratio")[999].as_py(), 999.5)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,118 @@
+import json
+import os
+import tempfile
+import unittest
+
+import lance
+
+from atlas.data_sinks import sink
+from atlas.tasks.data_model.delta import load_state
+from atlas.tasks.object_detection.coco import CocoDataset
+
+
+class DeltaSinkTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.uri = os.path.join(self.tmpdir.name, "data.lance")
+        self.coco_path = os.path.join(self.tmpdir.name, "coco.json")
+        self.coco_data = {"images": [], "annotations": [], "categories": [{"id": 1, "name": "cat"}]}
+        for i in range(5):
+            self.add_image(i)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def add_image(self, i):
+        file_name = f"image{i}.jpg"
+        with open(os.path.join(self.tmpdir.name, file_name), "wb") as f:
+            f.write(f"image {i}".encode())
+        self.coco_data["images"].append({"id": i, "file_name": file_name})
+        self.coco_data["annotations"].append({"id": i, "image_id": i, "category_id": 1, "bbox": [i, i, 1, 1]})
+
+    def sink_coco(self):
+        with open(self.coco_path, "w") as f:
+            json.dump(self.coco_data, f)
+        sink(CocoDataset(self.coco_path, image_root=self.tmpdir.name), self.uri, delta=True)
+        table = lance.dataset(self.uri).to_table()
+        return dict(zip(table.column("file_name").to_pylist(), table.column("bbox").to_pylist()))
+
+    def test_coco_delta(self):
+        rows = self.sink_coco()
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(len(load_state(self.uri)["items"]), 5)
+
+        # Nothing changed: no new version.
+        version = lance.dataset(self.uri).version
+        self.sink_coco()
+        self.assertEqual(lance.dataset(self.uri).version, version)
+
+        # One new image and one modified annotation, replaced in one commit.
+        self.add_image(5)
+        self.coco_data["annotations"][2]["bbox"] = [9, 9, 9, 9]
+        rows = self.sink_coco()
+        self.assertEqual(sorted(rows), [f"image{i}.jpg" for i in range(6)])
+        self.assertEqual(rows["image2.jpg"], [[9, 9, 9, 9]])
+        self.assertEqual(lance.dataset(self.uri).version, version + 1)
+
+        # A removed image is deleted from the dataset.
+        del self.coco_data["images"][0]
+        rows = self.sink_coco()
+        self.assertEqual(sorted(rows), [f"image{i}.jpg" for i in range(1, 6)])
+        self.assertEqual(lance.dataset(self.uri).version, version + 2)
+        version = lance.dataset(self.uri).version
+        self.sink_coco()
+        self.assertEqual(lance.dataset(self.uri).version, version)
+
+    def test_delta_onto_dataset_without_fingerprints(self):
+        jsonl_path = os.path.join(self.tmpdir.name, "data.jsonl")
+        with open(jsonl_path, "w") as f:
+            for i in range(3):
+                f.write(json.dumps({"instruction": f"i{i}", "output": f"o{i}"}) + "\n")
+
+        # A dataset written without delta is kept unless it is overwritten.
+        sink(jsonl_path, self.uri, task="instruction")
+        version = lance.dataset(self.uri).version
+        for mode in ("create", "append"):
+            with self.assertRaisesRegex(ValueError, "not written by a delta sink.*mode='overwrite'"):
+                sink(jsonl_path, self.uri, task="instruction", delta=True, mode=mode)
+        self.assertEqual(lance.dataset(self.uri).version, version)
+        sink(jsonl_path, self.uri, task="instruction", delta=True, mode="overwrite")
+        self.assertEqual(lance.dataset(self.uri).count_rows(), 3)
+        self.assertIsNotNone(load_state(self.uri))
+
+        # So is a delta dataset of another loader.
+        with open(self.coco_path, "w") as f:
+            json.dump(self.coco_data, f)
+        with self.assertRaisesRegex(ValueError, "not written by a delta sink of CocoDataset"):
+            sink(CocoDataset(self.coco_path, image_root=self.tmpdir.name), self.uri, delta=True)
+        self.assertEqual(lance.dataset(self.uri).count_rows(), 3)
+
+    def test_jsonl_delta(self):
+        jsonl_path = os.path.join(self.tmpdir.name, "data.jsonl")
+
+        def write_lines(lines, mode="a"):
+            with open(jsonl_path, mode) as f:
+                for i in lines:
+                    f.write(json.dumps({"instruction": f"i{i}", "output": f"o{i}"}) + "\n")
+
+        def sink_jsonl():
+            sink(jsonl_path, self.uri, task="instruction", delta=True)
+            return lance.dataset(self.uri).to_table().column("instruction").to_pylist()
+
+        write_lines(range(10), mode="w")
+        self.assertEqual(sink_jsonl(), [f"i{i}" for i in range(10)])
+        version = lance.dataset(self.uri).version
+        self.assertEqual(len(sink_jsonl()), 10)
+        self.assertEqual(lance.dataset(self.uri).version, version)
+
+        # Appended lines are ingested on their own.
+        write_lines(range(10, 15))
+        self.assertEqual(sink_jsonl(), [f"i{i}" for i in range(15)])
+
+        # A rewritten file replaces the dataset.
+        write_lines(range(3), mode="w")
+        self.assertEqual(sink_jsonl(), [f"i{i}" for i in range(3)])
+
+
+if __name__ == "__main__":
+    unittest.main()
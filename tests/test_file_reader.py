@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+import unittest
+
+import lance
+import pyarrow as pa
+
+from atlas.data_sinks import sink
+from atlas.utils.io import iter_json_members, prefetch_files, read_binary_array, read_files
+
+
+class FileReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.paths = []
+        for i in range(20):
+            path = os.path.join(self.tmpdir.name, f"file{i}.bin")
+            with open(path, "wb") as f:
+                f.write(f"contents {i}".encode() * (i + 1))
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def expected(self, i):
+        return f"contents {i}".encode() * (i + 1)
+
+    def test_read_files_in_order(self):
+        for max_workers in [1, 4]:
+            self.assertEqual(
+                read_files(self.paths, max_workers=max_workers), [self.expected(i) for i in range(20)]
+            )
+
+    def test_read_files_missing(self):
+        missing = os.path.join(self.tmpdir.name, "missing.bin")
+        self.assertEqual(read_files([None, missing, self.paths[0]], missing_ok=True), [None, None, self.expected(0)])
+        with self.assertRaises(FileNotFoundError):
+            read_files([missing, self.paths[0]])
+
+    def test_read_binary_array(self):
+        missing = os.path.join(self.tmpdir.name, "missing.bin")
+        empty = os.path.join(self.tmpdir.name, "empty.bin")
+        open(empty, "wb").close()
+        paths = self.paths[:3] + [None, missing, empty]
+        for max_workers in [1, 4]:
+            for type in [pa.binary(), pa.large_binary()]:
+                array = read_binary_array(paths, max_workers=max_workers, missing_ok=True, type=type)
+                self.assertEqual(array.type, type)
+                self.assertEqual(array.null_count, 2)
+                self.assertEqual(array.to_pylist(), [self.expected(i) for i in range(3)] + [None, None, b""])
+        with self.assertRaises(FileNotFoundError):
+            read_binary_array([missing])
+
+    def test_prefetch_files(self):
+        batches = [list(range(i, min(i + 6, 20))) for i in range(0, 20, 6)]
+        for max_workers in [1, 4]:
+            results = list(
+                prefetch_files(iter(batches), lambda batch: [self.paths[i] for i in batch], max_workers=max_workers)
+            )
+            self.assertEqual([batch for batch, _ in results], batches)
+            self.assertEqual(
+                [content for _, contents in results for content in contents.to_pylist()],
+                [self.expected(i) for i in range(20)],
+            )
+
+    def test_json_members_small_chunks(self):
+        path = os.path.join(self.tmpdir.name, "data.json")
+        data = {"images": [], "annotations": [1.5, -2e-3, 10, 1E+2, True, None], "info": {"version": 1.25}}
+        with open(path, "w") as f:
+            json.dump(data, f)
+        for chunk_chars in [1, 2, 3, 7]:
+            members = list(iter_json_members(path, chunk_chars=chunk_chars))
+            self.assertEqual([value for key, value, _ in members if key == "annotations"], data["annotations"])
+            self.assertEqual(members[-1][:2], ("info", data["info"]))
+
+    def test_vision_language_sink(self):
+        jsonl_path = os.path.join(self.tmpdir.name, "data.jsonl")
+        with open(jsonl_path, "w") as f:
+            for i in range(5):
+                f.write(json.dumps({"image": self.paths[i], "text": f"text {i}"}) + "\n")
+            f.write(json.dumps({"image": os.path.join(self.tmpdir.name, "missing.jpg"), "text": "missing"}) + "\n")
+
+        uri = os.path.join(self.tmpdir.name, "vl.lance")
+        sink(jsonl_path, uri, read_workers=3)
+        table = lance.dataset(uri).to_table()
+        self.assertEqual(table.column("image").to_pylist(), [self.expected(i) for i in range(5)] + [None])
+        self.assertEqual(table.column("text").to_pylist()[-1], "missing")
+
+
+if __name__ == "__main__":
+    unittest.main()
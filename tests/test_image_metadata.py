@@ -8,6 +8,7 @@ from PIL import Image
 from atlas.tasks.object_detection.coco import CocoDataset
 from atlas.tasks.object_detection.yolo import YoloDataset
 from atlas.tasks.segmentation.coco import CocoSegmentationDataset
+from atlas.utils.image import image_sizes, probe_size
 
 
 class TestImageMetadata(unittest.TestCase):
@@ -138,6 +139,45 @@ class TestImageMetadata(unittest.TestCase):
                 self.assertEqual(len(batch["mask"][0]), 2)
                 self.assertEqual(len(batch["mask"][1]), 1)
 
+    def test_probe_size(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = []
+            for image_format, mode in [("JPEG", "RGB"), ("PNG", "RGBA"), ("WEBP", "RGB"), ("GIF", "P"), ("BMP", "RGB")]:
+                path = os.path.join(tmpdir, f"image.{image_format.lower()}")
+                Image.new(mode, (123, 45)).save(path, format=image_format)
+                paths.append(path)
+            Image.new("RGB", (123, 45)).save(os.path.join(tmpdir, "lossless.webp"), lossless=True)
+            paths.append(os.path.join(tmpdir, "lossless.webp"))
+
+            for path in paths:
+                with open(path, "rb") as f:
+                    size = probe_size(f.read())
+                # BMP is not parsed and falls back to PIL.
+                self.assertEqual(size, None if path.endswith(".bmp") else (123, 45), path)
+
+            images = pa.array([open(path, "rb").read() for path in paths] + [None], type=pa.large_binary())
+            self.assertEqual(image_sizes(images, paths + [paths[0]]), ([123] * 7, [45] * 7))
+            self.assertEqual(image_sizes(paths=paths), ([123] * 6, [45] * 6))
+
+    def test_coco_missing_dimensions(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            coco_data = {
+                "images": [{"id": 1, "file_name": "image1.jpg"}, {"id": 2, "file_name": "image2.png", "height": 7, "width": 9}],
+                "annotations": [{"id": 1, "image_id": 1, "category_id": 1, "bbox": [1, 1, 2, 2], "segmentation": [[1, 1, 3, 1, 3, 3]]}],
+                "categories": [{"id": 1, "name": "cat"}],
+            }
+            with open(os.path.join(tmpdir, "coco.json"), "w") as f:
+                json.dump(coco_data, f)
+            Image.new("RGB", (64, 32)).save(os.path.join(tmpdir, "image1.jpg"))
+            Image.new("RGB", (9, 7)).save(os.path.join(tmpdir, "image2.png"))
+
+            for dataset_class in [CocoDataset, CocoSegmentationDataset]:
+                for image_mode in ["bytes", "reference"]:
+                    dataset = dataset_class(os.path.join(tmpdir, "coco.json"), image_root=tmpdir, image_mode=image_mode)
+                    batch = next(dataset.to_batches())
+                    self.assertEqual(batch["width"].to_pylist(), [64, 9])
+                    self.assertEqual(batch["height"].to_pylist(), [32, 7])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pyarrow as pa
+
+from atlas.tasks.instruction.instruction import InstructionDataset
+from atlas.tasks.ranking.ranking import RankingDataset
+from atlas.utils import jsonl
+from atlas.utils.io import iter_lines
+from atlas.utils.jsonl import JsonField, read_jsonl, select_fields, source_schema
+
+
+class JsonlReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "data.jsonl")
+        self.records = [{"id": i, "text": "x" * (i * 7 % 50), "extra": [i]} for i in range(100)]
+        with open(self.path, "w") as f:
+            f.write("\n".join(json.dumps(record) for record in self.records))  # no trailing newline
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.directory)
+
+    def test_blocks_and_ranges(self):
+        schema = pa.schema([pa.field("id", pa.int64()), pa.field("text", pa.string())])
+        size = os.path.getsize(self.path)
+        # Blocks smaller than a line still hold whole lines.
+        tables = list(read_jsonl(self.path, schema, block_bytes=16))
+        self.assertEqual(sum(len(table) for table in tables), 100)
+        for start, stop in [(0, 1), (1, 300), (300, 301), (301, size)]:
+            expected = [json.loads(line)["id"] for line in iter_lines(self.path, start, stop)]
+            ids = [i for table in read_jsonl(self.path, schema, start, stop, block_bytes=64) for i in table["id"].to_pylist()]
+            self.assertEqual(ids, expected)
+        ids = [i for table in read_jsonl(self.path, schema, skip_rows=95) for i in table["id"].to_pylist()]
+        self.assertEqual(ids, [95, 96, 97, 98, 99])
+
+    def test_skip_rows_with_blank_lines(self):
+        schema = pa.schema([pa.field("id", pa.string())])
+        with open(self.path, "w") as f:
+            f.write('{"id": "a"}\n{"id": "b"}\n\n  \r\n{"id": "c"}\n{"id": "d"}\n\n{"id": "e"}')
+        for chunk_bytes in (jsonl.COUNT_CHUNK_BYTES, 1, 5):
+            with mock.patch.object(jsonl, "COUNT_CHUNK_BYTES", chunk_bytes):
+                for skip_rows, expected in [(0, "abcde"), (2, "cde"), (3, "de"), (4, "e"), (5, "")]:
+                    ids = [i for table in read_jsonl(self.path, schema, skip_rows=skip_rows) for i in table["id"].to_pylist()]
+                    self.assertEqual(ids, list(expected))
+
+        # Resumed loaders continue from the record after the last one read.
+        with open(self.path, "w") as f:
+            f.write('{"instruction": "a"}\n\n{"instruction": "b"}\n{"instruction": "c"}\n')
+        dataset = InstructionDataset(self.path)
+        dataset.start_row = 1
+        self.assertEqual(pa.Table.from_batches(dataset.to_batches()).column("instruction").to_pylist(), ["b", "c"])
+
+    def test_select_fields(self):
+        fields = [
+            JsonField("a", pa.string(), sources=("a", "b.c"), default=""),
+            JsonField("n", pa.float32(), default=-1.0),
+        ]
+        table = pa.Table.from_pylist(
+            [{"a": "x", "n": 1.0}, {"a": "", "b": {"c": "y"}}, {}], schema=source_schema(fields)
+        )
+        batch = select_fields(table, fields)
+        self.assertEqual(batch.to_pydict(), {"a": ["x", "y", ""], "n": [1.0, -1.0, -1.0]})
+
+    def test_loaders(self):
+        with open(self.path, "w") as f:
+            f.write(json.dumps({"instruction": "i", "context": "c", "output": "o"}) + "\n")
+            f.write(json.dumps({"instruction": "j", "input": "n", "unused": {"k": 1}}) + "\n")
+        dataset = InstructionDataset(self.path)
+        self.assertEqual(
+            pa.Table.from_batches(dataset.to_batches(batch_size=1)).to_pydict(),
+            {"instruction": ["i", "j"], "input": ["c", "n"], "output": ["o", ""], "response": ["", ""]},
+        )
+        records = [{"query": "q", "passages": {"passage_text": ["p1", "p2"]}}, {"query": "r", "documents": ["d"]}]
+        self.assertEqual(
+            pa.Table.from_batches(RankingDataset(records).to_batches()).to_pydict(),
+            {"query": ["q", "r"], "documents": [["p1", "p2"], ["d"]]},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
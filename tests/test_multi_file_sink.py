@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import lance
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from atlas.data_sinks import sink
+
+
+class MultiFileSinkTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.lance_path = os.path.join(self.directory, "out.lance")
+        self.data_dir = os.path.join(self.directory, "data")
+        os.makedirs(self.data_dir)
+        for part in range(5):
+            with open(os.path.join(self.data_dir, f"part-{part}.jsonl"), "w") as f:
+                for i in range(3):
+                    f.write(json.dumps({"instruction": f"{part}-{i}", "output": "o"}) + "\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def expected(self, parts):
+        return [f"{part}-{i}" for part in parts for i in range(3)]
+
+    def test_glob(self):
+        sink(os.path.join(self.data_dir, "part-*.jsonl"), self.lance_path, source_column="source", file_workers=2)
+        dataset = lance.dataset(self.lance_path)
+        self.assertEqual(dataset.version, 1)
+        table = dataset.to_table()
+        self.assertEqual(table.column("instruction").to_pylist(), self.expected(range(5)))
+        self.assertEqual(
+            table.column("source").to_pylist(),
+            [os.path.join(self.data_dir, f"part-{part}.jsonl") for part in range(5) for _ in range(3)],
+        )
+
+    def test_directory_and_workers(self):
+        sink(self.data_dir, self.lance_path, num_workers=2)
+        table = lance.dataset(self.lance_path).to_table()
+        self.assertEqual(table.column_names, ["instruction", "input", "output", "response"])
+        self.assertEqual(table.column("instruction").to_pylist(), self.expected(range(5)))
+
+    def test_list_of_parquet_files(self):
+        paths = []
+        for part in range(2):
+            paths.append(os.path.join(self.directory, f"{part}.parquet"))
+            # The second file has int32 values, which are cast to the type of the first.
+            values = pa.array([part * 10, part * 10 + 1], type=pa.int64() if part == 0 else pa.int32())
+            pq.write_table(pa.table({"a": values}), paths[-1])
+        sink(paths, self.lance_path)
+        self.assertEqual(lance.dataset(self.lance_path).to_table().column("a").to_pylist(), [0, 1, 10, 11])
+
+    def test_delta_by_file(self):
+        pattern = os.path.join(self.data_dir, "*.jsonl")
+        sink(pattern, self.lance_path, source_column="source", delta=True)
+        with open(os.path.join(self.data_dir, "part-5.jsonl"), "w") as f:
+            f.write(json.dumps({"instruction": "5-0", "output": "o"}) + "\n")
+        os.remove(os.path.join(self.data_dir, "part-0.jsonl"))
+        sink(pattern, self.lance_path, source_column="source", delta=True)
+        table = lance.dataset(self.lance_path).to_table()
+        self.assertEqual(sorted(table.column("instruction").to_pylist()), sorted(self.expected(range(1, 5)) + ["5-0"]))
+
+    def test_no_files(self):
+        with self.assertRaises(ValueError):
+            sink(os.path.join(self.data_dir, "*.csv"), self.lance_path)
+
+
+    def test_coco_and_yolo_are_not_supported(self):
+        paths = []
+        for part in range(2):
+            paths.append(os.path.join(self.data_dir, f"instances-{part}.json"))
+            with open(paths[-1], "w") as f:
+                json.dump({"images": [], "annotations": [], "categories": []}, f)
+        with self.assertRaisesRegex(ValueError, "COCO datasets cannot be sunk from several files"):
+            sink(os.path.join(self.data_dir, "instances-*.json"), self.lance_path)
+        with self.assertRaisesRegex(ValueError, "YOLO datasets cannot be sunk from several files"):
+            sink(paths, self.lance_path, task="object_detection", format="yolo")
+
+
+if __name__ == "__main__":
+    unittest.main()
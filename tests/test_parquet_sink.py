@@ -4,6 +4,7 @@ import unittest
 import lance
 import pandas as pd
 import pyarrow as pa
+import pyarrow.compute as pc
 import pyarrow.parquet as pq
 
 from atlas.data_sinks import sink
@@ -32,6 +33,17 @@ class ParquetSinkTest(unittest.TestCase):
         self.assertEqual(table.column("a").to_pylist(), [1, 2, 3])
         self.assertEqual(table.column("b").to_pylist(), ["x", "y", "z"])
 
+    def test_sink_parquet_pushdown(self):
+        table = pa.table({"a": list(range(1000)), "b": [str(i) for i in range(1000)]})
+        pq.write_table(table, self.parquet_path, row_group_size=100)
+        sink(self.parquet_path, self.lance_path, columns=["a"], filter=pc.field("a") >= 450, num_workers=2)
+        table = lance.dataset(self.lance_path).to_table()
+        self.assertEqual(table.column_names, ["a"])
+        self.assertEqual(table.column("a").to_pylist(), list(range(450, 1000)))
+
+        sink(self.parquet_path, self.lance_path, filter=[("a", "<", 3)])
+        self.assertEqual(lance.dataset(self.lance_path).to_table().column("b").to_pylist(), ["0", "1", "2"])
+
 
 if __name__ == "__main__":
     unittest.main()
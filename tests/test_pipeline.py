@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+import lance
+
+from atlas.data_sinks import sink
+from atlas.tasks.object_detection.coco import CocoDataset
+from atlas.utils.blob import take
+from atlas.utils.pipeline import prefetch
+
+
+class PipelineTest(unittest.TestCase):
+    def test_prefetch_preserves_order(self):
+        producers = [lambda i=i: iter(range(i * 10, i * 10 + 10)) for i in range(4)]
+        self.assertEqual(list(prefetch(producers, depth=2)), list(range(40)))
+
+    def test_prefetch_runs_in_background_threads(self):
+        thread_ids = []
+
+        def producer():
+            thread_ids.append(threading.get_ident())
+            yield 1
+
+        self.assertEqual(list(prefetch([producer])), [1])
+        self.assertNotEqual(thread_ids, [threading.get_ident()])
+
+    def test_prefetch_reraises_errors(self):
+        def failing():
+            yield 1
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            list(prefetch([failing]))
+
+    def test_prefetch_stops_producers_on_close(self):
+        produced = []
+
+        def endless():
+            i = 0
+            while True:
+                produced.append(i)
+                yield i
+                i += 1
+
+        reader = prefetch([endless], depth=1)
+        self.assertEqual(next(reader), 0)
+        reader.close()
+        self.assertLessEqual(len(produced), 4)
+
+    def test_sink_with_prefetch_workers(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            coco_data = {"images": [], "annotations": [], "categories": [{"id": 1, "name": "cat"}]}
+            for i in range(10):
+                file_name = f"image{i}.jpg"
+                with open(os.path.join(tmpdir, file_name), "wb") as f:
+                    f.write(f"image {i}".encode())
+                coco_data["images"].append({"id": i, "file_name": file_name})
+                coco_data["annotations"].append(
+                    {"id": i, "image_id": i, "category_id": 1, "bbox": [i, i, 1, 1]}
+                )
+            coco_path = os.path.join(tmpdir, "coco.json")
+            with open(coco_path, "w") as f:
+                json.dump(coco_data, f)
+
+            dataset = CocoDataset(coco_path, image_root=tmpdir)
+            self.assertEqual(len(dataset.shards(3)), 3)
+
+            uri = os.path.join(tmpdir, "coco.lance")
+            sink(dataset, uri, prefetch_workers=3, prefetch_depth=1)
+            table = take(lance.dataset(uri), range(10))
+            self.assertEqual(
+                table.column("file_name").to_pylist(), [f"image{i}.jpg" for i in range(10)]
+            )
+            self.assertEqual(
+                table.column("image").to_pylist(), [f"image {i}".encode() for i in range(10)]
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+import unittest
+
+import lance
+from PIL import Image
+
+from atlas import materialize
+from atlas.data_sinks import sink
+from atlas.tasks.object_detection.coco import CocoDataset
+from atlas.utils.blob import is_blob_field, is_reference_field, read_blobs, take
+
+
+class ReferenceSinkTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.uri = os.path.join(self.tmpdir.name, "refs.lance")
+        coco_data = {"images": [], "annotations": [], "categories": [{"id": 1, "name": "cat"}]}
+        self.images = []
+        for i in range(4):
+            file_name = f"image{i}.jpg"
+            with open(os.path.join(self.tmpdir.name, file_name), "wb") as f:
+                f.write(f"image {i}".encode() * (i + 1))
+            self.images.append(f"image {i}".encode() * (i + 1))
+            coco_data["images"].append({"id": i, "file_name": file_name})
+            coco_data["annotations"].append({"id": i, "image_id": i, "category_id": 1, "bbox": [i, i, 1, 1]})
+        self.coco_path = os.path.join(self.tmpdir.name, "coco.json")
+        with open(self.coco_path, "w") as f:
+            json.dump(coco_data, f)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def sink_references(self, **kwargs):
+        sink(CocoDataset(self.coco_path, image_root=self.tmpdir.name, image_mode="reference", **kwargs), self.uri)
+        return lance.dataset(self.uri)
+
+    def test_coco_references(self):
+        dataset = self.sink_references()
+        self.assertTrue(is_reference_field(dataset.schema.field("image")))
+        references = dataset.to_table().column("image").to_pylist()
+        self.assertEqual(references[1]["path"], os.path.join(self.tmpdir.name, "image1.jpg"))
+        self.assertEqual([r["size"] for r in references], [len(image) for image in self.images])
+        self.assertEqual(take(dataset, [3, 0]).column("image").to_pylist(), [self.images[3], self.images[0]])
+
+    def test_changed_file_is_detected(self):
+        dataset = self.sink_references(checksum=True)
+        with open(os.path.join(self.tmpdir.name, "image0.jpg"), "wb") as f:
+            f.write(b"IMAGE 0")  # same size, different contents
+        with self.assertRaises(ValueError):
+            take(dataset, [0])
+
+    def test_materialize(self):
+        self.sink_references()
+        target = os.path.join(self.tmpdir.name, "materialized.lance")
+        materialize(self.uri, target, batch_size=1, target_batch_bytes=1, commit_every=2)
+        dataset = lance.dataset(target)
+        self.assertGreater(dataset.version, 1)
+        self.assertTrue(is_blob_field(dataset.schema.field("image")))
+        self.assertEqual(read_blobs(dataset, "image", indices=range(4)).to_pylist(), self.images)
+        self.assertEqual(dataset.to_table().column("bbox").to_pylist()[2], [[2, 2, 1, 1]])
+
+        # A complete materialization is not redone.
+        version = dataset.version
+        materialize(self.uri, target)
+        self.assertEqual(lance.dataset(target).version, version)
+
+    def test_yolo_references(self):
+        yolo_dir = os.path.join(self.tmpdir.name, "yolo")
+        os.makedirs(os.path.join(yolo_dir, "images", "train2017"))
+        os.makedirs(os.path.join(yolo_dir, "labels", "train2017"))
+        Image.new("RGB", (30, 20)).save(os.path.join(yolo_dir, "images", "train2017", "a.jpg"))
+        with open(os.path.join(yolo_dir, "labels", "train2017", "a.txt"), "w") as f:
+            f.write("0 0.5 0.5 0.1 0.1\n")
+
+        sink(yolo_dir, self.uri, task="object_detection", format="yolo", image_mode="reference")
+        table = lance.dataset(self.uri).to_table()
+        self.assertEqual(table.column("width").to_pylist(), [30])
+        self.assertEqual(table.column("height").to_pylist(), [20])
+        self.assertEqual(table.column("image").to_pylist()[0]["path"], os.path.join(yolo_dir, "images", "train2017", "a.jpg"))
+
+
+if __name__ == "__main__":
+    unittest.main()
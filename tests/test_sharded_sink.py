@@ -0,0 +1,73 @@
+import json
+import os
+import tempfile
+import unittest
+
+import lance
+from datasets import Dataset
+
+from atlas.data_sinks import sink
+from atlas.tasks.instruction.instruction import InstructionDataset
+from atlas.utils.io import iter_lines
+
+
+class ShardedSinkTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.records = [
+            {"instruction": f"instruction {i}", "input": "", "output": f"output {i}" * (i % 7)}
+            for i in range(50)
+        ]
+        self.jsonl_path = os.path.join(self.tmpdir.name, "instructions.jsonl")
+        with open(self.jsonl_path, "w") as f:
+            for record in self.records:
+                f.write(json.dumps(record) + "\n")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_iter_lines_byte_ranges(self):
+        size = os.path.getsize(self.jsonl_path)
+        for num_ranges in [1, 2, 3, 7, 50, 200]:
+            bounds = [size * i // num_ranges for i in range(num_ranges + 1)]
+            lines = []
+            for start, stop in zip(bounds, bounds[1:]):
+                lines.extend(iter_lines(self.jsonl_path, start, stop))
+            self.assertEqual([json.loads(line) for line in lines], self.records)
+
+    def test_jsonl_shards_cover_file(self):
+        dataset = InstructionDataset(self.jsonl_path)
+        shards = dataset.shards(4)
+        self.assertEqual(len(shards), 4)
+        instructions = []
+        for shard in shards:
+            for batch in shard.to_batches(batch_size=8):
+                instructions.extend(batch.column("instruction").to_pylist())
+        self.assertEqual(instructions, [r["instruction"] for r in self.records])
+
+    def test_sink_with_num_workers(self):
+        uri = os.path.join(self.tmpdir.name, "instructions.lance")
+        sink(self.jsonl_path, uri, num_workers=3)
+        dataset = lance.dataset(uri)
+        self.assertEqual(dataset.version, 1)
+        self.assertEqual(dataset.count_rows(), 50)
+        self.assertEqual(
+            dataset.to_table().column("instruction").to_pylist(),
+            [r["instruction"] for r in self.records],
+        )
+
+        sink(self.jsonl_path, uri, mode="append", num_workers=2)
+        dataset = lance.dataset(uri)
+        self.assertEqual(dataset.version, 2)
+        self.assertEqual(dataset.count_rows(), 100)
+
+    def test_sink_hf_with_num_workers(self):
+        hf_dataset = Dataset.from_list([{"text": f"row {i}", "value": i} for i in range(20)])
+        uri = os.path.join(self.tmpdir.name, "hf.lance")
+        sink(hf_dataset, uri, num_workers=2)
+        table = lance.dataset(uri).to_table()
+        self.assertEqual(table.column("value").to_pylist(), list(range(20)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import lance
+from PIL import Image
+
+from atlas.data_sinks import sink
+from atlas.tasks.instruction.instruction import InstructionDataset
+from atlas.tasks.object_detection.coco import CocoDataset
+from atlas.tasks.object_detection.yolo import YoloDataset
+from atlas.utils.coco import CocoIndex
+
+
+class SinglePassSinkTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.uri = os.path.join(self.tmpdir.name, "data.lance")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_coco_annotations_parsed_once(self):
+        coco_data = {"images": [], "annotations": [], "categories": [{"id": 1, "name": "cat"}]}
+        for i in range(3):
+            with open(os.path.join(self.tmpdir.name, f"image{i}.jpg"), "wb") as f:
+                f.write(b"image")
+            coco_data["images"].append({"id": i, "file_name": f"image{i}.jpg"})
+        coco_path = os.path.join(self.tmpdir.name, "coco.json")
+        with open(coco_path, "w") as f:
+            json.dump(coco_data, f)
+
+        dataset = CocoDataset(coco_path, image_root=self.tmpdir.name)
+        with mock.patch("atlas.tasks.object_detection.coco.CocoIndex", wraps=CocoIndex) as index:
+            sink(dataset, self.uri)
+        self.assertEqual(index.call_count, 1)
+        self.assertEqual(lance.dataset(self.uri).count_rows(), 3)
+        self.assertEqual(CocoDataset.get_metadata(self.uri).class_names, {1: "cat"})
+
+    def test_yolo_files_scanned_once(self):
+        os.makedirs(os.path.join(self.tmpdir.name, "images", "train2017"))
+        os.makedirs(os.path.join(self.tmpdir.name, "labels", "train2017"))
+        for i in range(3):
+            Image.new("RGB", (8, 8)).save(os.path.join(self.tmpdir.name, "images", "train2017", f"{i}.jpg"))
+            with open(os.path.join(self.tmpdir.name, "labels", "train2017", f"{i}.txt"), "w") as f:
+                f.write(f"{i} 0.5 0.5 0.1 0.1\n")
+
+        dataset = YoloDataset(self.tmpdir.name)
+        with mock.patch.object(YoloDataset, "_list_files", wraps=dataset._list_files) as list_files:
+            sink(dataset, self.uri)
+        self.assertEqual(list_files.call_count, 1)
+        self.assertEqual(YoloDataset.get_metadata(self.uri).class_names, {0: "0", 1: "1", 2: "2"})
+        self.assertEqual(lance.dataset(self.uri).to_table().column("label").to_pylist(), [[0], [1], [2]])
+
+    def test_empty_source_with_declared_schema(self):
+        jsonl_path = os.path.join(self.tmpdir.name, "empty.jsonl")
+        open(jsonl_path, "w").close()
+        dataset = InstructionDataset(jsonl_path)
+        sink(dataset, self.uri)
+        written = lance.dataset(self.uri)
+        self.assertEqual(written.count_rows(), 0)
+        self.assertEqual(written.schema.names, dataset.schema.names)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,6 +8,7 @@ import pyarrow as pa
 
 from atlas.data_sinks import sink
 from atlas.tasks.data_model.base import BaseDataset
+from atlas.utils.blob import read_blobs
 
 
 class YoloSinkTest(unittest.TestCase):
@@ -61,7 +62,7 @@ class YoloSinkTest(unittest.TestCase):
         dataset = lance.dataset(self.lance_path)
         self.assertEqual(dataset.count_rows(), 3)
         table = dataset.to_table()
-        self.assertEqual(table.column_names, ["image", "bbox", "label", "height", "width", "file_name"])
+        self.assertEqual(table.column_names, ["image", "bbox", "label", "height", "width", "file_name", "split", "path"])
 
         images_data = []
         image_dir = os.path.join(self.yolo_dir, "images", "train2017")
@@ -69,13 +70,73 @@ class YoloSinkTest(unittest.TestCase):
             with open(os.path.join(image_dir, f"image{i}.jpg"), "rb") as f:
                 images_data.append(f.read())
 
-        self.assertEqual(table.column("image").to_pylist(), images_data)
+        self.assertEqual(read_blobs(dataset, "image", indices=[0, 1, 2]).to_pylist(), images_data)
         for i, row in enumerate(table.column("bbox").to_pylist()):
             for j, inner_row in enumerate(row):
                 for k, val in enumerate(inner_row):
                     self.assertAlmostEqual(val, [0.5, 0.5, 0.2, 0.2][k], places=6)
         self.assertEqual(table.column("label").to_pylist(), [[0], [1], [2]])
 
+    def test_sink_yolo_splits(self):
+        from PIL import Image
+        val_dir = os.path.join(self.yolo_dir, "images", "val")
+        os.makedirs(val_dir)
+        os.makedirs(os.path.join(self.yolo_dir, "labels", "val"))
+        Image.new("RGB", (10, 20)).save(os.path.join(val_dir, "val0.jpg"))  # no label file
+        Image.new("RGB", (10, 20)).save(os.path.join(val_dir, "val1.png"))
+        with open(os.path.join(self.yolo_dir, "labels", "val", "val1.txt"), "w") as f:
+            f.write("4 0.1 0.2 0.3 0.4\n\n1 0.5 0.5 0.5 0.5\n")
+        with open(os.path.join(self.yolo_dir, "data.yaml"), "w") as f:
+            yaml.dump({"train": "images/train2017", "val": ["images/val"], "test": "images/missing"}, f)
+
+        sink(self.yolo_dir, self.lance_path, task="object_detection", format="yolo")
+        table = lance.dataset(self.lance_path).to_table()
+        self.assertEqual(table.column("split").to_pylist(), ["train"] * 3 + ["val"] * 2)
+        self.assertEqual(table.column("file_name").to_pylist()[3:], ["val0.jpg", "val1.png"])
+        self.assertEqual(
+            table.column("path").to_pylist()[3:],
+            [os.path.join("images", "val", "val0.jpg"), os.path.join("images", "val", "val1.png")],
+        )
+        self.assertEqual(table.column("label").to_pylist()[3:], [[], [4, 1]])
+        self.assertEqual(table.column("height").to_pylist()[3:], [20, 20])
+        self.assertEqual(BaseDataset.get_metadata(self.lance_path).class_names, {i: str(i) for i in range(5)})
+
+    def test_sink_yolo_shared_split_directory(self):
+        # As in coco128, train and val point at the same images.
+        with open(os.path.join(self.yolo_dir, "data.yaml"), "w") as f:
+            yaml.dump({"train": "images/train2017", "val": "images/train2017"}, f)
+
+        sink(self.yolo_dir, self.lance_path, task="object_detection", format="yolo", delta=True)
+        table = lance.dataset(self.lance_path).to_table()
+        self.assertEqual(table.column("file_name").to_pylist(), ["image0.jpg", "image1.jpg", "image2.jpg"])
+        self.assertEqual(table.column("split").to_pylist(), ["train,val"] * 3)
+
+        with open(os.path.join(self.yolo_dir, "labels", "train2017", "image1.txt"), "w") as f:
+            f.write("7 0.5 0.5 0.2 0.2\n")
+        sink(self.yolo_dir, self.lance_path, task="object_detection", format="yolo", delta=True)
+        table = lance.dataset(self.lance_path).to_table().sort_by("path")
+        self.assertEqual(table.column("label").to_pylist(), [[0], [7], [2]])
+
+    def test_delta_sink_same_file_name_in_splits(self):
+        from PIL import Image
+        val_dir = os.path.join(self.yolo_dir, "images", "val")
+        val_labels = os.path.join(self.yolo_dir, "labels", "val")
+        os.makedirs(val_dir)
+        os.makedirs(val_labels)
+        Image.new("RGB", (10, 20)).save(os.path.join(val_dir, "image0.jpg"))
+        with open(os.path.join(val_labels, "image0.txt"), "w") as f:
+            f.write("3 0.1 0.2 0.3 0.4\n")
+
+        sink(self.yolo_dir, self.lance_path, task="object_detection", format="yolo", delta=True)
+        with open(os.path.join(val_labels, "image0.txt"), "w") as f:
+            f.write("4 0.1 0.2 0.3 0.4\n")
+        sink(self.yolo_dir, self.lance_path, task="object_detection", format="yolo", delta=True)
+
+        table = lance.dataset(self.lance_path).to_table().sort_by("path")
+        self.assertEqual(table.column("file_name").to_pylist(), ["image0.jpg", "image1.jpg", "image2.jpg", "image0.jpg"])
+        self.assertEqual(table.column("split").to_pylist(), ["train2017"] * 3 + ["val"])
+        self.assertEqual(table.column("label").to_pylist(), [[0], [1], [2], [4]])
+
 
 if __name__ == "__main__":
     unittest.main()